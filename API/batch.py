@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Union
+
+from API.client import api_client
+from conf import serializer
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ответ bulk-эндпоинта, при котором считаем его недоступным и переходим на одиночные запросы
+BULK_UNAVAILABLE_STATUSES = (404, 405, 501)
+
+
+class BulkUnavailable(Exception):
+    pass
+
+
+class BatchClient:
+    """
+    Склейка смен статуса / закрытий, появившихся за одну свечу, в один bulk-запрос.
+
+    Запрос:  POST {API_BASE_URL}{API_BULK_PATH}  {"items": [{"type": "position/changeStatus", "data": {...}}, ...]}
+    Ответ:   {"results": [{"status": 200}, ...]} — по одному на item, в том же порядке.
+    status каждого item переводится в True / False / None по той же таблице, что и одиночный запрос.
+
+    - пачка уходит сразу, как только её ждут все обработчики элементов, которые могли бы
+      что-то добавить (worker() в BaseTrigger.process_items): при TRIGGER_CONCURRENCY=1 — без ожидания,
+      при N — одним bulk на те элементы, что дошли до смены статуса вместе; вне триггера — сразу
+    - linger — верхняя граница ожидания (обработчик занят другим запросом), max_size — размер пачки
+    - bulk не настроен или недоступен (404/405/501) — одиночные запросы; повторная попытка bulk через retry_after
+    - ошибка bulk-запроса — None для всех элементов пачки («попробуйте ещё раз»)
+    """
+    def __init__(self, path: str | None, linger: float = 0.02, max_size: int = 100, retry_after: float = 60.0):
+        self.path = path
+        self.linger = linger
+        self.max_size = max_size
+        self.retry_after = retry_after
+
+        self._pending: list[tuple[dict, dict, Callable[[], Awaitable], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._workers = 0  # обработчики элементов, которые сейчас могут вызвать submit
+        self._sending: set[asyncio.Task] = set()
+        self._unavailable_until = 0.0
+
+        self.bulk_requests = 0
+        self.bulk_items = 0
+        self.single_requests = 0
+
+    @property
+    def available(self) -> bool:
+        return bool(self.path) and time.monotonic() >= self._unavailable_until
+
+    def stats(self) -> dict:
+        return {
+            "bulk_requests": self.bulk_requests,
+            "bulk_items": self.bulk_items,
+            "single_requests": self.single_requests,
+        }
+
+    @contextmanager
+    def worker(self):
+        """Обработчик элемента свечи: пока он работает, пачка может ждать его submit"""
+        self._workers += 1
+        try:
+            yield
+        finally:
+            self._workers -= 1
+            if self._pending and self._ready():
+                self._flush()
+
+    def _ready(self) -> bool:
+        """Добавить в пачку больше некому — ждать linger незачем"""
+        return len(self._pending) >= min(self.max_size, max(self._workers, 1))
+
+    async def submit(
+            self,
+            kind: str,
+            data: dict,
+            results: dict[int, bool],
+            single: Callable[[], Awaitable[Union[bool, None]]],
+    ) -> Union[bool, None]:
+        """
+        kind — путь одиночного эндпоинта ("position/changeStatus"), data — его тело,
+        results — таблица HTTP-статус → результат, single — одиночный запрос (fallback).
+        """
+        if not self.available:
+            self.single_requests += 1
+            return await single()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(({"type": kind, "data": data}, results, single, future))
+        if self._ready():
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list):
+        try:
+            responses = await self._post_bulk([item for item, _, _, _ in batch])
+        except BulkUnavailable:
+            self._unavailable_until = time.monotonic() + self.retry_after
+            logger.error(f"[API:Bulk] Эндпоинт {self.path} недоступен → одиночные запросы на {self.retry_after:.0f}s")
+            await asyncio.gather(*(self._send_single(single, future) for _, _, single, future in batch))
+            return
+        except Exception as e:
+            logger.error(f"[API:Bulk] Ошибка bulk-запроса ({len(batch)} шт.): {e}")
+            responses = [None] * len(batch)
+
+        for (_, results, _, future), response in zip(batch, responses):
+            if future.done():
+                continue
+            status = response.get("status") if isinstance(response, dict) else None
+            future.set_result(results.get(status))
+
+    async def _post_bulk(self, items: list[dict]) -> list:
+        self.bulk_requests += 1
+        self.bulk_items += len(items)
+        url = f"{settings.API_BASE_URL}{self.path}"
+        async with api_client.request('POST', url, json={"items": items}) as resp:
+            if resp.status in BULK_UNAVAILABLE_STATUSES:
+                raise BulkUnavailable(resp.status)
+            if resp.status != 200:
+                logger.error(f"[API:Bulk] Ошибка {resp.status} при запросе {url}")
+                return [None] * len(items)
+            data = serializer.loads(await resp.read())
+        responses = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(responses, list) or len(responses) != len(items):
+            logger.error(f"[API:Bulk] Невалидный ответ: ожидалось {len(items)} результатов")
+            return [None] * len(items)
+        return responses
+
+    async def _send_single(self, single: Callable[[], Awaitable], future: asyncio.Future):
+        self.single_requests += 1
+        try:
+            result = await single()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+
+batch_client = BatchClient(
+    path=settings.API_BULK_PATH,
+    linger=settings.API_BULK_LINGER_MS / 1000,
+    max_size=settings.API_BULK_MAX_SIZE,
+)
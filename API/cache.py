@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+from cachetools import TTLCache
+
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """
+    Кэш GET-запросов к API по uuid.
+    - single-flight: одновременные вызовы для одного uuid ждут один общий запрос
+    - короткий TTL и ограниченный размер (TTLCache вытесняет старые записи)
+    - None (ошибка, «попробуйте ещё раз») не кэшируется
+    - invalidating(uuid) — вокруг смены статуса: пока она идёт и сразу после, ответы GET не кэшируются
+    """
+    def __init__(self, name: str, maxsize: int, ttl: float, log_every: int = 1000):
+        self.name = name
+        self.log_every = log_every
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._changing: dict[str, int] = {}  # uuid → число незавершённых смен статуса
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._cache),
+            "inflight": len(self._inflight),
+        }
+
+    def invalidate(self, key: str):
+        self._cache.pop(key, None)
+        self._inflight.pop(key, None)
+
+    @asynccontextmanager
+    async def invalidating(self, key: str):
+        """Смена статуса uuid: сбрасываем кэш до и после запроса"""
+        self.invalidate(key)
+        self._changing[key] = self._changing.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self._changing[key] -= 1
+            if not self._changing[key]:
+                del self._changing[key]
+            self.invalidate(key)
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable]):
+        if key in self._cache:
+            self.hits += 1
+            self._maybe_log()
+            return self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+        self._maybe_log()
+        # shield: отмена одного из ожидающих не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is not task:
+            return  # успели инвалидировать
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result is not None and key not in self._changing:
+            self._cache[key] = result
+
+    def _maybe_log(self):
+        total = self.hits + self.misses + self.coalesced
+        if self.log_every and total % self.log_every == 0:
+            logger.info(f"[API:{self.name}] cache {self.stats()}")
+
+
+order_cache = SingleFlightCache("order", maxsize=settings.API_CACHE_SIZE, ttl=settings.API_CACHE_TTL)
+position_cache = SingleFlightCache("position", maxsize=settings.API_CACHE_SIZE, ttl=settings.API_CACHE_TTL)
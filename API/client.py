@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from conf import serializer
+from conf.config import DEFAULT_TIMEOUT, BASE_HEADERS, settings
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    """
+    Общий HTTP-клиент процесса для всех api_* функций.
+    - один ClientSession с долгоживущим TCPConnector: keep-alive, пул соединений, кэш DNS
+    - общий потолок одновременных запросов к API (параллельные триггеры не заваливают backend)
+    - JSON запросов и ответов — conf.serializer (orjson / msgspec, если установлены)
+    - создаётся в main() (start), закрывается при завершении (close)
+    """
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 0,
+            dns_ttl: int = 300,
+            keepalive_timeout: float = 30.0,
+            max_in_flight: int = 32,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=BASE_HEADERS,
+            timeout=DEFAULT_TIMEOUT,
+            json_serialize=serializer.dumps,  # тела json=... тем же движком, что и разбор ответов
+        )
+        logger.info(f"[API] Клиент создан: pool={self.limit}, per_host={self.limit_per_host}, dns_ttl={self.dns_ttl}s")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.info("[API] Клиент закрыт")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("ApiClient не запущен: вызовите await api_client.start()")
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """Запрос через общий пул (ленивый start для скриптов и фоновых задач)"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        async with self.slots:
+            async with self.session.request(method, url, **kwargs) as resp:
+                yield resp
+
+
+api_client = ApiClient(
+    limit=settings.API_POOL_LIMIT,
+    limit_per_host=settings.API_POOL_LIMIT_PER_HOST,
+    dns_ttl=settings.API_DNS_TTL,
+    keepalive_timeout=settings.API_KEEPALIVE_TIMEOUT,
+    max_in_flight=settings.API_MAX_IN_FLIGHT,
+)
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+
+from API.client import api_client
+from conf import serializer
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ListUnavailable(Exception):
+    """Список открытых элементов получен не полностью (ошибка HTTP / невалидный ответ)"""
+
+
+async def _get_page(url: str, params: dict | None) -> list[dict]:
+    async with api_client.request('GET', url, params=params) as resp:
+        if resp.status != 200:
+            raise ListUnavailable(f"{resp.status} при запросе {url} {params or ''}")
+        data = serializer.loads(await resp.read())
+    if not isinstance(data, list):
+        raise ListUnavailable(f"невалидный ответ (ожидался list) с {url} {params or ''}")
+    return data
+
+
+async def iter_list_open(path: str, page_size: int = 0, concurrency: int = 4) -> AsyncIterator[list[dict]]:
+    """
+    Открытые элементы {API_BASE_URL}/{path} страницами.
+
+    - page_size = 0 — один запрос без параметров, весь список одной страницей (как раньше)
+    - page_size > 0 — ?offset=&limit=, по concurrency страниц одновременно; короткая страница — последняя.
+      Если API параметры не поддерживает и вернул больше limit — это весь список, дальше не идём
+    - ListUnavailable — список оборвался; уже отданные страницы остаются у вызывающего
+    """
+    url = f"{settings.API_BASE_URL}/{path}"
+    if page_size <= 0:
+        yield await _get_page(url, None)
+        return
+
+    offset = 0
+    while True:
+        offsets = [offset + i * page_size for i in range(concurrency)]
+        pages = await asyncio.gather(*(_get_page(url, {"offset": o, "limit": page_size}) for o in offsets))
+        for page in pages:
+            yield page
+            if len(page) != page_size:
+                return
+        offset = offsets[-1] + page_size
@@ -1,12 +1,16 @@
 import logging
-import aiohttp
 
 from decimal import Decimal
-from typing import Literal, Union
+from typing import AsyncIterator, Literal, Union
 from dotenv import load_dotenv
 
+from API.batch import batch_client
+from API.cache import order_cache
+from API.client import api_client
+from API.listing import iter_list_open
 from API.schemas.order import OrderSchema
-from conf.config import DEFAULT_TIMEOUT, BASE_HEADERS, settings
+from conf import serializer
+from conf.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,49 +20,40 @@ async def api_get_order(
 ) -> Union[OrderSchema, bool, None]:
     """
     Получить ордер
+    Одновременные запросы одного uuid склеиваются, ответ кэшируется на API_CACHE_TTL
     """
+    return await order_cache.get(uuid, lambda: _fetch_order(uuid))
+
+
+async def _fetch_order(
+        uuid: str
+) -> Union[OrderSchema, bool, None]:
     params = {
         'uuid': uuid,
     }
     url = f"{settings.API_BASE_URL}/order/"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-                url=url,
-                params=params,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                position_schema = OrderSchema.model_validate(data)
-                if position_schema.status in ['completed', 'cancel']:
-                    return False
-                return position_schema
-            return None
-
-
-async def api_get_list_orders() -> list[dict]:
-    """Запрашивает список открытых ордеров с API"""
-    url = f"{settings.API_BASE_URL}/order/ListOpen"
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                    url=url,
-                    headers=BASE_HEADERS,
-                    timeout=DEFAULT_TIMEOUT,
-            ) as resp:
-                if resp.status != 200:
-                    logger.error(f"[InitLoader] Ошибка {resp.status} при запросе {url}")
-                    return []
-                data = await resp.json()
-                if not isinstance(data, list):
-                    logger.error(f"[InitLoader] Невалидный ответ (ожидался list) с {url}")
-                    return []
-                logger.info(f"[InitLoader] Получено {len(data)} элементов с order/ListOpen")
-                return data
-    except Exception as e:
-        logger.error(f"[InitLoader] Ошибка при запросе {url}: {e}")
-        return []
+    async with api_client.request(
+            'GET',
+            url,
+            params=params,
+    ) as resp:
+        if resp.status == 200:
+            data = serializer.loads(await resp.read())
+            position_schema = OrderSchema.model_validate(data)
+            if position_schema.status in ['completed', 'cancel']:
+                return False
+            return position_schema
+        return None
+
+
+def api_iter_list_orders() -> AsyncIterator[list[dict]]:
+    """Открытые ордеров с API страницами (API_LIST_PAGE_SIZE); ListUnavailable — список неполный"""
+    return iter_list_open('order/ListOpen', settings.API_LIST_PAGE_SIZE, settings.API_LIST_CONCURRENCY)
+
+
+# HTTP-статус → результат (остальные статусы → None)
+CHANGE_STATUS_RESULTS = {200: True, 409: True, 404: False}
+CLOSE_RESULTS = {200: True, 409: True, 424: True, 404: False}
 
 
 async def api_change_status_order(
@@ -76,23 +71,13 @@ async def api_change_status_order(
         'uuid': uuid,
         'status': status,
     }
-    url = f"{settings.API_BASE_URL}/order/changeStatus"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=data,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status == 200:
-                return True
-            if resp.status == 409:
-                return True
-            if resp.status == 404:
-                return False
-            if resp.status == 500:
-                return None
-            return None
+    async with order_cache.invalidating(uuid):
+        return await batch_client.submit(
+            'order/changeStatus',
+            data,
+            CHANGE_STATUS_RESULTS,
+            lambda: _post_order('order/changeStatus', data, CHANGE_STATUS_RESULTS),
+        )
 
 
 async def api_close_order(
@@ -112,22 +97,21 @@ async def api_close_order(
         'rate': str(rate),
         'kline_ms': kline_ms,
     }
-    url = f"{settings.API_BASE_URL}/order/close"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=data,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status == 200:
-                return True
-            if resp.status == 409:
-                return True
-            if resp.status == 424:
-                return True
-            if resp.status == 404:
-                return False
-            if resp.status == 500:
-                return None
-            return None
+    async with order_cache.invalidating(uuid):
+        return await batch_client.submit(
+            'order/close',
+            data,
+            CLOSE_RESULTS,
+            lambda: _post_order('order/close', data, CLOSE_RESULTS),
+        )
+
+
+async def _post_order(path: str, data: dict, results: dict[int, bool]) -> Union[bool, None]:
+    """Одиночный POST (без склейки в bulk)"""
+    url = f"{settings.API_BASE_URL}/{path}"
+    async with api_client.request(
+            'POST',
+            url,
+            json=data,
+    ) as resp:
+        return results.get(resp.status)
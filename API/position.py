@@ -1,11 +1,14 @@
 import logging
 
-import aiohttp
-
-from typing import Union, Literal
+from typing import AsyncIterator, Union, Literal
 
+from API.batch import batch_client
+from API.cache import position_cache
+from API.client import api_client
+from API.listing import iter_list_open
 from API.schemas.position import PositionSchema
-from conf.config import DEFAULT_TIMEOUT, BASE_HEADERS, settings
+from conf import serializer
+from conf.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -15,47 +18,39 @@ async def api_get_position(
 ) -> Union[PositionSchema, bool, None]:
     """
     Получить позицию
+    Одновременные запросы одного uuid склеиваются, ответ кэшируется на API_CACHE_TTL
     """
+    return await position_cache.get(uuid, lambda: _fetch_position(uuid))
+
+
+async def _fetch_position(
+        uuid: str
+) -> Union[PositionSchema, bool, None]:
     params = {
         'uuid': uuid,
     }
     url = f"{settings.API_BASE_URL}/position/"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-                url=url,
-                params=params,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                position_schema = PositionSchema.model_validate(data)
-                if position_schema.status in ['completed', 'cancel']:
-                    return False
-                return position_schema
-            return None
+    async with api_client.request(
+            'GET',
+            url,
+            params=params,
+    ) as resp:
+        if resp.status == 200:
+            data = serializer.loads(await resp.read())
+            position_schema = PositionSchema.model_validate(data)
+            if position_schema.status in ['completed', 'cancel']:
+                return False
+            return position_schema
+        return None
 
 
-async def api_get_list_positions() -> list[dict]:
-    """
-    Запрашивает список открытых ордеров с API
-    """
-    url = f"{settings.API_BASE_URL}/position/ListOpen"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-                url,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status != 200:
-                logger.error(f"[InitLoader] Ошибка {resp.status} при запросе {url}")
-                return []
-            data = await resp.json()
-            if not isinstance(data, list):
-                logger.error(f"[InitLoader] Невалидный ответ (ожидался list) с {url}")
-                return []
-            logger.info(f"[InitLoader] Получено {len(data)} элементов с position/ListOpen")
-            return data
+def api_iter_list_positions() -> AsyncIterator[list[dict]]:
+    """Открытые позиций с API страницами (API_LIST_PAGE_SIZE); ListUnavailable — список неполный"""
+    return iter_list_open('position/ListOpen', settings.API_LIST_PAGE_SIZE, settings.API_LIST_CONCURRENCY)
+
+
+# HTTP-статус → результат (остальные статусы → None)
+CHANGE_STATUS_RESULTS = {200: True, 409: True, 404: False}
 
 
 async def api_change_status_position(
@@ -74,20 +69,21 @@ async def api_change_status_position(
         'status': status,
         'kline_ms': kline_ms,
     }
+    async with position_cache.invalidating(uuid):
+        return await batch_client.submit(
+            'position/changeStatus',
+            data,
+            CHANGE_STATUS_RESULTS,
+            lambda: _post_change_status(data),
+        )
+
+
+async def _post_change_status(data: dict) -> Union[bool, None]:
+    """Одиночный POST (без склейки в bulk)"""
     url = f"{settings.API_BASE_URL}/position/changeStatus"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                url,
-                json=data,
-                headers=BASE_HEADERS,
-                timeout=DEFAULT_TIMEOUT,
-        ) as resp:
-            if resp.status == 200:
-                return True
-            if resp.status == 409:
-                return True
-            if resp.status == 404:
-                return False
-            if resp.status == 500:
-                return None
-            return None
+    async with api_client.request(
+            'POST',
+            url,
+            json=data,
+    ) as resp:
+        return CHANGE_STATUS_RESULTS.get(resp.status)
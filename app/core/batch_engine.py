@@ -0,0 +1,244 @@
+"""
+Векторный режим выборки (EVAL_MODE=numpy).
+
+Книга хранит все элементы хендлера в непрерывных NumPy-колонках и на каждой свече
+одним проходом считает маски: вход в позицию, достижение target_rate, пробой MAX/MIN,
+истечение срока жизни. Дальше в триггер (и к API/Redis) уходит только список попаданий.
+
+Эталон — скалярные правила app/services/rules.py: совпадение выборок проверяет
+tests/test_batch_engine_parity.py, а при EVAL_PARITY_CHECK=1 каждая выборка
+сверяется с ними и в работе, расхождения пишутся в лог.
+"""
+import functools
+import logging
+import math
+import time
+from decimal import Decimal
+from typing import Hashable
+
+from app.core.books import MonitoringBook, OrderBook, PositionBook
+from app.core.lifetime_scheduler import LifetimeScheduler
+from app.services.rules import entry_touched, extremum_breach, target_reached
+from conf.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # numpy — опциональная зависимость
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+def buy_threshold(target_rate: Decimal) -> float:
+    """Минимальный float t, для которого Decimal(t) >= target_rate: close >= t ⇔ Decimal(close) >= target_rate"""
+    t = float(target_rate)
+    if Decimal(t) < target_rate:
+        t = math.nextafter(t, math.inf)
+    return t
+
+
+def sell_threshold(target_rate: Decimal) -> float:
+    """Максимальный float t, для которого Decimal(t) <= target_rate: close <= t ⇔ Decimal(close) <= target_rate"""
+    t = float(target_rate)
+    if Decimal(t) > target_rate:
+        t = math.nextafter(t, -math.inf)
+    return t
+
+
+class ArrayBook(MonitoringBook):
+    """
+    Колоночная книга: строка на элемент, освободившиеся строки переиспользуются.
+    Интерфейс тот же, что у MonitoringBook (on_add / on_remove / admit / select).
+    """
+    def __init__(self, capacity: int = 1024, parity_check: bool = False):
+        self.parity_check = parity_check
+        self._rows: dict[Hashable, int] = {}
+        self._row_keys: list[Hashable | None] = []
+        self._free: list[int] = []
+        self._reference: dict[Hashable, tuple] = {}  # исходные значения для сверки со скалярным эталоном
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.active = np.zeros(capacity, dtype=bool)
+        self.admitted = np.zeros(capacity, dtype=bool)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.price = np.full(capacity, np.nan)
+        self.target = np.full(capacity, np.nan)
+        self.max_price = np.full(capacity, np.nan)
+        self.min_price = np.full(capacity, np.nan)
+        self.created = np.full(capacity, np.nan)
+
+    def _grow(self):
+        size = len(self.active)
+        columns = ("active", "admitted", "side", "price", "target", "max_price", "min_price", "created")
+        old = {name: getattr(self, name) for name in columns}
+        self._allocate(size * 2)
+        for name, column in old.items():
+            getattr(self, name)[:size] = column
+
+    def __len__(self):
+        return len(self._rows)
+
+    def is_admitted(self, key):
+        row = self._rows.get(key)
+        return row is not None and bool(self.admitted[row])
+
+    def on_add(self, key, record):
+        if key in self._rows:
+            self.on_remove(key)
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._row_keys)
+            if row >= len(self.active):
+                self._grow()
+            self._row_keys.append(None)
+        self._rows[key] = row
+        self._row_keys[row] = key
+        self.active[row] = True
+        self.admitted[row] = False
+        if record.category == "option" and record.created_ts is not None:
+            self.created[row] = record.created_ts
+
+    def on_remove(self, key):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._reference.pop(key, None)
+        self._row_keys[row] = None
+        self.active[row] = False
+        self.admitted[row] = False
+        self.side[row] = 0
+        for column in (self.price, self.target, self.max_price, self.min_price, self.created):
+            column[row] = np.nan
+        self._free.append(row)
+
+    def admit(self, key, record, state):
+        row = self._rows.get(key)
+        if row is None or self.admitted[row] or not record.valid or not self._indexable(record):
+            return False
+        try:
+            max_price = float(state["max_price"])
+            min_price = float(state["min_price"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        self.max_price[row] = max_price
+        self.min_price[row] = min_price
+        self._index_row(key, row, record)
+        self.admitted[row] = True
+        return True
+
+    def select(self, close: float, low: float, high: float, **params) -> list[Hashable]:
+        n = len(self._row_keys)
+        active = self.active[:n]
+        admitted = self.admitted[:n]
+        max_price = self.max_price[:n]
+        min_price = self.min_price[:n]
+
+        pending = active & ~admitted
+        new_max = admitted & (max_price < close)
+        new_min = admitted & (min_price > close)
+        triggered = admitted & self._triggered_mask(n, close, low, high)
+
+        if self.parity_check:
+            self._check_parity(n, close, low, high, new_max, new_min, triggered)
+
+        max_price[new_max] = close
+        min_price[new_min] = close
+
+        rows = np.flatnonzero(pending | new_max | new_min | triggered | self._expired_mask(n))
+        return [self._row_keys[row] for row in rows]
+
+    def _check_parity(self, n, close, low, high, new_max, new_min, triggered):
+        """Сверка векторных масок со скалярными правилами app/services/rules.py"""
+        mismatches = []
+        for row in np.flatnonzero(self.admitted[:n]):
+            key = self._row_keys[row]
+            ref_max, ref_min = extremum_breach(float(self.max_price[row]), float(self.min_price[row]), close)
+            ref_hit = self._reference_hit(key, close, low, high)
+            if (ref_max, ref_min, ref_hit) != (bool(new_max[row]), bool(new_min[row]), bool(triggered[row])):
+                mismatches.append(key)
+        if mismatches:
+            logger.error(f"[BatchEngine] ❗ Расхождение со скалярным эталоном ({len(mismatches)}): {mismatches[:10]}")
+
+    # must be overridden
+    def _index_row(self, key, row, record): raise NotImplementedError
+    def _triggered_mask(self, n, close, low, high): raise NotImplementedError
+    def _reference_hit(self, key, close, low, high) -> bool: raise NotImplementedError
+    def _expired_mask(self, n): return np.zeros(n, dtype=bool)
+
+
+class ArrayPositionBook(ArrayBook):
+    """Позиции: вход при low <= price <= high, срок жизни по колонке created"""
+    _indexable = PositionBook._indexable
+
+    def __init__(self, lifetime: LifetimeScheduler | None, capacity: int = 1024, parity_check: bool = False):
+        super().__init__(capacity, parity_check)
+        self.lifetime = lifetime  # общий таймер хендлера, здесь нужен только lifetime_seconds
+
+    def _index_row(self, key, row, record):
+        self.price[row] = record.price
+        self._reference[key] = (record.side, record.price)
+
+    def _triggered_mask(self, n, close, low, high):
+        price = self.price[:n]
+        return (low <= price) & (price <= high)
+
+    def _reference_hit(self, key, close, low, high):
+        side, price = self._reference[key]
+        return entry_touched(side, price, low, high)
+
+    def _expired_mask(self, n):
+        # таймер LifetimeScheduler отменяет позиции сам, здесь — страховка на случай его задержки
+        if self.lifetime is None or self.lifetime.lifetime_seconds is None:
+            return np.zeros(n, dtype=bool)
+        return self.active[:n] & (self.created[:n] + self.lifetime.lifetime_seconds <= time.time())
+
+
+class ArrayOrderBook(ArrayBook):
+    """Ордера: buy при close >= target_rate, sell при close <= target_rate"""
+    _indexable = OrderBook._indexable
+
+    def _index_row(self, key, row, record):
+        target_rate = record.target_rate
+        if record.side == "buy":
+            self.side[row] = SIDE_BUY
+            self.target[row] = buy_threshold(target_rate)
+        else:
+            self.side[row] = SIDE_SELL
+            self.target[row] = sell_threshold(target_rate)
+        self._reference[key] = (record.side, target_rate)
+
+    def _triggered_mask(self, n, close, low, high):
+        side = self.side[:n]
+        target = self.target[:n]
+        return ((side == SIDE_BUY) & (close >= target)) | ((side == SIDE_SELL) & (close <= target))
+
+    def _reference_hit(self, key, close, low, high):
+        side, target_rate = self._reference[key]
+        return target_reached(side, target_rate, Decimal(close))
+
+
+@functools.cache  # книги создаются на каждый символ — решение (и предупреждение) одно на процесс
+def _batch_mode() -> bool:
+    if settings.EVAL_MODE != "numpy":
+        return False
+    if np is None:
+        logger.error("[BatchEngine] EVAL_MODE=numpy, но numpy не установлен → индексный режим")
+        return False
+    return True
+
+
+def make_position_book(lifetime: LifetimeScheduler | None = None) -> MonitoringBook:
+    if _batch_mode():
+        return ArrayPositionBook(lifetime, parity_check=settings.EVAL_PARITY_CHECK)
+    return PositionBook()
+
+
+def make_order_book() -> MonitoringBook:
+    if _batch_mode():
+        return ArrayOrderBook(parity_check=settings.EVAL_PARITY_CHECK)
+    return OrderBook()
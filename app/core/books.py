@@ -0,0 +1,144 @@
+import datetime
+from decimal import Decimal
+from typing import Hashable
+
+from app.core.sorted_index import SortedIndex
+
+
+def parse_created_at(value) -> float | None:
+    """created_at в формате ISO ("2025-11-21T05:19:13.852Z") → unix ts, None если не распарсить"""
+    if not isinstance(value, str):
+        return None
+    try:
+        created_dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if created_dt.tzinfo is None:
+        return None
+    return created_dt.timestamp()
+
+
+class MonitoringBook:
+    """
+    Индексы книги хендлера: по ним триггер выбирает только те элементы,
+    которые свеча действительно затронула.
+
+    - scan — элементы без индекса (ещё не приняты в мониторинг, неизвестная категория):
+      обрабатываются полным проходом на каждой свече
+    - max_index / min_index — экстремумы принятых элементов:
+      элемент выбирается, когда close пробил его MAX или MIN
+    """
+    def __init__(self):
+        self.scan: dict[Hashable, None] = {}
+        self.max_index = SortedIndex()
+        self.min_index = SortedIndex()
+
+    def __len__(self):
+        return len(self.scan) + len(self.max_index)
+
+    def is_admitted(self, key: Hashable) -> bool:
+        return key in self.max_index
+
+    def on_add(self, key: Hashable, record):
+        """Новый элемент в очереди хендлера"""
+        self.scan[key] = None
+
+    def on_remove(self, key: Hashable):
+        """Элемент удалён из очереди хендлера"""
+        self.scan.pop(key, None)
+        self.max_index.discard(key)
+        self.min_index.discard(key)
+
+    def admit(self, key: Hashable, record, state: dict) -> bool:
+        """
+        Элемент принят в мониторинг (state — запись order:/position: из Redis).
+        Переносим его из scan в индексы. record — ItemRecord, уже проверенный схемой.
+        """
+        if key not in self.scan or not record.valid or not self._indexable(record):
+            return False
+        try:
+            max_price = float(state["max_price"])
+            min_price = float(state["min_price"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        self.scan.pop(key, None)
+        self.max_index.add(key, max_price)
+        self.min_index.add(key, min_price)
+        self._index(key, record)
+        return True
+
+    def select(self, close: float, low: float, high: float, **params) -> list[Hashable]:
+        """Ключи, которые нужно обработать на этой свече (без повторов)"""
+        selected = dict.fromkeys(self.scan)
+
+        # экстремумы: сервис обновит их в Redis, индекс двигаем по тому же правилу
+        for key in self.max_index.below(close):
+            self.max_index.add(key, close)
+            selected[key] = None
+        for key in self.min_index.above(close):
+            self.min_index.add(key, close)
+            selected[key] = None
+
+        for key in self._select_triggered(close, low, high, **params):
+            selected[key] = None
+        return list(selected)
+
+    # must be overridden
+    def _indexable(self, record) -> bool: return False
+    def _index(self, key, record): pass
+    def _select_triggered(self, close, low, high, **params): return ()
+
+
+class PositionBook(MonitoringBook):
+    """
+    Книга позиций.
+    - entry_index — цена входа принятых опционных позиций: выбираются при low <= price <= high
+    Срок жизни ведёт PositionHandler.lifetime — он общий для всех символов.
+    """
+    def __init__(self):
+        super().__init__()
+        self.entry_index = SortedIndex()
+
+    def on_remove(self, key):
+        super().on_remove(key)
+        self.entry_index.discard(key)
+
+    def _indexable(self, record):
+        return record.category == "option" and record.status not in ("completed", "canceled")
+
+    def _index(self, key, record):
+        self.entry_index.add(key, record.price)
+
+    def _select_triggered(self, close, low, high, **params):
+        return self.entry_index.between(low, high)
+
+
+class OrderBook(MonitoringBook):
+    """
+    Книга ордеров (take-profit по target_rate).
+    - buy_index — buy закрывается при close >= target_rate: выбираем префикс target_rate <= close
+    - sell_index — sell закрывается при close <= target_rate: выбираем суффикс target_rate >= close
+    """
+    def __init__(self):
+        super().__init__()
+        self.buy_index = SortedIndex()
+        self.sell_index = SortedIndex()
+
+    def on_remove(self, key):
+        super().on_remove(key)
+        self.buy_index.discard(key)
+        self.sell_index.discard(key)
+
+    def _indexable(self, record):
+        return record.category == "option" and record.target_rate is not None
+
+    def _index(self, key, record):
+        if record.side == "buy":
+            self.buy_index.add(key, record.target_rate)
+        else:
+            self.sell_index.add(key, record.target_rate)
+
+    def _select_triggered(self, close, low, high, **params):
+        current_price = Decimal(close)
+        yield from self.buy_index.at_most(current_price)
+        yield from self.sell_index.at_least(current_price)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+from typing import Callable
+
+from app.core.redis_batch import write_batch
+from conf import serializer
+from conf.conf_redis import redis_server
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExtremumTracker:
+    """
+    Экстремумы extremum:{order|position}:{uuid}:{MIN|MAX} в памяти с отложенной записью в Redis (db 3).
+
+    - update() только меняет значение в памяти и помечает ключ грязным
+    - flush() раз в interval отправляет все грязные ключи одной пачкой (write_batch)
+    - release() при удалении элемента пишет его грязные ключи сразу и забывает их,
+      так что значение в Redis никогда не старше interval
+    - interval = 0 — запись на каждое изменение (как раньше, но через write_batch)
+    - observed / written — сколько изменений увидели и сколько записей реально отправили
+    """
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._values: dict[str, bytes] = {}  # redis key → JSON {"value", "dt"}
+        self._dirty: set[str] = set()
+
+        self.observed = 0
+        self.written = 0
+
+    @staticmethod
+    def key(kind: str, uuid: str, side: str) -> str:
+        return f"extremum:{kind}:{uuid}:{side}"
+
+    def stats(self) -> dict:
+        return {
+            "observed": self.observed,
+            "written": self.written,
+            "dirty": len(self._dirty),
+            "tracked": len(self._values),
+        }
+
+    @staticmethod
+    def _encode(value: float) -> bytes:
+        return serializer.dumpb({
+            "value": value,
+            "dt": datetime.now(UTC).strftime("%d-%m-%Y %H:%M:%S"),
+        })
+
+    def update(self, key: str, value: float):
+        self.observed += 1
+        self._values[key] = self._encode(value)
+        if self.interval <= 0:
+            self._write(key)
+        else:
+            self._dirty.add(key)
+
+    def seed(self, key: str, value: float):
+        """Значение из ленты MONITORING (резерв): в Redis его пишет лидер, ключ не грязный"""
+        self._values[key] = self._encode(value)
+
+    def resync(self):
+        """Резерв стал лидером: всё, что видели в ленте, дописываем — прежний лидер мог не успеть"""
+        self._dirty.update(self._values)
+
+    def get(self, key: str) -> bytes | None:
+        """JSON значения, если ключ отслеживается в памяти"""
+        return self._values.get(key)
+
+    def _write(self, key: str):
+        self._dirty.discard(key)
+        write_batch.set(redis_server, key, self._values[key])
+        self.written += 1
+
+    def release(self, kind: str, uuid: str):
+        """Элемент удалён: дописываем его экстремумы немедленно и перестаём отслеживать"""
+        for side in ("MIN", "MAX"):
+            key = self.key(kind, uuid, side)
+            if key in self._dirty:
+                self._write(key)
+            self._values.pop(key, None)
+
+    def retain(self, keep: Callable[[str], bool]):
+        """Оставляем только экстремумы uuid, для которых keep(uuid) — остальные дописываем и забываем"""
+        for key in list(self._values):
+            _, kind, uuid, _ = key.split(":", 3)
+            if not keep(uuid):
+                self.release(kind, uuid)
+
+    async def flush(self):
+        if self._dirty:
+            count = len(self._dirty)
+            for key in list(self._dirty):
+                self._write(key)
+            logger.debug(f"[Extremum] flush {count} ключей, {self.stats()}")
+        await write_batch.flush()
+
+    async def run(self):
+        if self.interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"[Extremum] Ошибка flush: {e}")
+
+
+extremum_tracker = ExtremumTracker(interval=settings.EXTREMUM_FLUSH_INTERVAL)
@@ -1,36 +1,34 @@
 import logging
+import time
+from typing import AsyncIterator, Callable
 
 import aiohttp
 import asyncio
 
-from API.orders import api_get_list_orders
-from API.position import api_get_list_positions
+from API.orders import api_iter_list_orders
+from API.position import api_iter_list_positions
 
 DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=15)
 
+# сколько элементов кладётся в хендлер за один захват lock (свечи между пачками не ждут)
+LOAD_CHUNK = 1000
+
 logger = logging.getLogger(__name__)
 
 
-async def process_positions_data(data_list: list[dict]) -> list[dict]:
-    """Фильтрация и предобработка позиций"""
-    processed = []
-    for item in data_list:
-        if item.get("status") in ["cancel", "completed"]:
-            continue
-        processed.append(item)
-    logger.info(f"[InitLoader] Отфильтровано позиций: {len(processed)} из {len(data_list)}")
-    return processed
+def process_positions_data(data_list: list[dict]) -> list[dict]:
+    """Фильтрация и предобработка позиций (страница ListOpen)"""
+    return [item for item in data_list if item.get("status") not in ("cancel", "completed")]
 
 
-async def process_orders_data(data_list: list[dict]) -> list[dict]:
-    """Фильтрация и предобработка ордеров"""
+def process_orders_data(data_list: list[dict]) -> list[dict]:
+    """Фильтрация и предобработка ордеров (страница ListOpen)"""
     processed = []
     for item in data_list:
-        if item.get("status") in ["cancel", "completed"]:
+        if item.get("status") in ("cancel", "completed"):
             continue
         item["full_symbol"] = f"{item.get('symbol', '').upper()}_{item.get('side', '').upper()}"
         processed.append(item)
-    logger.info(f"[InitLoader] Отфильтровано ордеров: {len(processed)} из {len(data_list)}")
     return processed
 
 
@@ -39,37 +37,81 @@ async def process_orders_data(data_list: list[dict]) -> list[dict]:
 class InitialDataLoader:
     """
     Первичная загрузка данных с API в handlers.
+    ListOpen идёт страницами (API_LIST_PAGE_SIZE), каждая сразу уходит в handler.bulk_add.
     Таймауты + мягкие ошибки.
+    owns(item) — элемент принадлежит этому процессу (партиция воркера); None — все элементы.
     """
-    def __init__(self, base_url: str, handlers: list):
+    def __init__(self, base_url: str, handlers: list, owns: Callable[[dict], bool] | None = None):
         self.base_url = base_url.rstrip("/")
         self.handlers = handlers
+        self.owns = owns
+
+    async def _process_data(self, handler, data_list: list[dict]) -> int:
+        """Передаёт страницу в хендлер пачками; сколько добавлено"""
+        if self.owns is not None:
+            data_list = [item for item in data_list if self.owns(item)]
+        added = 0
+        for start in range(0, len(data_list), LOAD_CHUNK):
+            added += await handler.bulk_add(data_list[start:start + LOAD_CHUNK])
+        return added
+
+    def _pages(self, handler) -> AsyncIterator[list[dict]] | None:
+        """ListOpen хендлера страницами после фильтрации, None — хендлер не загружается с API"""
+        if handler.queue_name == "queue_monitoring_position":
+            pages, process = api_iter_list_positions(), process_positions_data
+        elif handler.queue_name == "queue_monitoring_order":
+            pages, process = api_iter_list_orders(), process_orders_data
+        else:
+            return None
 
-    async def _process_data(self, handler, data_list: list[dict]):
-        """Передаёт данные в хендлер"""
-        for item in data_list:
-            await handler.add_message(None, item)
+        async def processed():
+            async for page in pages:
+                yield process(page)
+        return processed()
+
+    async def _load(self, handler, seen: set | None = None) -> bool:
+        """
+        Страницы ListOpen → хендлер по мере прихода (весь список в памяти не держим).
+        seen — сюда складываются uuid всех открытых элементов (для reconcile).
+        False — список получен не полностью.
+        """
+        pages = self._pages(handler)
+        if pages is None:
+            return True
+        started = time.perf_counter()
+        total = added = count = 0
+        complete = True
+        try:
+            async for page in pages:
+                count += 1
+                total += len(page)
+                if seen is not None:
+                    seen.update(item.get("uuid") for item in page)
+                added += await self._process_data(handler, page)
+        except Exception as e:  # ListUnavailable, сеть, невалидный JSON — мягкая ошибка, как раньше
+            logger.error(f"[InitLoader] {handler.queue_name}: ListOpen оборвался на странице {count + 1}: {e}")
+            complete = False
+        logger.info(
+            f"[InitLoader] {handler.queue_name}: открытых {total}, добавлено {added}, "
+            f"страниц {count} за {time.perf_counter() - started:.2f}s"
+        )
+        return complete
 
     async def load_all(self):
         """Загружает данные по всем хендлерам"""
-        tasks = []
+        await asyncio.gather(*(self._load(handler) for handler in self.handlers))
+
+    async def reconcile(self, restored: dict[str, set[str]]):
+        """
+        После рестарта из локального журнала: догружаем то, что открылось за время простоя,
+        и убираем восстановленные элементы, которых в ListOpen уже нет.
+        restored — kind хендлера → uuid, поднятые с диска; пришедшее из Rabbit после старта не трогаем.
+        Неполный или пустой ответ API (ошибка неотличима от пустого списка) ничего не удаляет.
+        """
         for handler in self.handlers:
-            if handler.queue_name == "queue_monitoring_position":
-                tasks.append(self._load_positions(handler))
-            elif handler.queue_name == "queue_monitoring_order":
-                tasks.append(self._load_orders(handler))
-        await asyncio.gather(*tasks)
-
-    async def _load_positions(self, handler):
-        data = await api_get_list_positions()
-        if not data:
-            return
-        processed = await process_positions_data(data)
-        await self._process_data(handler, processed)
-
-    async def _load_orders(self, handler):
-        data = await api_get_list_orders()
-        if not data:
-            return
-        processed = await process_orders_data(data)
-        await self._process_data(handler, processed)
\ No newline at end of file
+            open_uuids: set = set()
+            if not await self._load(handler, open_uuids) or not open_uuids:
+                continue
+            stale = restored.get(handler.kind, set()) - open_uuids
+            dropped = await handler.drop_messages(lambda record: record.uuid in stale)
+            logger.info(f"[InitLoader] {handler.queue_name}: сверка с API — закрыто за простой {len(dropped)}")
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+from typing import Callable
+
+from conf import serializer
+
+logger = logging.getLogger(__name__)
+
+
+class HandlerJournal:
+    """
+    Локальный журнал очереди хендлера: рестарт с диска вместо полной загрузки ListOpen.
+
+    - {name}.journal — append-only, строка JSON на изменение: add / requeue / remove / admit
+    - {name}.snapshot — вся очередь на момент последнего сжатия (порядок FIFO, флаг admitted)
+    - у каждой записи журнала свой seq; snapshot помнит последний вошедший в него seq,
+      поэтому журнал, не успевший обнулиться после сжатия, при чтении не применяется повторно
+    - run() раз в flush_interval дописывает накопленное (файл пишется в потоке, не в event loop)
+      и сжимает журнал в snapshot, когда в нём больше compact_every записей
+    - пишет только после attach(): резерв восстанавливается из файлов, но не трогает их до перехвата
+
+    Элементы без uuid не журналируются — их не узнать после рестарта.
+    """
+    def __init__(self, directory: str, name: str, flush_interval: float = 1.0, compact_every: int = 10000):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.journal")
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot")
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self._items: dict[str, dict] = {}  # uuid → {"body", "admitted"} в порядке очереди
+        self._pending: list[bytes] = []
+        self._seq = 0
+        self._entries = 0  # записей в журнале после последнего snapshot
+        self._writing = asyncio.Lock()
+        self.enabled = False
+        self.restored: set[str] = set()  # uuid, поднятые с диска (их сверяет InitialDataLoader.reconcile)
+
+    def __len__(self):
+        return len(self._items)
+
+    # ---------- изменения очереди (вызывает BaseHandler) ----------
+    def _append(self, op: str, uuid: str, **fields):
+        self._seq += 1
+        self._entries += 1
+        self._pending.append(serializer.dumpb({"seq": self._seq, "op": op, "uuid": uuid, **fields}) + b"\n")
+
+    def add(self, record):
+        if not self.enabled or not record.uuid or not isinstance(record.body, dict):
+            return
+        self._items.pop(record.uuid, None)
+        self._items[record.uuid] = {"body": record.body, "admitted": False}
+        self._append("add", record.uuid, body=record.body)
+
+    def requeue(self, key):
+        entry = self._items.pop(key, None) if self.enabled else None
+        if entry is None:
+            return
+        self._items[key] = entry  # в конец очереди
+        self._append("requeue", key)
+
+    def remove(self, key):
+        if not self.enabled or self._items.pop(key, None) is None:
+            return
+        self._append("remove", key)
+
+    def admit(self, key):
+        entry = self._items.get(key) if self.enabled else None
+        if entry is None or entry["admitted"]:
+            return
+        entry["admitted"] = True
+        self._append("admit", key)
+
+    # ---------- чтение ----------
+    def _read(self) -> dict[str, dict]:
+        """snapshot + журнал → очередь; обрезанная последняя строка (падение посреди записи) пропускается"""
+        items: dict[str, dict] = {}
+        seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                for n, line in enumerate(f):
+                    try:
+                        entry = serializer.loads(line)
+                    except ValueError:
+                        continue
+                    if n == 0:
+                        seq = entry.get("seq", 0)
+                    elif isinstance(entry.get("body"), dict) and entry.get("uuid"):
+                        items[entry["uuid"]] = {"body": entry["body"], "admitted": bool(entry.get("admitted"))}
+
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = serializer.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("seq", 0) <= seq:
+                        continue
+                    seq = entry["seq"]
+                    uuid = entry.get("uuid")
+                    op = entry.get("op")
+                    if op == "add" and isinstance(entry.get("body"), dict):
+                        items.pop(uuid, None)
+                        items[uuid] = {"body": entry["body"], "admitted": False}
+                    elif op == "requeue" and uuid in items:
+                        items[uuid] = items.pop(uuid)
+                    elif op == "remove":
+                        items.pop(uuid, None)
+                    elif op == "admit" and uuid in items:
+                        items[uuid]["admitted"] = True
+        self._seq = seq
+        return items
+
+    async def restore(self, handler, state_of: Callable[[object], dict | None]) -> int:
+        """
+        Очередь с диска → хендлер. Принятые элементы сразу переносятся в индексы книги,
+        если их состояние есть в копии order:/position: (state_of — StateMirror.get по id);
+        без состояния элемент идёт обычным путём через приём в мониторинг на первой свече.
+        """
+        try:
+            items = await asyncio.to_thread(self._read)
+        except OSError as e:
+            logger.error(f"[Journal] Не удалось прочитать {self.snapshot_path}: {e}")
+            return 0
+
+        admitted = 0
+        for uuid, entry in items.items():
+            await handler.add_message(None, entry["body"])
+            record = handler.messages.get(uuid)
+            if record is None:
+                continue
+            self.restored.add(uuid)
+            if entry["admitted"] and record.valid:
+                state = state_of(record.id)
+                if state and await handler.admit_message(record, state):
+                    admitted += 1
+        logger.info(f"[Journal] {handler.queue_name}: восстановлено {len(self.restored)}, в индексах {admitted}")
+        return len(self.restored)
+
+    # ---------- запись ----------
+    async def attach(self, handler):
+        """Начинаем писать: текущая очередь хендлера становится новым snapshot"""
+        self._items = {}
+        for record in handler.messages:
+            if record.uuid and isinstance(record.body, dict):
+                admitted = await handler.is_admitted(record)
+                self._items[record.uuid] = {"body": record.body, "admitted": admitted}
+        self.enabled = True
+        await self.compact()
+        logger.info(f"[Journal] {handler.queue_name}: журнал {self.path}, элементов {len(self._items)}")
+
+    def _write(self, lines: list[bytes]):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(lines))
+
+    def _write_snapshot(self, seq: int, items: list[tuple[str, dict]]):
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(serializer.dumpb({"seq": seq}) + b"\n")
+            for uuid, entry in items:
+                f.write(serializer.dumpb({"uuid": uuid, "body": entry["body"], "admitted": entry["admitted"]}) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        open(self.path, "wb").close()
+
+    async def flush(self):
+        async with self._writing:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, lines)
+
+    async def compact(self):
+        async with self._writing:
+            # состояние на этот момент: всё, что ещё не записано, уже в items и в журнал не пойдёт
+            items = [(uuid, dict(entry)) for uuid, entry in self._items.items()]
+            seq, self._pending, self._entries = self._seq, [], 0
+            await asyncio.to_thread(self._write_snapshot, seq, items)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                if self._entries >= self.compact_every:
+                    await self.compact()
+                else:
+                    await self.flush()
+            except OSError as e:
+                logger.error(f"[Journal] Ошибка записи {self.path}: {e}")
+                self._entries = self.compact_every  # непрописанное уже в items — следующий snapshot его покроет
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def merge_ticks(older, newer):
+    """Склейка двух Tick (max(high) / min(low))"""
+    return older.merge(newer)
+
+
+class _Slot:
+    __slots__ = ("pending", "task")
+
+    def __init__(self):
+        self.pending = None
+        self.task: asyncio.Task | None = None
+
+
+class KlineDispatcher:
+    """
+    Latest-wins доставка свечей в триггеры.
+
+    - каждый callback выполняется single-flight: следующий вызов — только после завершения предыдущего
+    - пока callback занят, для него хранится одна (последняя) свеча канала;
+      новые сообщения склеиваются с ней через merge (по умолчанию merge_ticks: max(high) / min(low))
+    - темп обработки подстраивается под время handle, ни одна свеча не теряет свой диапазон
+    """
+    def __init__(self, merge: Callable = merge_ticks):
+        self.merge = merge
+        self._slots: dict[tuple[str, Callable], _Slot] = {}
+        self.dispatched = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {"dispatched": self.dispatched, "coalesced": self.coalesced}
+
+    def submit(self, channel: str, callback: Callable, data):
+        slot = self._slots.get((channel, callback))
+        if slot is None:
+            slot = self._slots[(channel, callback)] = _Slot()
+
+        if slot.pending is not None:
+            slot.pending = self.merge(slot.pending, data)
+            self.coalesced += 1
+        else:
+            slot.pending = data
+
+        if slot.task is None or slot.task.done():
+            slot.task = asyncio.create_task(self._drain(channel, callback, slot))
+
+    async def _drain(self, channel: str, callback: Callable, slot: _Slot):
+        while slot.pending is not None:
+            data, slot.pending = slot.pending, None
+            self.dispatched += 1
+            try:
+                await callback(data)
+            except Exception as e:
+                logger.error(f"[Dispatcher] {channel} → {getattr(callback, '__qualname__', callback)}: {e}")
+
+    async def wait_idle(self):
+        """Дождаться завершения всех запущенных callback'ов"""
+        tasks = [slot.task for slot in self._slots.values() if slot.task and not slot.task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
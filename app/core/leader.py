@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# продлить / отпустить аренду может только её держатель
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """
+    Аренда лидерства в Redis: SET key holder NX PX ttl, продление раз в renew_interval.
+
+    is_leader считается по локальным часам: аренда действительна до момента отправки
+    последнего успешного SET/PEXPIRE + ttl * safety. Ключ в Redis живёт дольше этого
+    срока, поэтому резерв не может захватить аренду, пока лидер ещё считает себя лидером —
+    даже если лидер потерял связь с Redis. Так два экземпляра никогда не действуют одновременно.
+
+    enabled=False — режим одного экземпляра: процесс всегда лидер.
+    """
+    def __init__(
+            self,
+            client=None,
+            key: str = "monitoring:leader",
+            ttl_ms: int = 5000,
+            renew_interval: float = 1.0,
+            safety: float = 0.8,
+            enabled: bool = False,
+    ):
+        self.client = client
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.renew_interval = renew_interval
+        self.safety = safety
+        self.enabled = enabled
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._valid_until = 0.0
+
+    def configure(self, client, key: str, ttl_ms: int, renew_interval: float):
+        self.client = client
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.renew_interval = renew_interval
+        self.enabled = True
+
+    @property
+    def is_leader(self) -> bool:
+        return not self.enabled or time.monotonic() < self._valid_until
+
+    def _extend(self, started: float):
+        self._valid_until = started + self.ttl_ms / 1000 * self.safety
+
+    async def try_acquire(self) -> bool:
+        started = time.monotonic()
+        if await self.client.set(self.key, self.holder, nx=True, px=self.ttl_ms):
+            self._extend(started)
+            return True
+        return False
+
+    async def renew(self) -> bool:
+        started = time.monotonic()
+        if await self.client.eval(_RENEW, 1, self.key, self.holder, self.ttl_ms):
+            self._extend(started)
+            return True
+        self._valid_until = 0.0  # ключ у другого держателя или истёк
+        return False
+
+    async def wait_acquired(self):
+        """Резерв: пытаемся взять аренду раз в renew_interval"""
+        if not self.enabled:
+            return
+        logger.info(f"[Leader] 💤 Резерв {self.holder}, жду аренду {self.key}")
+        while True:
+            try:
+                if await self.try_acquire():
+                    logger.info(f"[Leader] 👑 {self.holder} — лидер ({self.key})")
+                    return
+            except Exception as e:
+                logger.error(f"[Leader] Ошибка захвата аренды: {e}")
+            await asyncio.sleep(self.renew_interval)
+
+    async def hold(self):
+        """Лидер: продлеваем аренду; возвращается, когда аренда потеряна"""
+        if not self.enabled:
+            await asyncio.Event().wait()
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                await asyncio.wait_for(self.renew(), timeout=self.renew_interval)
+            except Exception as e:
+                logger.error(f"[Leader] Ошибка продления аренды: {e}")
+            if not self.is_leader:
+                logger.error(f"[Leader] ❗ Аренда {self.key} потеряна ({self.holder})")
+                return
+
+    async def release(self):
+        if not self.enabled or not self.is_leader:
+            return
+        self._valid_until = 0.0
+        try:
+            await self.client.eval(_RELEASE, 1, self.key, self.holder)
+            logger.info(f"[Leader] Аренда {self.key} отпущена")
+        except Exception as e:
+            logger.error(f"[Leader] Ошибка освобождения аренды: {e}")
+
+
+leader_lease = LeaderLease()  # включается в main при STANDBY_ENABLED=1
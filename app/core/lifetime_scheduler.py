@@ -0,0 +1,132 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Hashable
+
+from conf.conf_redis import redis_server_settings_async
+
+logger = logging.getLogger(__name__)
+
+LIFETIME_SETTING_KEY = 'settings:position-lifetime-seconds'
+DEFAULT_LIFETIME_SECONDS = 5
+
+
+class LifetimeScheduler:
+    """
+    Планировщик срока жизни позиций: heap дедлайнов created_at + lifetime.
+
+    - позиция регистрируется один раз (created_at парсится при добавлении в хендлер)
+    - срабатывает по времени, независимо от прихода свечей
+    - настройка lifetime перечитывается раз в poll_interval, при изменении дедлайны пересобираются
+    - если on_expire вернул False — повтор через retry_delay
+    """
+    def __init__(self, poll_interval: float = 5.0, retry_delay: float = 1.0):
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.lifetime_seconds: int | None = None
+
+        self._created: dict[Hashable, float] = {}
+        self._deadlines: dict[Hashable, float] = {}
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._created)
+
+    def register(self, key: Hashable, created_ts: float):
+        self._created[key] = created_ts
+        if self.lifetime_seconds is not None:
+            self._schedule(key, created_ts + self.lifetime_seconds)
+
+    def unregister(self, key: Hashable):
+        # запись в heap остаётся и отбрасывается при извлечении
+        self._created.pop(key, None)
+        self._deadlines.pop(key, None)
+
+    def is_expired(self, key: Hashable, now: float | None = None) -> bool:
+        created_ts = self._created.get(key)
+        if created_ts is None or self.lifetime_seconds is None:
+            return False
+        return (now or time.time()) >= created_ts + self.lifetime_seconds
+
+    def set_lifetime(self, seconds: int):
+        """Новое значение настройки → пересборка всех дедлайнов"""
+        if seconds == self.lifetime_seconds:
+            return
+        logger.info(f"[Lifetime] Срок жизни позиции: {self.lifetime_seconds} → {seconds} с, пересобираю {len(self._created)} дедлайнов")
+        self.lifetime_seconds = seconds
+        self._deadlines = {key: created_ts + seconds for key, created_ts in self._created.items()}
+        self._heap = [(deadline, next(self._seq), key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+
+    def _schedule(self, key: Hashable, deadline: float):
+        self._deadlines[key] = deadline
+        if not self._heap or deadline < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (deadline, next(self._seq), key))
+
+    def _pop_due(self, now: float) -> list[Hashable]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            # устаревшая запись (позиция удалена или дедлайн пересобран)
+            if self._deadlines.get(key) != deadline:
+                continue
+            del self._deadlines[key]
+            due.append(key)
+        return due
+
+    def _next_deadline(self) -> float | None:
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _refresh_lifetime(self):
+        try:
+            value = await redis_server_settings_async.get(LIFETIME_SETTING_KEY)
+        except Exception as e:
+            logger.error(f"[Lifetime] Ошибка чтения {LIFETIME_SETTING_KEY}: {e}")
+            if self.lifetime_seconds is not None:
+                return
+            value = None
+        self.set_lifetime(int(value) if value else DEFAULT_LIFETIME_SECONDS)
+
+    async def _fire(self, key: Hashable, on_expire: Callable[[Hashable], Awaitable[bool]]):
+        try:
+            done = await on_expire(key)
+        except Exception as e:
+            logger.error(f"[Lifetime] Ошибка отмены {key}: {e}")
+            done = False
+        if not done and key in self._created:
+            self._schedule(key, time.time() + self.retry_delay)
+
+    async def run(self, on_expire: Callable[[Hashable], Awaitable[bool]]):
+        """
+        Основной цикл. on_expire(key) → True, если позиция отменена/удалена,
+        False — повторить позже.
+        """
+        next_poll = 0.0
+        while True:
+            now = time.time()
+            if now >= next_poll:
+                await self._refresh_lifetime()
+                next_poll = now + self.poll_interval
+
+            due = self._pop_due(now)
+            if due:
+                await asyncio.gather(*(self._fire(key, on_expire) for key in due))
+
+            wake_at = next_poll
+            deadline = self._next_deadline()
+            if deadline is not None:
+                wake_at = min(wake_at, deadline)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,91 @@
+from collections import deque
+from typing import Any, Hashable, Iterator
+
+DEFAULT_SYMBOL = "BTCUSDT"  # как у OrderSchema / PositionSchema.symbol_name
+
+
+def message_key(item) -> Hashable:
+    """
+    Ключ сообщения в локальной очереди (ItemRecord.key).
+    uuid из body, если он есть, иначе — идентичность самой записи
+    (для сообщений без uuid дедупликация не выполняется).
+    """
+    return item.key
+
+
+def item_symbol(body) -> str:
+    """
+    Символ элемента: symbol_name (Rabbit, схемы) или symbol (списки ListOpen),
+    по умолчанию — DEFAULT_SYMBOL.
+    """
+    if isinstance(body, dict):
+        symbol = body.get("symbol_name") or body.get("symbol")
+        if isinstance(symbol, str) and symbol:
+            return symbol.upper()
+    return DEFAULT_SYMBOL
+
+
+class MessageStore:
+    """
+    Локальная очередь сообщений хендлера: deque (порядок FIFO) + dict (индекс по uuid).
+
+    - append / popleft / remove / contains — O(1)
+    - удалённые элементы остаются в deque «надгробиями» и пропускаются при popleft;
+      когда мёртвых записей становится больше живых, deque уплотняется
+    """
+    def __init__(self):
+        self._order: deque[tuple[Hashable, Any]] = deque()
+        self._items: dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __iter__(self) -> Iterator[Any]:
+        """Живые сообщения в порядке очереди"""
+        for key, item in self._order:
+            if self._items.get(key) is item:
+                yield item
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self._items.get(key, default)
+
+    def append(self, item) -> bool:
+        """Добавляет в конец очереди. False — такой uuid уже есть"""
+        key = message_key(item)
+        if key in self._items:
+            return False
+        self._items[key] = item
+        self._order.append((key, item))
+        return True
+
+    def popleft(self) -> Any:
+        """Снимает первое живое сообщение"""
+        while self._order:
+            key, item = self._order.popleft()
+            if self._items.get(key) is item:
+                del self._items[key]
+                return item
+        return None
+
+    def remove(self, item) -> bool:
+        """Удаляет именно этот item (если он ещё в очереди)"""
+        key = message_key(item)
+        if self._items.get(key) is not item:
+            return False
+        del self._items[key]
+        self._compact()
+        return True
+
+    def clear(self):
+        self._order.clear()
+        self._items.clear()
+
+    def _compact(self):
+        if len(self._order) > 2 * len(self._items) + 64:
+            self._order = deque((k, i) for k, i in self._order if self._items.get(k) is i)
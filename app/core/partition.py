@@ -0,0 +1,70 @@
+import hashlib
+
+from app.core.message_store import item_symbol
+
+
+def stable_hash(value: str) -> int:
+    """Хэш, одинаковый во всех процессах (hash() str рандомизируется PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class Partition:
+    """
+    Доля элементов, которой владеет воркер: index из count.
+
+    - by="uuid" — элементы делятся по хэшу uuid (ровная нагрузка даже при одном символе)
+    - by="symbol" — воркер владеет символами целиком (меньше подписок kline на процесс)
+    - элементы без uuid принадлежат партиции 0
+    - чужие сообщения Rabbit пересылаются в очередь владельца {queue}.p{index}
+    """
+    def __init__(self, index: int = 0, count: int = 1, by: str = "uuid"):
+        self.configure(index, count, by)
+
+    def configure(self, index: int, count: int, by: str = "uuid"):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Неверная партиция {index}/{count}")
+        if by not in ("uuid", "symbol"):
+            raise ValueError(f"Неизвестный ключ партиций: {by}")
+        self.index = index
+        self.count = count
+        self.by = by
+
+    def __repr__(self):
+        return f"Partition({self.index}/{self.count} by {self.by})"
+
+    def key(self, body) -> str | None:
+        if self.by == "symbol":
+            return item_symbol(body)
+        uuid = body.get("uuid") if isinstance(body, dict) else None
+        return str(uuid) if uuid else None
+
+    def owner(self, body) -> int:
+        if self.count == 1:
+            return 0
+        key = self.key(body)
+        if key is None:
+            return 0
+        return stable_hash(key) % self.count
+
+    def owns(self, body) -> bool:
+        return self.owner(body) == self.index
+
+    def queue(self, queue_name: str, index: int | None = None) -> str:
+        """Очередь партиции (своя — при index=None)"""
+        return f"{queue_name}.p{self.index if index is None else index}"
+
+    @staticmethod
+    def base_queue(queue_name: str) -> str:
+        """Общая очередь для очереди партиции (queue.p1 → queue)"""
+        base, sep, suffix = queue_name.rpartition(".p")
+        return base if sep and suffix.isdigit() else queue_name
+
+    def route(self, queue_name: str, body) -> str | None:
+        """None — сообщение наше, иначе очередь партиции-владельца"""
+        owner = self.owner(body)
+        if owner == self.index:
+            return None
+        return self.queue(self.base_queue(queue_name), owner)
+
+
+local_partition = Partition()  # в одиночном режиме — всё наше; воркер настраивает через configure()
@@ -1,11 +1,12 @@
 from typing import Callable, Dict, List, Optional
 
 import asyncio
-import json
 import logging
 
 import aio_pika
 
+from conf import serializer
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,9 +16,32 @@ class RabbitMQConsumer:
     - prefetch (QoS), чтобы не заливать воркеров
     - ack сразу после помещения в локальную очередь (транспорт ≠ storage)
     - аккуратное закрытие
+    - router(queue, body) → очередь-владелец: чужие сообщения пересылаются туда (партиции воркеров),
+      None — сообщение обрабатываем сами
+    - is_active() → False (аренда лидера потеряна, закрытие): доставки не принимаются в память,
+      а возвращаются в очередь (nack requeue) — их заберёт новый лидер
+    - batch_size > 0 — пачками: доставки копятся до batch_size штук или batch_linger секунд,
+      уходят в batch-callback (handler.bulk_add) и подтверждаются одним ack(multiple=True)
+
+    Пачка общая на канал: delivery tag нумеруется в канале, а ack(multiple=True) подтверждает всё
+    неподтверждённое до тега — поэтому пачки разбираются строго по очереди и по порядку тегов.
+    Сбой на группе: ack(multiple) по последней успешной доставке, nack(multiple, requeue) по последней
+    в пачке — вернутся ровно необработанные (повторно добавленное отбросит дедупликация по uuid).
     """
-    def __init__(self, url: str, prefetch: int = 64, reconnect_attempts: int = 5, reconnect_base_delay: float = 1.0):
+    def __init__(
+            self,
+            url: str,
+            prefetch: int = 64,
+            reconnect_attempts: int = 5,
+            reconnect_base_delay: float = 1.0,
+            router: Optional[Callable[[str, dict], Optional[str]]] = None,
+            batch_size: int = 0,
+            batch_linger: float = 0.02,
+            is_active: Optional[Callable[[], bool]] = None,
+    ):
         self.url = url
+        self.router = router
+        self.is_active = is_active
         self.prefetch = prefetch
         self.reconnect_attempts = reconnect_attempts
         self.reconnect_base_delay = reconnect_base_delay
@@ -25,12 +49,29 @@ class RabbitMQConsumer:
         self.connection: Optional[aio_pika.RobustConnection] = None
         self.channel: Optional[aio_pika.Channel] = None
         self.callbacks: Dict[str, Callable] = {}
+        self.batch_callbacks: Dict[str, Callable] = {}
+        self.batch_size = batch_size
+        self.batch_linger = batch_linger
+        self._batch: list[tuple[str, Optional[str], object, aio_pika.IncomingMessage]] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._batch_lock = asyncio.Lock()
+        self._batch_tasks: set[asyncio.Task] = set()
         self._consuming_queues: List[str] = []
+        self._consumers: list[tuple[aio_pika.Queue, str]] = []
+        self._declared: set[str] = set()
         self._closing = asyncio.Event()
 
-    def register_callback(self, queue_name: str, callback: Callable):
-        """Привязывает локальный callback (handler.add_message) к очереди"""
+    def register_callback(self, queue_name: str, callback: Callable, batch_callback: Optional[Callable] = None):
+        """
+        Привязывает локальный callback (handler.add_message) к очереди;
+        batch_callback(bodies) (handler.bulk_add) — для режима пачек, без него тела идут по одному в callback
+        """
         self.callbacks[queue_name] = callback
+        if batch_callback is not None:
+            self.batch_callbacks[queue_name] = batch_callback
+
+    def _active(self) -> bool:
+        return not self._closing.is_set() and (self.is_active is None or self.is_active())
 
     async def connect(self):
         """Подключение с экспоненциальным backoff."""
@@ -39,7 +80,8 @@ class RabbitMQConsumer:
             try:
                 self.connection = await aio_pika.connect_robust(self.url)
                 self.channel = await self.connection.channel()
-                await self.channel.set_qos(prefetch_count=self.prefetch)
+                # пачка не соберётся, если брокер не отдаёт столько доставок без ack
+                await self.channel.set_qos(prefetch_count=max(self.prefetch, self.batch_size))
                 logger.info(f"[RabbitMQ] Connected (attempt {attempt})")
                 return
             except Exception as e:
@@ -55,6 +97,7 @@ class RabbitMQConsumer:
         self._consuming_queues = list(queue_names)
         for q_name in queue_names:
             queue = await self.channel.declare_queue(q_name, durable=True)
+            self._declared.add(q_name)
 
             async def on_message(message: aio_pika.IncomingMessage, q=q_name):
                 """
@@ -62,14 +105,23 @@ class RabbitMQConsumer:
                 Не используем auto-ack контекст, чтобы самим контролировать подтверждение.
                 """
                 try:
-                    body = message.body.decode()
-                    if isinstance(body, str):
-                        body = json.loads(body)
+                    if not self._active():
+                        await message.nack(requeue=True)
+                        return
+                    body = serializer.loads(message.body)  # прямо из bytes, без .decode()
+                    target = self.router(q, body) if self.router else None
+                    if self.batch_size > 0:
+                        self._enqueue(q, target if target != q else None, body, message)
+                        return
+                    if target and target != q:
+                        await self._forward(target, message)
+                        await message.ack()
+                        return
                     cb = self.callbacks.get(q)
                     if cb:
                         # кладём локально (msg=None, т.к. мы подтверждаем сразу)
                         await cb(None, body)
-                        logger.info(f"[RabbitMQ] {q} → {body}")
+                        logger.debug(f"[RabbitMQ] {q} → {body}")
                     # подтверждаем немедленно: транспорт освобождаем сразу
                     await message.ack()
                 except Exception as e:
@@ -80,12 +132,109 @@ class RabbitMQConsumer:
                     except Exception as _:
                         pass  # уже не страшно
 
-            await queue.consume(on_message, no_ack=False)
+            consumer_tag = await queue.consume(on_message, no_ack=False)
+            self._consumers.append((queue, consumer_tag))
             logger.info(f"[RabbitMQ] Listening: {q_name}")
 
+    # ---------- режим пачек ----------
+    def _enqueue(self, queue: str, target: Optional[str], body, message: aio_pika.IncomingMessage):
+        self._batch.append((queue, target, body, message))
+        if len(self._batch) >= self.batch_size:
+            self._schedule_flush()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(self.batch_linger, self._schedule_flush)
+
+    def _schedule_flush(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    @staticmethod
+    def _groups(batch: list):
+        """Подряд идущие доставки одной очереди / одного адресата пересылки"""
+        group = []
+        for entry in batch:
+            if group and entry[:2] != group[-1][:2]:
+                yield group
+                group = []
+            group.append(entry)
+        if group:
+            yield group
+
+    async def _flush(self, batch: list):
+        async with self._batch_lock:  # ack(multiple) следующей пачки не должен обогнать эту
+            batch.sort(key=lambda entry: entry[3].delivery_tag)
+            done = None  # последняя обработанная доставка
+            error = None
+            try:
+                for group in self._groups(batch):
+                    if not self._active():
+                        break
+                    queue, target = group[0][0], group[0][1]
+                    if target:
+                        for _, _, _, message in group:
+                            await self._forward(target, message)
+                    elif queue in self.batch_callbacks:
+                        await self.batch_callbacks[queue]([body for _, _, body, _ in group])
+                    elif queue in self.callbacks:
+                        for _, _, body, _ in group:
+                            await self.callbacks[queue](None, body)
+                    done = group[-1][3]
+            except Exception as e:
+                error = e
+
+            last = batch[-1][3]
+            if done is not last:
+                logger.error(
+                    f"[RabbitMQ] batch {'error: ' + str(error) if error else 'не принят (не лидер / закрытие)'}, "
+                    f"nack requeue {len(batch)} (обработано до tag={done.delivery_tag if done else None})"
+                )
+                try:
+                    if done is not None:
+                        await done.ack(multiple=True)
+                    await last.nack(multiple=True, requeue=True)
+                except Exception as _:
+                    pass  # канал уже закрыт — брокер вернёт неподтверждённое сам
+                return
+
+            try:
+                await last.ack(multiple=True)
+            except Exception as e:
+                logger.error(f"[RabbitMQ] batch ack error: {e}")
+                return
+            logger.info(f"[RabbitMQ] Пачка {len(batch)} подтверждена (tag ≤ {last.delivery_tag})")
+
+    async def _forward(self, target: str, message: aio_pika.IncomingMessage):
+        """Пересылка сообщения в очередь владельца (очередь объявляется, чтобы сообщение не потерялось)"""
+        if target not in self._declared:
+            await self.channel.declare_queue(target, durable=True)
+            self._declared.add(target)
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(body=message.body, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=target,
+        )
+        logger.info(f"[RabbitMQ] → {target}")
+
     async def close(self):
-        """Аккуратно закрыть соединения."""
+        """
+        Аккуратно закрыть соединения: подписки снимаются, ещё не принятая пачка
+        возвращается в очередь (nack requeue), затем закрываются канал и соединение.
+        """
         self._closing.set()
+        for queue, consumer_tag in self._consumers:
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as e:
+                logger.error(f"[RabbitMQ] cancel {queue.name}: {e}")
+        self._consumers.clear()
+        self._schedule_flush()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
         try:
             if self.channel:
                 await self.channel.close()
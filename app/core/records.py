@@ -0,0 +1,73 @@
+from decimal import Decimal
+from typing import Hashable
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.books import parse_created_at
+from app.core.message_store import item_symbol
+
+
+class ItemRecord:
+    """
+    Элемент очереди хендлера. Тело проверяется схемой один раз — при add_message,
+    числа переводятся сразу: триггеры и сервисы на каждой свече читают готовые поля.
+
+    Атрибуты повторяют имена OrderSchema / PositionSchema (id, uuid, symbol_name, status,
+    category, side, price, target_rate), поэтому запись передаётся в сервисы вместо схемы.
+    valid=False — тело не прошло схему (error — причина); такой элемент не индексируется
+    и не обрабатывается сервисом.
+    """
+    __slots__ = (
+        "msg", "body", "key", "symbol",
+        "id", "uuid", "category", "status", "side",
+        "price", "target_rate", "created_ts",
+        "valid", "error",
+    )
+
+    def __init__(self, msg, body):
+        self.msg = msg
+        self.body = body
+        self.valid = False
+        self.error = None
+        self.price: float | None = None
+        self.target_rate: Decimal | None = None
+
+        data = body if isinstance(body, dict) else {}
+        self.id = data.get("id")
+        self.uuid = data.get("uuid")
+        self.category = data.get("category")
+        self.status = data.get("status")
+        self.side = data.get("side")
+        self.symbol = item_symbol(body)
+        self.created_ts = parse_created_at(data.get("created_at"))
+        # ключ в очереди: uuid, без него — идентичность записи (дедупликации нет)
+        self.key: Hashable = self.uuid or id(self)
+
+    @classmethod
+    def build(cls, msg, body, schema: type[BaseModel] | None = None) -> "ItemRecord":
+        record = cls(msg, body)
+        if schema is None or not isinstance(body, dict):
+            return record
+        try:
+            validated = schema.model_validate(body)
+            price = float(validated.price)
+        except (ValidationError, TypeError, ValueError) as e:
+            record.error = str(e)
+            return record
+
+        record.id = validated.id
+        record.uuid = validated.uuid
+        record.category = validated.category
+        record.status = validated.status
+        record.side = validated.side
+        record.price = price
+        record.target_rate = getattr(validated, "target_rate", None)
+        record.valid = True
+        return record
+
+    @property
+    def symbol_name(self) -> str:
+        return self.symbol
+
+    def __repr__(self):
+        return f"ItemRecord({self.category} {self.symbol} {self.side} uuid={self.uuid} id={self.id})"
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+
+from conf.conf_redis import redis_server_data
+
+logger = logging.getLogger(__name__)
+
+_DELETED = object()
+
+
+class RedisWriteBatch:
+    """
+    Пакетная запись в Redis за свечу.
+
+    Мутации (SET / DELETE / PUBLISH) копятся по клиентам (по БД) и уходят одним pipeline
+    на каждую БД при flush(). Порядок команд внутри БД сохраняется, поэтому
+    «сначала состояние, потом PUBLISH» остаётся видимым порядком для подписчиков.
+    Для atomic-клиентов (db 8: состояние + MONITORING) pipeline идёт как MULTI/EXEC.
+
+    - pending(client, key) — ещё не отправленное значение ключа (read-your-writes внутри свечи)
+    - flush() вызывает триггер в конце свечи; записи вне свечи (таймеры) уходят
+      сами через flush_delay
+    - pipeline БД не прошёл — его команды возвращаются в начало очереди этой БД (перед более
+      новыми) и уходят повторно через retry_delay: состояние в Redis не расходится с памятью.
+      Неатомарный pipeline мог выполниться частично — SET/DELETE повторяются без вреда,
+      PUBLISH подписчик может получить дважды
+    """
+    def __init__(self, atomic: tuple = (), flush_delay: float = 0.05, retry_delay: float = 0.5):
+        self.atomic = atomic
+        self.flush_delay = flush_delay
+        self.retry_delay = retry_delay
+        self._commands: dict = {}  # client → [(method, args)]
+        self._values: dict = {}  # (client, key) → value | _DELETED
+        self._flushing: dict = {}  # значения пачки, которая сейчас отправляется
+        self._lock = asyncio.Lock()  # flush'и идут строго по очереди — порядок записей между пачками
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.flushes = 0
+        self.failures = 0
+        self.commands_sent = 0
+        self.last_flush_size = 0
+        self.last_flush_ms = 0.0
+
+    def __len__(self):
+        return sum(len(commands) for commands in self._commands.values())
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "pending": len(self),
+            "commands_sent": self.commands_sent,
+            "last_flush_size": self.last_flush_size,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    # ---------- мутации ----------
+    def set(self, client, key: str, value):
+        self._values[(client, key)] = value
+        self._add(client, "set", key, value)
+
+    def delete(self, client, key: str):
+        self._values[(client, key)] = _DELETED
+        self._add(client, "delete", key)
+
+    def publish(self, client, channel: str, message):
+        self._add(client, "publish", channel, message)
+
+    def pending(self, client, key: str) -> tuple[bool, object]:
+        """(есть ли неотправленная запись, значение — None если ключ удаляется)"""
+        value = self._values.get((client, key))
+        if value is None:
+            value = self._flushing.get((client, key))
+        if value is None:
+            return False, None
+        return True, None if value is _DELETED else value
+
+    def _add(self, client, method: str, *args):
+        self._commands.setdefault(client, []).append((method, args))
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._schedule(loop, self.flush_delay)
+
+    def _schedule(self, loop, delay: float):
+        self._timer = loop.call_later(delay, lambda: asyncio.ensure_future(self.flush()))
+
+    def _requeue(self, client, client_commands: list):
+        """Неотправленные команды — обратно перед теми, что накопились за время отправки"""
+        self._commands[client] = client_commands + self._commands.get(client, [])
+        for (value_client, key), value in self._flushing.items():
+            if value_client is client:
+                self._values.setdefault((client, key), value)
+
+    # ---------- отправка ----------
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            commands, self._commands = self._commands, {}
+            self._flushing, self._values = self._values, {}
+            if not commands:
+                return
+
+            started = time.perf_counter()
+            size = 0
+            failed = False
+            try:
+                for client, client_commands in commands.items():
+                    try:
+                        pipe = client.pipeline(transaction=client in self.atomic)
+                        for method, args in client_commands:
+                            getattr(pipe, method)(*args)
+                        await pipe.execute()
+                        size += len(client_commands)
+                    except Exception as e:
+                        failed = True
+                        self._requeue(client, client_commands)
+                        logger.error(
+                            f"[RedisBatch] Ошибка flush ({len(client_commands)} команд): {e} "
+                            f"→ повтор через {self.retry_delay}s"
+                        )
+            finally:
+                self._flushing = {}
+
+        if failed:
+            self.failures += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            self._schedule(asyncio.get_running_loop(), self.retry_delay)
+
+        self.flushes += 1
+        self.commands_sent += size
+        self.last_flush_size = size
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        logger.debug(f"[RedisBatch] flush: {size} команд в {len(commands)} БД за {self.last_flush_ms:.1f} ms")
+
+
+write_batch = RedisWriteBatch(atomic=(redis_server_data,))
@@ -1,78 +1,123 @@
 # app/core/redis_listener.py
-import json
 import asyncio
 import logging
-import time
 from typing import Callable, Dict, List
 import redis.asyncio as aioredis
 
+from app.core.kline_dispatcher import KlineDispatcher
+from app.schemas.kline import Tick
+
 logger = logging.getLogger(__name__)
 
 
 class RedisListener:
-    def __init__(self, config: dict, channels: List[str], handlers: List, reconnect_delay: float = 2.0):
+    """
+    Подписка на свечи только по символам с открытыми элементами.
+
+    - register_callback("kline:{symbol}", cb) — шаблон канала, {symbol} подставляется
+      для каждого активного символа
+    - on_symbol_change(symbol, active) — хендлеры сообщают, что у символа появился первый
+      или ушёл последний элемент; подписки (SUBSCRIBE / UNSUBSCRIBE) догоняют это в цикле чтения
+    - нет ни одного активного символа — не подписаны ни на что и ничего не декодируем
+    """
+    def __init__(self, config: dict, reconnect_delay: float = 2.0, poll_timeout: float = 0.5):
         self.config = config
-        self.channels = channels
-        self.handlers = handlers  # 🔹 добавили список всех хендлеров
-        self.callbacks: Dict[str, List[Callable]] = {}
+        self.callbacks: Dict[str, List[Callable]] = {}  # шаблон канала → callbacks
         self.redis: aioredis.Redis | None = None
         self.pubsub: aioredis.client.PubSub | None = None
         self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
         self._stop = asyncio.Event()
-        self._last_call: Dict[str, float] = {}  # debounce
+        self.dispatcher = KlineDispatcher()  # latest-wins + single-flight вместо debounce
+
+        self._symbols: Dict[str, int] = {}  # символ → число хендлеров, у которых он открыт
+        self._routes: Dict[str, List[Callable]] = {}  # подписанный канал → callbacks
+        self._changed = asyncio.Event()
 
     def register_callback(self, channel: str, callback: Callable):
         if channel not in self.callbacks:
             self.callbacks[channel] = []
         self.callbacks[channel].append(callback)
+        self._changed.set()
+
+    def on_symbol_change(self, symbol: str, active: bool):
+        count = self._symbols.get(symbol, 0) + (1 if active else -1)
+        if count > 0:
+            self._symbols[symbol] = count
+        else:
+            self._symbols.pop(symbol, None)
+        if (count == 1 and active) or count <= 0:
+            self._changed.set()
+
+    @property
+    def channels(self) -> list[str]:
+        """Каналы, на которые подписан слушатель сейчас"""
+        return list(self._routes)
 
-    async def _queues_empty(self) -> bool:
-        """Проверяем, все ли очереди пустые"""
-        for h in self.handlers:
-            if h.messages:  # локальная очередь не пуста
-                return False
-        return True
+    def _wanted_routes(self) -> Dict[str, List[Callable]]:
+        routes: Dict[str, List[Callable]] = {}
+        for template, callbacks in self.callbacks.items():
+            for symbol in self._symbols:
+                routes.setdefault(template.format(symbol=symbol), []).extend(callbacks)
+        return routes
+
+    async def _sync_subscriptions(self):
+        self._changed.clear()
+        routes = self._wanted_routes()
+        subscribe = [channel for channel in routes if channel not in self._routes]
+        unsubscribe = [channel for channel in self._routes if channel not in routes]
+        if subscribe:
+            await self.pubsub.subscribe(*subscribe)
+            logger.info(f"[Redis] Подписан на каналы: {subscribe}")
+        if unsubscribe:
+            await self.pubsub.unsubscribe(*unsubscribe)
+            logger.info(f"[Redis] Отписан от каналов: {unsubscribe}")
+        self._routes = routes
 
     async def start(self):
         while not self._stop.is_set():
             try:
-                self.redis = aioredis.Redis(**self.config, decode_responses=True)
+                self.redis = aioredis.Redis(**self.config)  # bytes: свеча разбирается без .decode()
                 self.pubsub = self.redis.pubsub()
-                await self.pubsub.subscribe(*self.channels)
-                logger.info(f"[Redis] Подписан на каналы: {self.channels}")
+                self._routes = {}
+                self._changed.set()
+
+                while not self._stop.is_set():
+                    if self._changed.is_set():
+                        await self._sync_subscriptions()
 
-                async for raw in self.pubsub.listen():
-                    if self._stop.is_set():
-                        break
-                    if raw["type"] != "message":
+                    if not self._routes:
+                        # 💤 открытых элементов нет — ждём первый символ, сообщения не читаем
+                        try:
+                            await asyncio.wait_for(self._changed.wait(), timeout=self.poll_timeout)
+                        except asyncio.TimeoutError:
+                            pass
                         continue
 
-                    # 💡 Если все очереди пусты — пропускаем событие
-                    if await self._queues_empty():
-                        # (Опционально можно логировать раз в N минут)
+                    raw = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=self.poll_timeout)
+                    if raw is None or raw["type"] != "message":
                         continue
 
                     channel = raw["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    callbacks = self._routes.get(channel)
+                    if not callbacks:
+                        continue  # отписка ещё в пути
+
+                    # 🔹 1. один разбор свечи на сообщение — Tick общий для всех триггеров;
+                    # свечи не 1m (5m, 15m, 30m) отбрасываются одинаково при любом движке JSON
                     try:
-                        data = json.loads(raw["data"])
-                    except Exception:
-                        data = raw["data"]
-
-                    # 🔹 1. фильтруем по типу свечи
-                    interval = data.get("interval") if isinstance(data, dict) else None
-                    if interval and interval != "1m":
-                        continue  # игнорируем 5m, 15m, 30m
-
-                    # 🔹 2. debounce: не чаще 1 раза в 3 секунды
-                    now = time.monotonic()
-                    last = self._last_call.get(channel, 0)
-                    if now - last < 3:
+                        tick = Tick.parse(raw["data"])
+                    except ValueError as e:
+                        logger.error(f"[Redis] Невалидная свеча {channel}: {e}")
+                        continue
+                    if tick is None:
                         continue
-                    self._last_call[channel] = now
 
-                    # 🔹 3. запуск callback'ов (в фоне)
-                    for cb in self.callbacks.get(channel, []):
-                        asyncio.create_task(cb(data))
+                    # 🔹 2. запуск callback'ов: пока триггер занят, свечи склеиваются (max h / min l)
+                    for cb in callbacks:
+                        self.dispatcher.submit(channel, cb, tick)
             except Exception as e:
                 logger.error(f"[Redis] listen error: {e} → reconnect in {self.reconnect_delay}s")
                 await asyncio.sleep(self.reconnect_delay)
@@ -90,3 +135,4 @@ class RedisListener:
 
     async def stop(self):
         self._stop.set()
+        self._changed.set()
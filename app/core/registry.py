@@ -1,63 +1,91 @@
 # app/core/registry.py
-import logging
-import pkgutil
 import importlib
-import inspect
-from pathlib import Path
+import logging
 
 logger = logging.getLogger(__name__)
 
+# Манифест: модули с хендлерами и триггерами. Импортируются один раз в load_modules(),
+# классы в них регистрируются декораторами @register_handler / @register_trigger.
+MODULES = (
+    "app.handlers.order_handler",
+    "app.handlers.position_handler",
+    "app.triggers.order_trigger",
+    "app.triggers.position_trigger",
+)
+
+_handler_classes: dict[str, type] = {}  # очередь → класс хендлера
+_trigger_classes: list[type] = []
 
-def _import_all_modules_from_package(package_name: str):
-    """
-    Гарантированно импортирует все модули внутри пакета (включая подкаталоги).
-    Это нужно, чтобы классы были реально загружены в память
-    до вызова inspect.getmembers().
-    """
-    package = importlib.import_module(package_name)
-    package_path = Path(package.__file__).parent
 
-    for _, module_name, is_pkg in pkgutil.iter_modules([str(package_path)]):
-        full_name = f"{package_name}.{module_name}"
-        try:
-            importlib.import_module(full_name)
-        except Exception as e:
-            logger.error(f"[Registry] ⚠ Ошибка импорта модуля {full_name}: {e}")
+def register_handler(cls):
+    """Класс-декоратор хендлера: очередь берётся из cls.queue_name"""
+    queue = cls.queue_name
+    if not queue:
+        raise ValueError(f"[Registry] У {cls.__name__} не задан queue_name")
+    registered = _handler_classes.get(queue)
+    if registered is not None and registered is not cls:
+        raise ValueError(f"[Registry] Очередь {queue} уже занята {registered.__name__}")
+    _handler_classes[queue] = cls
+    return cls
 
-        # Если внутри подпакет — импортируем рекурсивно
-        if is_pkg:
-            _import_all_modules_from_package(full_name)
 
+def register_trigger(cls):
+    """Класс-декоратор триггера: привязка по cls.target_queue, подписка по cls.channel_name"""
+    if not cls.target_queue:
+        raise ValueError(f"[Registry] У {cls.__name__} не задан target_queue")
+    if cls not in _trigger_classes:
+        _trigger_classes.append(cls)
+    return cls
 
-def discover_subclasses(package_name: str, base_class: type):
+
+def load_modules(modules: tuple[str, ...] = MODULES):
+    for module in modules:
+        importlib.import_module(module)
+
+
+class DispatchTable:
     """
-    Ищет все классы, являющиеся подклассами base_class внутри пакета.
+    Таблица диспетчеризации, собранная один раз при запуске:
+    - handlers — очередь RabbitMQ → экземпляр хендлера
+    - channels — шаблон канала Redis → триггеры
+    - triggers — все экземпляры триггеров (для фоновых задач start())
     """
-    _import_all_modules_from_package(package_name)
-
-    subclasses = []
-    package = importlib.import_module(package_name)
-    for _, module_name, _ in pkgutil.iter_modules(package.__path__):
-        module = importlib.import_module(f"{package_name}.{module_name}")
+    def __init__(self, handlers: dict, channels: dict[str, list], triggers: list):
+        self.handlers = handlers
+        self.channels = channels
+        self.triggers = triggers
 
-        for name, obj in inspect.getmembers(module, inspect.isclass):
-            if issubclass(obj, base_class) and obj is not base_class:
-                subclasses.append(obj)
+    def bindings(self) -> list[tuple[str, str, str]]:
+        """(триггер, канал, очередь) — для таблицы связей в логе"""
+        return [
+            (trigger.__class__.__name__, channel, trigger.handler.queue_name)
+            for channel, triggers in self.channels.items()
+            for trigger in triggers
+        ]
 
-    return subclasses
+    def __repr__(self):
+        return (
+            f"DispatchTable(handlers={ {q: h.__class__.__name__ for q, h in self.handlers.items()} }, "
+            f"channels={ {c: [t.__class__.__name__ for t in ts] for c, ts in self.channels.items()} })"
+        )
 
 
-def load_handlers():
-    """Возвращает список всех Handler-классов"""
-    from app.handlers.base_handler import BaseHandler
-    handlers = discover_subclasses("app.handlers", BaseHandler)
-    logger.info(f"[Registry] Загружено обработчиков: {len(handlers)}")
-    return handlers
+def build_dispatch_table() -> DispatchTable:
+    """Хендлер на очередь, триггеры привязываются к хендлеру своей очереди по словарю"""
+    load_modules()
 
+    handlers = {queue: cls() for queue, cls in _handler_classes.items()}
+    channels: dict[str, list] = {}
+    triggers = []
+    for cls in _trigger_classes:
+        handler = handlers.get(cls.target_queue)
+        if handler is None:
+            logger.error(f"[Registry] ⚠ {cls.__name__}: нет хендлера очереди {cls.target_queue} — пропуск")
+            continue
+        trigger = cls(handler)
+        triggers.append(trigger)
+        if cls.channel_name:
+            channels.setdefault(cls.channel_name, []).append(trigger)
 
-def load_triggers():
-    """Возвращает список всех Trigger-классов"""
-    from app.triggers.base_trigger import BaseTrigger
-    triggers = discover_subclasses("app.triggers", BaseTrigger)
-    logger.info(f"[Registry] Загружено триггеров: {len(triggers)}")
-    return triggers
+    logger.info(f"[Registry] Обработчиков: {len(handlers)}, триггеров: {len(triggers)}")
+    return DispatchTable(handlers, channels, triggers)
@@ -0,0 +1,175 @@
+import asyncio
+import bisect
+import logging
+from typing import Awaitable, Callable, Iterable
+
+from app.core.partition import Partition, stable_hash
+from conf import serializer
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """
+    Консистентное хэширование: у каждого узла vnodes точек на кольце,
+    ключ принадлежит первой точке по часовой стрелке.
+    При добавлении / удалении узла переезжает ~1/N ключей — только на него / с него.
+    """
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self._hashes: list[int] = []
+        self._owners: list[str] = []
+        self.set_nodes(nodes)
+
+    @property
+    def nodes(self) -> list[str]:
+        return sorted(set(self._owners))
+
+    def set_nodes(self, nodes: Iterable[str]):
+        points = sorted(
+            (stable_hash(f"{node}#{replica}"), node)
+            for node in set(nodes)
+            for replica in range(self.vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> str | None:
+        if not self._hashes:
+            return None
+        index = bisect.bisect_right(self._hashes, stable_hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class NodeShard:
+    """
+    Доля узла (контейнера MONITORING) в кластере: элементы делятся по uuid через HashRing.
+
+    - чужие сообщения Rabbit пересылаются в очередь узла-владельца {queue}@{node}
+    - элементы без uuid обрабатывает первый узел списка
+    - узел, которого нет в составе, не владеет ничем: отдаёт элементы и пересылает всё владельцам
+      (выведенный из кластера, но ещё работающий узел не дублирует обработку)
+    - пустой состав — узел один (без шардинга по факту)
+    """
+    def __init__(self, node_id: str, nodes: Iterable[str], vnodes: int = 128):
+        self.node_id = node_id
+        self.ring = HashRing(vnodes=vnodes)
+        self.set_nodes(nodes)
+
+    def __repr__(self):
+        return f"NodeShard({self.node_id} of {self.ring.nodes})"
+
+    @property
+    def member(self) -> bool:
+        return self.node_id in self.ring.nodes
+
+    def set_nodes(self, nodes: Iterable[str]):
+        nodes = set(nodes) or {self.node_id}
+        self.ring.set_nodes(nodes)
+        if not self.member:
+            logger.error(f"[Shard] ⚠ {self.node_id} нет в составе кластера {self.ring.nodes} — элементы отдаются владельцам")
+
+    def owner(self, body) -> str:
+        uuid = body.get("uuid") if isinstance(body, dict) else None
+        if not uuid:
+            return self.ring.nodes[0]
+        return self.ring.node_for(str(uuid))
+
+    def owns(self, body) -> bool:
+        return self.owner(body) == self.node_id
+
+    @staticmethod
+    def base_queue(queue_name: str) -> str:
+        """queue@node.p1 → queue"""
+        return Partition.base_queue(queue_name).split("@", 1)[0]
+
+    def queue(self, queue_name: str, node: str | None = None) -> str:
+        return f"{self.base_queue(queue_name)}@{node or self.node_id}"
+
+    def route(self, queue_name: str, body) -> str | None:
+        owner = self.owner(body)
+        if owner == self.node_id:
+            return None
+        return self.queue(queue_name, owner)
+
+
+class Placement:
+    """
+    Где обрабатывается элемент: узел кластера (NodeShard, если задан NODE_ID),
+    затем воркер на узле (Partition). Один объект для InitialDataLoader,
+    StateMirror и RabbitMQConsumer.
+    """
+    def __init__(self, partition: Partition, shard: NodeShard | None = None):
+        self.partition = partition
+        self.shard = shard
+
+    def __repr__(self):
+        return f"Placement({self.shard}, {self.partition})"
+
+    @property
+    def distributed(self) -> bool:
+        return self.shard is not None or self.partition.count > 1
+
+    def owns(self, body) -> bool:
+        if self.shard is not None and not self.shard.owns(body):
+            return False
+        return self.partition.owns(body)
+
+    def inbox(self, queue_name: str) -> str:
+        """Очередь узла (без шардинга — общая очередь)"""
+        return self.shard.queue(queue_name) if self.shard is not None else queue_name
+
+    def queues(self, queue_name: str) -> list[str]:
+        """Очереди, которые слушает процесс: общая, узла, партиции"""
+        queues = [queue_name]
+        if self.shard is not None:
+            queues.append(self.inbox(queue_name))
+        if self.partition.count > 1:
+            queues.append(self.partition.queue(self.inbox(queue_name)))
+        return queues
+
+    def route(self, queue_name: str, body) -> str | None:
+        if self.shard is not None:
+            target = self.shard.route(queue_name, body)
+            if target:
+                return target
+        return self.partition.route(self.inbox(queue_name), body)
+
+
+class ShardMembership:
+    """
+    Состав кластера из Redis (db 1, JSON-список узлов) — опрос раз в poll_interval.
+    Изменился состав → on_change(nodes): узел отдаёт чужие элементы и догружает свои.
+    """
+    def __init__(self, client, key: str, poll_interval: float = 10.0):
+        self.client = client
+        self.key = key
+        self.poll_interval = poll_interval
+
+    async def read(self) -> list[str] | None:
+        raw = await self.client.get(self.key)
+        if not raw:
+            return None
+        try:
+            nodes = serializer.loads(raw)
+        except ValueError:
+            logger.error(f"[Shard] Невалидный состав кластера в {self.key}: {raw!r}")
+            return None
+        if not isinstance(nodes, list) or not all(isinstance(node, str) and node for node in nodes):
+            logger.error(f"[Shard] Невалидный состав кластера в {self.key}: {raw!r}")
+            return None
+        return nodes
+
+    async def run(self, current: list[str], on_change: Callable[[list[str]], Awaitable]):
+        current = sorted(set(current))
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                nodes = await self.read()
+                if nodes is None or sorted(set(nodes)) == current:
+                    continue
+                logger.info(f"[Shard] Состав кластера: {current} → {sorted(set(nodes))}")
+                current = sorted(set(nodes))
+                await on_change(current)
+            except Exception as e:
+                logger.error(f"[Shard] Ошибка обновления состава кластера: {e}")
@@ -0,0 +1,122 @@
+from bisect import bisect_left, bisect_right
+from typing import Hashable
+
+
+class SortedIndex:
+    """
+    Отсортированный индекс key → value: отсортированные блоки до 2 * load элементов
+    (параллельные списки значений и ключей) и максимумы блоков для bisect.
+
+    - add / discard — O(log n) поиск блока + сдвиг внутри блока (O(load), а не O(n) по всему индексу)
+    - выборка диапазона — O(log n + k), где k — число попаданий
+    """
+    def __init__(self, load: int = 512):
+        self._load = load
+        self._values: list[list] = []  # блоки значений, каждый отсортирован
+        self._keys: list[list[Hashable]] = []  # ключи в тех же позициях
+        self._maxes: list = []  # последнее (наибольшее) значение каждого блока
+        self._by_key: dict[Hashable, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._by_key
+
+    def get(self, key: Hashable, default=None):
+        return self._by_key.get(key, default)
+
+    def add(self, key: Hashable, value):
+        """Добавляет или перемещает ключ на новое значение"""
+        self.discard(key)
+        self._by_key[key] = value
+        if not self._maxes:
+            self._values.append([value])
+            self._keys.append([key])
+            self._maxes.append(value)
+            return
+
+        i = min(bisect_right(self._maxes, value), len(self._maxes) - 1)
+        values, keys = self._values[i], self._keys[i]
+        pos = bisect_right(values, value)
+        values.insert(pos, value)
+        keys.insert(pos, key)
+        self._maxes[i] = values[-1]
+        if len(values) > 2 * self._load:
+            # делим пополам, чтобы сдвиги внутри блока оставались O(load)
+            self._values[i + 1:i + 1] = [values[self._load:]]
+            self._keys[i + 1:i + 1] = [keys[self._load:]]
+            del values[self._load:]
+            del keys[self._load:]
+            self._maxes.insert(i, values[-1])
+
+    def discard(self, key: Hashable) -> bool:
+        if key not in self._by_key:
+            return False
+        value = self._by_key.pop(key)
+        # равные значения могут лежать в нескольких блоках подряд
+        for i in range(bisect_left(self._maxes, value), len(self._maxes)):
+            values, keys = self._values[i], self._keys[i]
+            if values[0] > value:
+                break
+            for pos in range(bisect_left(values, value), bisect_right(values, value)):
+                if keys[pos] == key:
+                    del values[pos]
+                    del keys[pos]
+                    if values:
+                        self._maxes[i] = values[-1]
+                    else:
+                        del self._values[i], self._keys[i], self._maxes[i]
+                    return True
+        return True
+
+    def clear(self):
+        self._values.clear()
+        self._keys.clear()
+        self._maxes.clear()
+        self._by_key.clear()
+
+    # ---------- выборки ----------
+    def _left(self, value) -> tuple[int, int]:
+        """Позиция (блок, индекс) первого value_i >= value"""
+        i = bisect_left(self._maxes, value)
+        return (i, bisect_left(self._values[i], value)) if i < len(self._maxes) else (i, 0)
+
+    def _right(self, value) -> tuple[int, int]:
+        """Позиция (блок, индекс) первого value_i > value"""
+        i = bisect_right(self._maxes, value)
+        return (i, bisect_right(self._values[i], value)) if i < len(self._maxes) else (i, 0)
+
+    def _slice(self, start: tuple[int, int] | None = None, stop: tuple[int, int] | None = None) -> list[Hashable]:
+        i, j = start or (0, 0)
+        stop_i, stop_j = stop or (len(self._keys), 0)
+        if i == stop_i:
+            return self._keys[i][j:stop_j] if i < len(self._keys) else []
+        if i > stop_i:
+            return []
+        found = self._keys[i][j:]
+        for keys in self._keys[i + 1:stop_i]:
+            found.extend(keys)
+        if stop_i < len(self._keys):
+            found.extend(self._keys[stop_i][:stop_j])
+        return found
+
+    def between(self, lo, hi) -> list[Hashable]:
+        """Ключи с lo <= value <= hi"""
+        return self._slice(self._left(lo), self._right(hi))
+
+    def at_most(self, value) -> list[Hashable]:
+        """Ключи с value_i <= value"""
+        return self._slice(stop=self._right(value))
+
+    def below(self, value) -> list[Hashable]:
+        """Ключи с value_i < value"""
+        return self._slice(stop=self._left(value))
+
+    def at_least(self, value) -> list[Hashable]:
+        """Ключи с value_i >= value"""
+        return self._slice(self._left(value))
+
+    def above(self, value) -> list[Hashable]:
+        """Ключи с value_i > value"""
+        return self._slice(self._right(value))
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Callable
+
+from app.core.extremum_tracker import extremum_tracker
+from app.core.redis_batch import write_batch
+from app.core.state_mirror import order_mirror, position_mirror
+from conf import serializer
+from conf.conf_redis import redis_server_data
+
+logger = logging.getLogger(__name__)
+
+MONITORING_CHANNEL = "MONITORING"
+ITEMS_CHANNEL = "MONITORING:items"  # тела новых элементов: в MONITORING только состояние, его мало для книги
+
+
+class StandbyFeed:
+    """
+    Тёплый резерв: пока аренду держит другой экземпляр, повторяем его состояние по ленте Redis (db 8).
+
+    - MONITORING set    → копия состояния (StateMirror.apply) и экстремумы (ExtremumTracker.seed)
+    - MONITORING delete → элемент уходит из хендлера и копии
+    - MONITORING:items  → новый элемент (тело из Rabbit) в очередь хендлера; его публикует лидер (announce)
+
+    Удалённые id помнятся (tombstones), чтобы первичная загрузка, снятая раньше удаления,
+    не вернула элемент обратно — prune() после InitialDataLoader.
+    """
+    def __init__(self, handlers: list, owns: Callable[[dict], bool] | None = None, tombstones: int = 10000):
+        self.handlers = {h.kind: h for h in handlers if h.kind}
+        self.mirrors = {"order": order_mirror, "position": position_mirror}
+        self.owns = owns
+        self._deleted: deque = deque(maxlen=tombstones)
+        self._deleted_set: set = set()
+
+        self.applied = 0
+
+    # ---------- лидер ----------
+    def announce(self, kind: str, body):
+        """Лидер: новый элемент → лента для резерва (уходит в Redis вместе с остальной пачкой)"""
+        write_batch.publish(redis_server_data, ITEMS_CHANNEL, serializer.dumpb({"type": kind, "method": "add", "data": body}))
+
+    # ---------- резерв ----------
+    def _tombstone(self, kind: str, item_id):
+        key = (kind, str(item_id))
+        if key in self._deleted_set:
+            return
+        if len(self._deleted) == self._deleted.maxlen:
+            self._deleted_set.discard(self._deleted[0])
+        self._deleted.append(key)
+        self._deleted_set.add(key)
+
+    def _is_deleted(self, kind: str, body) -> bool:
+        return isinstance(body, dict) and (kind, str(body.get("id"))) in self._deleted_set
+
+    async def apply(self, message: dict):
+        kind = message.get("type")
+        method = message.get("method")
+        handler = self.handlers.get(kind)
+        mirror = self.mirrors.get(kind)
+        if handler is None or mirror is None:
+            return
+        data = message.get("data")
+        if self.owns is not None and isinstance(data, dict) and not self.owns(data):
+            return
+
+        if method == "add":
+            if not self._is_deleted(kind, data):
+                await handler.add_message(None, data)
+        elif method == "set" and isinstance(data, dict):
+            mirror.apply(message.get("id"), data)
+            uuid = data.get("uuid")
+            if uuid:
+                for side, field in (("MAX", "max_price"), ("MIN", "min_price")):
+                    if data.get(field) is not None:
+                        extremum_tracker.seed(extremum_tracker.key(kind, uuid, side), data[field])
+        elif method == "delete":
+            item_id = str(message.get("id"))
+            self._tombstone(kind, item_id)
+            mirror.forget(item_id)
+            for item in await handler.drop_messages(lambda record: record.id is not None and str(record.id) == item_id):
+                extremum_tracker.release(kind, item.uuid)
+        else:
+            return
+        self.applied += 1
+
+    async def prune(self) -> int:
+        """Убираем загруженные при старте элементы, удалённые лидером за время загрузки"""
+        dropped = 0
+        for kind, handler in self.handlers.items():
+            dropped += len(await handler.drop_messages(lambda record, k=kind: self._is_deleted(k, record.body)))
+        return dropped
+
+    async def run(self):
+        while True:
+            pubsub = redis_server_data.pubsub()
+            try:
+                await pubsub.subscribe(MONITORING_CHANNEL, ITEMS_CHANNEL)
+                logger.info(f"[Standby] Слушаю ленту {MONITORING_CHANNEL}, {ITEMS_CHANNEL}")
+                async for raw in pubsub.listen():
+                    if raw["type"] != "message":
+                        continue
+                    try:
+                        await self.apply(serializer.loads(raw["data"]))
+                    except Exception as e:
+                        logger.error(f"[Standby] Ошибка применения {raw['data'][:200]!r}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Standby] Ошибка ленты: {e} → переподключение")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
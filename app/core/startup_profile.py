@@ -0,0 +1,41 @@
+import logging
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """
+    Время и пик памяти по фазам запуска.
+
+    mark(name) закрывает фазу: время с предыдущей отметки и пик памяти Python за неё (tracemalloc).
+    report() печатает таблицу и выключает трассировку — после запуска она только замедляла бы работу.
+    trace_memory=False — только время.
+    """
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self.trace_memory:
+            tracemalloc.start()
+        self.started = self._last = time.perf_counter()
+        self.phases: list[tuple[str, float, int | None]] = []
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.phases.append((name, now - self._last, peak))
+        self._last = now
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [f"[Startup] Запуск за {total:.2f}s"]
+        for name, elapsed, peak in self.phases:
+            memory = f"{peak / 1024 / 1024:8.1f} MiB" if peak is not None else "       —"
+            lines.append(f"  {name:<24} {elapsed:8.3f}s  пик {memory}")
+        logger.info("\n".join(lines))
+        if self.trace_memory:
+            tracemalloc.stop()
+            self.trace_memory = False
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from typing import Callable
+
+from app.core.redis_batch import write_batch
+from conf import serializer
+from conf.conf_redis import redis_server_data
+
+logger = logging.getLogger(__name__)
+
+
+class StateMirror:
+    """
+    Авторитетная копия состояния order:{id} / position:{id} в памяти процесса.
+
+    Процесс — единственный писатель этих ключей, поэтому горячий путь (has / get)
+    читает только память, а Redis (db 8) — цель записи: set / delete уходят
+    через write_batch в конце свечи.
+
+    - load() — при старте подтягивает все ключи префикса из Redis
+    - verify() — сверка с Redis (режим MIRROR_VERIFY_INTERVAL), расхождения в лог
+    - owns(data) — в режиме воркеров копия держит только элементы своей партиции
+    """
+    def __init__(self, prefix: str, chunk_size: int = 500):
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.owns: Callable[[dict], bool] | None = None
+        self._data: dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def key(self, item_id) -> str:
+        return f"{self.prefix}:{item_id}"
+
+    def has(self, item_id) -> bool:
+        return str(item_id) in self._data
+
+    def get(self, item_id) -> dict | None:
+        data = self._data.get(str(item_id))
+        return dict(data) if data is not None else None
+
+    def set(self, item_id, data: dict):
+        self._data[str(item_id)] = dict(data)
+        write_batch.set(redis_server_data, self.key(item_id), serializer.dumpb(data))
+
+    def delete(self, item_id):
+        self._data.pop(str(item_id), None)
+        write_batch.delete(redis_server_data, self.key(item_id))
+
+    def apply(self, item_id, data: dict):
+        """Состояние из ленты MONITORING (резерв): только память, в Redis его уже записал лидер"""
+        self._data[str(item_id)] = dict(data)
+
+    def forget(self, item_id):
+        self._data.pop(str(item_id), None)
+
+    async def _read_redis(self) -> dict[str, dict]:
+        keys = [key async for key in redis_server_data.scan_iter(match=f"{self.prefix}:*", count=self.chunk_size)]
+        result = {}
+        for start in range(0, len(keys), self.chunk_size):
+            chunk = keys[start:start + self.chunk_size]
+            values = await redis_server_data.mget(chunk)
+            for key, raw in zip(chunk, values):
+                if not raw:
+                    continue
+                key = key.decode() if isinstance(key, bytes) else key
+                try:
+                    data = serializer.loads(raw)
+                    item_id = key.split(":", 1)[1]
+                except (ValueError, IndexError):
+                    logger.error(f"[Mirror:{self.prefix}] Невалидное значение {key}")
+                    continue
+                if self.owns is None or self.owns(data):
+                    result[item_id] = data
+        return result
+
+    async def load(self, owns: Callable[[dict], bool] | None = None):
+        self.owns = owns
+        self._data = await self._read_redis()
+        logger.info(f"[Mirror:{self.prefix}] Загружено из Redis: {len(self._data)}")
+
+    async def verify(self) -> dict:
+        """Сверка копии с Redis: {"missing_in_redis", "missing_in_memory", "mismatch"}"""
+        await write_batch.flush()
+        stored = await self._read_redis()
+        diff = {
+            "missing_in_redis": sorted(set(self._data) - set(stored)),
+            "missing_in_memory": sorted(set(stored) - set(self._data)),
+            "mismatch": sorted(k for k in set(self._data) & set(stored) if self._data[k] != stored[k]),
+        }
+        if any(diff.values()):
+            logger.error(f"[Mirror:{self.prefix}] ❗ Расхождение с Redis: { {k: v[:10] for k, v in diff.items()} }")
+        else:
+            logger.info(f"[Mirror:{self.prefix}] ✅ Совпадает с Redis ({len(self._data)})")
+        return diff
+
+    async def run_verifier(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.verify()
+            except Exception as e:
+                logger.error(f"[Mirror:{self.prefix}] Ошибка сверки: {e}")
+
+
+order_mirror = StateMirror("order")
+position_mirror = StateMirror("position")
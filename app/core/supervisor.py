@@ -0,0 +1,179 @@
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class _Worker:
+    __slots__ = ("index", "process", "started", "restarts", "delay", "restart_at", "report", "seen")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: mp.Process | None = None
+        self.started = 0.0
+        self.restarts = 0
+        self.delay = 0.0
+        self.restart_at: float | None = None  # время перезапуска после паузы; None — не ждёт перезапуска
+        self.report: dict = {}
+        self.seen = 0.0
+
+
+class Supervisor:
+    """
+    Режим нескольких процессов на одном хосте (WORKERS > 1).
+
+    Каждый воркер — отдельный процесс target(index, count, health_queue) со своей партицией
+    элементов и своим полным стеком (RedisListener / RabbitMQConsumer / триггеры).
+
+    - воркер умер — перезапуск с нарастающей паузой (restart_delay … max_restart_delay),
+      пауза сбрасывается, если воркер проработал дольше max_restart_delay; пауза не блокирует цикл:
+      у воркера ставится срок перезапуска, цикл запускает его по сроку и тем временем следит за остальными
+    - воркер раз в health_interval кладёт отчёт в health_queue; после первого отчёта
+      нет нового 3 интервала — воркер считается зависшим и перезапускается
+    - сводный отчёт по воркерам — в лог раз в health_interval
+    """
+    def __init__(
+            self,
+            target: Callable,
+            count: int,
+            health_interval: float = 10.0,
+            restart_delay: float = 1.0,
+            max_restart_delay: float = 60.0,
+    ):
+        self.target = target
+        self.count = count
+        self.health_interval = health_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        self.ctx = mp.get_context("spawn")
+        self.health = self.ctx.Queue()
+        self.workers = [_Worker(index) for index in range(count)]
+        self._stopping = False
+
+    # ---------- процессы ----------
+    def _spawn(self, worker: _Worker):
+        worker.process = self.ctx.Process(
+            target=self.target,
+            args=(worker.index, self.count, self.health),
+            name=f"monitoring-worker-{worker.index}",
+            daemon=False,
+        )
+        worker.process.start()
+        worker.restart_at = None
+        worker.started = worker.seen = time.monotonic()
+        worker.report = {}
+        logger.info(f"[Supervisor] 🚀 Воркер {worker.index}/{self.count} запущен, pid={worker.process.pid}")
+
+    def _restart(self, worker: _Worker, reason: str):
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+
+        if time.monotonic() - worker.started > self.max_restart_delay:
+            worker.delay = 0.0
+        worker.delay = min(max(worker.delay * 2, self.restart_delay), self.max_restart_delay)
+        worker.restarts += 1
+        logger.error(f"[Supervisor] 🔁 Воркер {worker.index}: {reason} → перезапуск через {worker.delay:.0f}s")
+        worker.restart_at = time.monotonic() + worker.delay
+
+    def _check(self):
+        now = time.monotonic()
+        for worker in self.workers:
+            if self._stopping:
+                return
+            if worker.restart_at is not None:
+                if now >= worker.restart_at:
+                    self._spawn(worker)
+            elif not worker.process.is_alive():
+                self._restart(worker, f"exit code {worker.process.exitcode}")
+            elif worker.report and now - worker.seen > self.health_interval * 3:
+                # до первого отчёта воркер ещё грузится (InitialDataLoader) — не трогаем
+                self._restart(worker, f"нет отчёта {now - worker.seen:.0f}s")
+
+    # ---------- здоровье ----------
+    def _drain_health(self, timeout: float):
+        try:
+            report = self.health.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            index = report.get("index")
+            if isinstance(index, int) and 0 <= index < self.count:
+                worker = self.workers[index]
+                worker.report = report
+                worker.seen = time.monotonic()
+            try:
+                report = self.health.get_nowait()
+            except queue.Empty:
+                return
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        workers = [
+            {
+                "index": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": bool(worker.process and worker.process.is_alive()),
+                "restarts": worker.restarts,
+                "report_age": round(now - worker.seen, 1),
+                **{k: v for k, v in worker.report.items() if k not in ("index", "pid")},
+            }
+            for worker in self.workers
+        ]
+        return {
+            "workers": workers,
+            "alive": sum(w["alive"] for w in workers),
+            "items": sum(w.get("items", 0) for w in workers),
+        }
+
+    def _log_health(self):
+        stats = self.stats()
+        logger.info(f"[Supervisor] ❤️ Воркеров {stats['alive']}/{self.count}, элементов {stats['items']}")
+        for worker in stats["workers"]:
+            logger.info(f"[Supervisor]   {worker}")
+
+    # ---------- запуск ----------
+    def _on_signal(self, signum, frame):
+        logger.info(f"[Supervisor] Сигнал {signum} → останавливаю воркеры")
+        self._stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_signal)
+        for worker in self.workers:
+            self._spawn(worker)
+
+        last_report = time.monotonic()
+        try:
+            while not self._stopping:
+                self._drain_health(timeout=1.0)
+                self._check()
+                if time.monotonic() - last_report >= self.health_interval:
+                    last_report = time.monotonic()
+                    self._log_health()
+        except KeyboardInterrupt:
+            logger.info("[Supervisor] Завершение по Ctrl+C")
+        finally:
+            self._stopping = True
+            self.stop()
+
+    def stop(self, timeout: float = 15.0):
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        logger.info("[Supervisor] Воркеры остановлены")
@@ -1,46 +1,152 @@
 import asyncio
-import json
 import logging
+from typing import Callable
+
+from app.core.message_store import MessageStore, message_key
+from app.core.records import ItemRecord
+from conf import serializer
 
 logger = logging.getLogger(__name__)
 
 
 class BaseHandler:
+    queue_name: str | None = None  # очередь RabbitMQ (ключ в app.core.registry)
+    kind: str | None = None  # "order" / "position" — type в ленте MONITORING
+    schema = None  # pydantic-схема тела: проверяется один раз при add_message
+
     def __init__(self):
-        self.messages: list[dict] = []  # локальные сообщения
+        self.messages = MessageStore()  # локальные сообщения (FIFO + индекс по uuid)
         self.lock = asyncio.Lock()
-        self.queue_name = None
+        # фабрика книги (MonitoringBook) — если хендлер ведёт индексы для выборки по свече;
+        # книга своя у каждого символа, тик одного символа не сканирует элементы другого
+        self.book_factory: Callable | None = None
+        self.books: dict = {}  # символ → книга
+        self._symbols: dict = {}  # ключ сообщения → символ
+        self._symbol_counts: dict[str, int] = {}  # символ → число элементов
+        self._symbol_listeners: list[Callable[[str, bool], None]] = []
+        self._item_listeners: list[Callable[[dict], None]] = []
+        self.journal = None  # HandlerJournal: изменения очереди на диске для быстрого рестарта
 
     def __len__(self):
         return len(self.messages)
 
+    # ---------- символы ----------
+    @property
+    def symbols(self) -> list[str]:
+        """Символы, по которым есть открытые элементы"""
+        return list(self._symbol_counts)
+
+    def has_symbol(self, symbol: str) -> bool:
+        return symbol in self._symbol_counts
+
+    def count_symbol(self, symbol: str) -> int:
+        return self._symbol_counts.get(symbol, 0)
+
+    def add_symbol_listener(self, listener: Callable[[str, bool], None]):
+        """
+        listener(symbol, active) вызывается, когда у символа появился первый элемент (True)
+        или ушёл последний (False). Для уже открытых символов вызывается сразу.
+        """
+        self._symbol_listeners.append(listener)
+        for symbol in self._symbol_counts:
+            listener(symbol, True)
+
+    def add_item_listener(self, listener: Callable[[dict], None]):
+        """listener(body) вызывается для каждого нового элемента очереди"""
+        self._item_listeners.append(listener)
+
+    def _notify_symbol(self, symbol: str, active: bool):
+        for listener in self._symbol_listeners:
+            try:
+                listener(symbol, active)
+            except Exception as e:
+                logger.error(f"[Handler:{self.__class__.__name__}] Ошибка подписки {symbol}: {e}")
+
+    def _track(self, key, record: ItemRecord):
+        """Элемент попал в очередь: символ, книга символа"""
+        symbol = record.symbol
+        previous = self._symbols.get(key)
+        if previous is not None and previous != symbol:
+            self._untrack(key)  # новая версия элемента сменила символ
+        if key not in self._symbols:
+            self._symbols[key] = symbol
+            self._symbol_counts[symbol] = self._symbol_counts.get(symbol, 0) + 1
+            if self._symbol_counts[symbol] == 1:
+                self._notify_symbol(symbol, True)
+        book = self._book(symbol)
+        if book is not None:
+            book.on_add(key, record)
+        self._on_added(key, record)
+
+    def _untrack(self, key):
+        """Элемент ушёл из очереди: пустая книга символа освобождается"""
+        symbol = self._symbols.pop(key, None)
+        if symbol is None:
+            return
+        book = self.books.get(symbol)
+        if book is not None:
+            book.on_remove(key)
+        self._on_removed(key)
+        self._symbol_counts[symbol] -= 1
+        if self._symbol_counts[symbol] == 0:
+            del self._symbol_counts[symbol]
+            self.books.pop(symbol, None)
+            self._notify_symbol(symbol, False)
+
+    def _book(self, symbol: str):
+        if self.book_factory is None:
+            return None
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = self.book_factory()
+        return book
+
+    def _on_added(self, key, record: ItemRecord): pass
+    def _on_removed(self, key): pass
+
+    # ---------- очередь ----------
+    def _insert(self, msg, body) -> tuple[ItemRecord, bool]:
+        """Элемент в очередь (под self.lock); False — дубликат uuid, не добавлен"""
+        # Преобразуем JSON (str / bytes) → dict (если нужно)
+        if isinstance(body, (str, bytes)):
+            try:
+                body = serializer.loads(body)
+            except ValueError:
+                pass
+
+        # 🔸 Добавляем в локальную очередь (дубликат uuid отбрасывается за O(1))
+        item = ItemRecord.build(msg, body, self.schema)
+        if not self.messages.append(item):
+            return item, False
+        if item.error:
+            logger.error(f"[Handler:{self.__class__.__name__}] ❗ Тело не прошло схему uuid={item.uuid}: {item.error}")
+        self._track(item.key, item)
+        if self.journal is not None:
+            self.journal.add(item)
+        for listener in self._item_listeners:
+            listener(item.body)
+        return item, True
+
     async def add_message(self, msg, body):
         """Добавляем сообщение в локальную очередь (RabbitMQ msg, JSON body)"""
         async with self.lock:
-            # Преобразуем строку JSON → dict (если нужно)
-            if isinstance(body, str):
-                try:
-                    body = json.loads(body)
-                except json.JSONDecodeError:
-                    pass
-
-            uuid = (body or {}).get("uuid")
-            if uuid:
-                # 🔸 Проверяем, нет ли уже такого uuid в очереди
-                if any(m["body"].get("uuid") == uuid for m in self.messages):
-                    logger.info(f"[Handler:{self.__class__.__name__}] 🔁 Пропускаю дубликат uuid={uuid}")
-                    if msg:
-                        await msg.ack()  # подтверждаем получение, чтобы не висело в Rabbit
-                    return
-
-            # 🔸 Добавляем в локальную очередь
-            self.messages.append({"msg": msg, "body": body})
-            logger.info(f"[Handler:{self.__class__.__name__}] Добавлено сообщение: {body}")
-
-            # 🔹 Подтверждаем RabbitMQ, если есть msg
+            item, added = self._insert(msg, body)
+            if not added:
+                logger.info(f"[Handler:{self.__class__.__name__}] 🔁 Пропускаю дубликат uuid={item.uuid}")
+            else:
+                logger.info(f"[Handler:{self.__class__.__name__}] Добавлено сообщение: {item.body}")
+
+            # 🔹 Подтверждаем RabbitMQ, если есть msg (дубликат тоже — чтобы не висел в Rabbit)
             if msg:
                 await msg.ack()
 
+    async def bulk_add(self, bodies: list) -> int:
+        """Пачка тел (страница первичной загрузки) — одним захватом lock; сколько добавлено без дубликатов"""
+        async with self.lock:
+            added = sum(self._insert(None, body)[1] for body in bodies)
+        logger.info(f"[Handler:{self.__class__.__name__}] Добавлено пачкой: {added} из {len(bodies)}")
+        return added
+
     async def get_messages(self):
         """Возвращает копию текущих сообщений"""
         async with self.lock:
@@ -49,20 +155,68 @@ class BaseHandler:
     async def next_message(self):
         """Берём следующее сообщение (FIFO)"""
         async with self.lock:
-            if not self.messages:
-                return None
-            return self.messages.pop(0)
+            return self.messages.popleft()
 
     async def requeue_message(self, item):
         """Возвращаем сообщение в конец очереди"""
         async with self.lock:
-            self.messages.append(item)
+            if not self.messages.append(item):
+                # пока сообщение было в обработке, пришла новая версия того же uuid
+                logger.info(f"[Handler:{self.__class__.__name__}] 🔁 В очереди уже есть новая версия, не возвращаю")
+            elif self.journal is not None:
+                self.journal.requeue(message_key(item))
 
     async def remove_message(self, item):
         """Удаляем сообщение"""
         async with self.lock:
-            try:
+            self.messages.remove(item)
+            key = message_key(item)
+            if key not in self.messages:
+                self._untrack(key)
+                if self.journal is not None:
+                    self.journal.remove(key)
+
+    async def drop_messages(self, predicate: Callable[[ItemRecord], bool]) -> list[ItemRecord]:
+        """Убираем из очереди сообщения, для которых predicate(item) — True (элемент ушёл другому узлу)"""
+        async with self.lock:
+            dropped = [item for item in self.messages if predicate(item)]
+            for item in dropped:
                 self.messages.remove(item)
+                self._untrack(message_key(item))
+                if self.journal is not None:
+                    self.journal.remove(message_key(item))
+            return dropped
 
-            except ValueError:
-                pass
+    async def select_messages(self, symbol: str, close: float, low: float, high: float, **params) -> list[ItemRecord]:
+        """
+        Сообщения символа, которые нужно обработать на свече.
+        Без книги — все сообщения символа.
+        """
+        async with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                if self.book_factory is not None:
+                    return []
+                return [item for item in self.messages if item.symbol == symbol]
+            keys = book.select(close, low, high, **params)
+            return [item for key in keys if (item := self.messages.get(key)) is not None]
+
+    async def admit_message(self, item, state: dict) -> bool:
+        """Сообщение принято в мониторинг — переносим его в индексы книги символа"""
+        async with self.lock:
+            key = message_key(item)
+            book = self.books.get(self._symbols.get(key))
+            if book is None or self.messages.get(key) is not item:
+                return False
+            if not book.admit(key, item, state):
+                return False
+            if self.journal is not None:
+                self.journal.admit(key)
+            return True
+
+    async def is_admitted(self, item) -> bool:
+        key = message_key(item)
+        book = self.books.get(self._symbols.get(key))
+        if book is None:
+            return False
+        return book.is_admitted(key)
@@ -1,7 +1,15 @@
+from app.core.batch_engine import make_order_book
+from app.core.registry import register_handler
 from app.handlers.base_handler import BaseHandler
+from API.schemas.order import OrderSchema
 
+@register_handler
 class OrderHandler(BaseHandler):
     """Обработчик сообщений очереди ордеров"""
+    queue_name = "queue_monitoring_order"
+    kind = "order"  # type в ленте MONITORING
+    schema = OrderSchema
+
     def __init__(self):
         super().__init__()
-        self.queue_name = "queue_monitoring_order"
+        self.book_factory = make_order_book
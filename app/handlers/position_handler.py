@@ -1,6 +1,24 @@
+from app.core.batch_engine import make_position_book
+from app.core.lifetime_scheduler import LifetimeScheduler
+from app.core.registry import register_handler
 from app.handlers.base_handler import BaseHandler
+from API.schemas.position import PositionSchema
 
+@register_handler
 class PositionHandler(BaseHandler):
+    queue_name = "queue_monitoring_position"
+    kind = "position"  # type в ленте MONITORING
+    schema = PositionSchema
+
     def __init__(self):
         super().__init__()
-        self.queue_name = "queue_monitoring_position"
+        # дедлайны срока жизни опционных позиций — один таймер на все символы
+        self.lifetime = LifetimeScheduler()
+        self.book_factory = lambda: make_position_book(self.lifetime)
+
+    def _on_added(self, key, record):
+        if record.category == "option" and record.created_ts is not None:
+            self.lifetime.register(key, record.created_ts)
+
+    def _on_removed(self, key):
+        self.lifetime.unregister(key)
@@ -1,5 +1,23 @@
-from pydantic import BaseModel
-from typing import Literal
+from decimal import Decimal
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict
+
+from conf import serializer
+
+try:
+    import msgspec
+except ImportError:  # msgspec — опциональная зависимость
+    msgspec = None
+
+
+# Триггеры работают по минутным свечам: сообщения с другим верхнеуровневым interval пропускаются
+KLINE_INTERVAL = "1m"
+
+
+def skip_interval(interval) -> bool:
+    """Верхнеуровневый interval сообщения задан и это не 1m (5m, 15m, 30m)"""
+    return bool(interval) and interval != KLINE_INTERVAL
 
 
 class KlineData(BaseModel):
@@ -22,4 +40,103 @@ class KlineUpdateData(BaseModel):
 
 class KlineUpdate(BaseModel):
     type: Literal['kline_update']
-    data: KlineUpdateData
\ No newline at end of file
+    data: KlineUpdateData
+
+if msgspec is not None:
+    # Те же поля, что у KlineUpdate: msgspec разбирает bytes сразу в типизированные структуры
+    class KlineDataStruct(msgspec.Struct):
+        ts: int
+        o: float
+        h: float
+        l: float
+        c: float
+        v: float
+        t: float
+        dt: str
+
+    class KlineUpdateDataStruct(msgspec.Struct):
+        symbol: str
+        interval: int
+        ex: str
+        data: KlineDataStruct
+
+    class KlineUpdateStruct(msgspec.Struct):
+        type: Literal['kline_update']
+        data: KlineUpdateDataStruct
+        interval: Any = None  # верхнеуровневый таймфрейм ("1m", "5m", ...), есть не во всех сообщениях
+
+    _kline_decoder = msgspec.json.Decoder(KlineUpdateStruct)
+else:
+    _kline_decoder = None
+
+
+class Tick(BaseModel):
+    """
+    Свеча, разобранная один раз на сообщение (в RedisListener): общая для всех триггеров и сервисов.
+    Неизменяема; цены — сразу float и Decimal (Decimal(float) — точное значение, как раньше в сервисах).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    symbol: str              # в верхнем регистре, как ключ книги хендлера
+    interval: int
+    ts: int                  # timestamp в миллисекундах
+    open: float
+    high: float
+    low: float
+    close: float
+    high_dec: Decimal
+    low_dec: Decimal
+    close_dec: Decimal
+
+    @classmethod
+    def from_message(cls, data) -> "Tick":
+        """Сообщение kline_update (dict) → Tick; ValidationError, если сообщение невалидно"""
+        return cls._build(KlineUpdate.model_validate(data).data)
+
+    @classmethod
+    def parse(cls, raw) -> "Tick | None":
+        """
+        Сырое сообщение Redis (bytes / str) → Tick; None — свеча другого таймфрейма (skip_interval),
+        ValueError — сообщение невалидно.
+        С msgspec — сразу из bytes в структуры, без промежуточного dict; без него (или это не kline_update) —
+        JSON → dict → KlineUpdate. Фильтр interval одинаков на обоих путях.
+        """
+        if _kline_decoder is not None:
+            try:
+                update = _kline_decoder.decode(raw)
+            except (msgspec.DecodeError, TypeError):
+                pass
+            else:
+                return None if skip_interval(update.interval) else cls._build(update.data)
+
+        try:
+            data = serializer.loads(raw)
+        except ValueError:
+            data = raw
+        if isinstance(data, dict) and skip_interval(data.get("interval")):
+            return None
+        return cls.from_message(data)
+
+    @classmethod
+    def _build(cls, update) -> "Tick":
+        candle = update.data
+        return cls.model_construct(
+            symbol=update.symbol.upper(),
+            interval=update.interval,
+            ts=candle.ts,
+            open=candle.o,
+            high=candle.h,
+            low=candle.l,
+            close=candle.c,
+            high_dec=Decimal(candle.h),
+            low_dec=Decimal(candle.l),
+            close_dec=Decimal(candle.c),
+        )
+
+    def merge(self, newer: "Tick") -> "Tick":
+        """Склейка с более новой свечой: всё из новой, high/low — экстремумы обеих"""
+        if newer.high >= self.high and newer.low <= self.low:
+            return newer
+        high, high_dec = (newer.high, newer.high_dec) if newer.high >= self.high else (self.high, self.high_dec)
+        low, low_dec = (newer.low, newer.low_dec) if newer.low <= self.low else (self.low, self.low_dec)
+        return newer.model_copy(update={"high": high, "high_dec": high_dec, "low": low, "low_dec": low_dec})
@@ -1,5 +1,7 @@
 import logging
 
+from app.core.records import ItemRecord
+from app.schemas.kline import Tick
 from app.services.order.services.option import OptionOrderService
 from app.services.order.services.spot import SpotOrderService
 
@@ -11,13 +13,22 @@ class OrderRouter:
         self.option_service = OptionOrderService()
         self.spot_service = SpotOrderService()
 
-    async def process(self, position_dict: dict, trigger_data: dict) -> bool:
-        category = position_dict.get("category")
+    async def process(self, order: ItemRecord, tick: Tick) -> bool:
+        if not order.valid:
+            logger.error(f"[Router] Ордер не прошёл схему {order.uuid}: {order.error}")
+            return False
+        category = order.category
 
         if category == "option":
-            return await self.option_service.process(position_dict, trigger_data)
+            return await self.option_service.process(order, tick)
         elif category == "spot":
-            return await self.spot_service.process(position_dict, trigger_data)
+            return await self.spot_service.process(order, tick)
         else:
             logger.error(f"[Router] Неизвестная категория: {category}")
             return False
+
+    async def get_state(self, order: ItemRecord) -> dict | None:
+        """Запись ордера в мониторинге (Redis), None — ещё не принят"""
+        if order.category != "option":
+            return None
+        return await self.option_service.get_order(order.id)
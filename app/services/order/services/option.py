@@ -2,20 +2,20 @@
 # ФЬЮЧЕРСЫ / ОПЦИОНЫ
 # ==============================================================
 import logging
-from decimal import Decimal
 
 from API.orders import api_get_order, api_change_status_order, api_close_order
-from API.schemas.order import OrderSchema
+from app.core.records import ItemRecord
 
-from app.schemas.kline import KlineUpdate
+from app.schemas.kline import Tick
+from app.services.rules import extremum_breach, target_reached
 from app.services.order.services.order_service import BaseOrderService
 
 logger = logging.getLogger(__name__)
 
 class OptionOrderService(BaseOrderService):
 
-    async def _handle_option(self, order: OrderSchema, kline: KlineUpdate) -> bool:
-        current_price = float(kline.data.data.c)
+    async def _handle_option(self, order: ItemRecord, tick: Tick) -> bool:
+        current_price = tick.close
         if not await self.has_order(order.id):   # <--- await
             api_order = await api_get_order(uuid=order.uuid)
             if api_order is None:
@@ -29,17 +29,17 @@ class OptionOrderService(BaseOrderService):
             )
             if not result_accept:
                 return False
-            await self._add_new_option_order(order, kline)
+            await self._add_new_option_order(order, tick)
             return False
 
         await self._update_option_extremums(order.id, current_price)
-        result = await self.calculation_profit(order, kline)
+        result = await self.calculation_profit(order, tick)
         return result
 
-    async def _add_new_option_order(self, order: OrderSchema, kline: KlineUpdate):
+    async def _add_new_option_order(self, order: ItemRecord, tick: Tick):
         order_uuid = order.uuid
         min_val, max_val = await self._load_existing_extremums(order_uuid)
-        current_price = float(kline.data.data.c)
+        current_price = tick.close
         if min_val is None or max_val is None:
             min_val = max_val = current_price
             await self._update_extremum(order_uuid, "MIN", min_val)
@@ -52,7 +52,7 @@ class OptionOrderService(BaseOrderService):
             "uuid": order_uuid,
             "symbol": order.symbol_name,
             "side": order.side,
-            "price_entry": float(order.price),
+            "price_entry": order.price,
             "max_price": float(max_val),
             "min_price": float(min_val),
         })
@@ -65,14 +65,15 @@ class OptionOrderService(BaseOrderService):
             return
         order_uuid = order["uuid"]
         updated = False
+        new_max, new_min = extremum_breach(order["max_price"], order["min_price"], current_price)
 
-        if current_price > order["max_price"]:
+        if new_max:
             order["max_price"] = current_price
             await self._update_extremum(order_uuid, "MAX", current_price)
             logger.info(f"[UPDATE] Новый MAX = {current_price}")
             updated = True
 
-        if current_price < order["min_price"]:
+        if new_min:
             order["min_price"] = current_price
             await self._update_extremum(order_uuid, "MIN", current_price)
             logger.info(f"[UPDATE] Новый MIN = {current_price}")
@@ -87,32 +88,18 @@ class OptionOrderService(BaseOrderService):
 
     async def calculation_profit(
             self,
-            order: OrderSchema,
-            kline: KlineUpdate
+            order: ItemRecord,
+            tick: Tick
     ):
         """
         Рассчитаем, достиг ли курс нужной отметки
         """
-        current_price = Decimal(kline.data.data.c)
-        if order.side == 'buy':
-            if current_price >= Decimal(order.target_rate):
-                result = await api_close_order(
-                    uuid=order.uuid,
-                    rate=current_price,
-                    kline_ms=kline.data.data.ts,
-                )
-                return result
+        current_price = tick.close_dec
+        if not target_reached(order.side, order.target_rate, current_price):
             return False
-        if order.side == 'sell':
-            if current_price <=  Decimal(order.target_rate):
-                result = await api_close_order(
-                    uuid=order.uuid,
-                    rate=current_price,
-                    kline_ms=kline.data.data.ts,
-                )
-                return result
-            return False
-
-
-
-
+        result = await api_close_order(
+            uuid=order.uuid,
+            rate=current_price,
+            kline_ms=tick.ts,
+        )
+        return result
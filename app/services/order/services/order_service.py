@@ -1,10 +1,13 @@
-import json
 import logging
 from datetime import datetime, UTC
 
 
-from API.schemas.order import OrderSchema
-from app.schemas.kline import KlineUpdate
+from app.core.extremum_tracker import extremum_tracker
+from app.core.records import ItemRecord
+from app.core.redis_batch import write_batch
+from app.core.state_mirror import order_mirror
+from app.schemas.kline import Tick
+from conf import serializer
 from conf.conf_redis import redis_server_data, redis_server
 
 
@@ -12,20 +15,17 @@ logger = logging.getLogger(__name__)
 
 
 class BaseOrderService:
-    # ключ для хранения
-    @staticmethod
-    def _key(order_id: int) -> str:
-        return f"order:{order_id}"
-
     async def get_order(self, order_id: int) -> dict | None:
-        raw = await redis_server_data.get(self._key(order_id))
-        return json.loads(raw) if raw else None
+        return order_mirror.get(order_id)
 
     async def set_order(self, order_id: int, data: dict):
+        """Состояние (копия в памяти + Redis) и PUBLISH уходят пачкой в конце свечи (write_batch)"""
         data['dt'] = str(datetime.now(UTC))
-        await redis_server_data.publish(
+        order_mirror.set(order_id, data)
+        write_batch.publish(
+            redis_server_data,
             'MONITORING',
-            json.dumps(
+            serializer.dumpb(
                 {
                     'id': order_id,
                     'type': 'order',
@@ -35,15 +35,16 @@ class BaseOrderService:
                 }
             )
         )
-        await redis_server_data.set(self._key(order_id), json.dumps(data))
 
     async def has_order(self, order_id: int) -> bool:
-        return await redis_server_data.exists(self._key(order_id)) > 0
+        return order_mirror.has(order_id)
 
     async def remove_order(self, order_id: int):
-        await redis_server_data.publish(
+        order_mirror.delete(order_id)
+        write_batch.publish(
+            redis_server_data,
             'MONITORING',
-            json.dumps(
+            serializer.dumpb(
                 {
                     'id': order_id,
                     'type': 'order',
@@ -51,17 +52,14 @@ class BaseOrderService:
                 }
             )
         )
-        await redis_server_data.delete(self._key(order_id))
-
-    async def process(self, order_dict: dict, trigger_data: dict) -> bool:
-        order = OrderSchema.model_validate(order_dict)
-        kline = KlineUpdate.model_validate(trigger_data)
 
+    async def process(self, order: ItemRecord, tick: Tick) -> bool:
+        """order — ItemRecord хендлера: тело уже проверено OrderSchema при добавлении в очередь"""
         if order.category == "option":
-            return await self._handle_option(order, kline)
+            return await self._handle_option(order, tick)
 
         elif order.category == "spot":
-            return await self._handle_spot(order, kline)
+            return await self._handle_spot(order, tick)
 
         logger.error(f"[SKIP] Неизвестная категория: {order.category}")
         return False
@@ -73,28 +71,31 @@ class BaseOrderService:
             f"extremum:order:{pos_uuid}:MAX",
         ]
 
-        results = await redis_server.mget(keys)
+        # сначала память (ExtremumTracker), затем ещё не отправленные записи, затем Redis
+        results = [extremum_tracker.get(key) for key in keys]
+        if None in results:
+            stored = await redis_server.mget(keys)
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    found, raw = write_batch.pending(redis_server, key)
+                    results[i] = raw if found else stored[i]
 
         def parse(val):
             try:
-                return float(json.loads(val)["value"]) if val else None
+                return float(serializer.loads(val)["value"]) if val else None
             except:
                 return None
 
         return parse(results[0]), parse(results[1])
 
     async def _update_extremum(self, order_uuid: str, kind: str, value: float):
-        key = f"extremum:order:{order_uuid}:{kind}"
-        data = {
-            "value": value,
-            "dt": datetime.now(UTC).strftime("%d-%m-%Y %H:%M:%S"),
-        }
-        await redis_server.set(key, json.dumps(data))
+        """Запись в Redis отложенная — ExtremumTracker"""
+        extremum_tracker.update(extremum_tracker.key("order", order_uuid, kind), value)
 
     async def _create_initial_extremums(self, uuid: str, price: float):
         await self._update_extremum(uuid, "MIN", price)
         await self._update_extremum(uuid, "MAX", price)
 
     # must be overridden
-    async def _handle_option(self, order, kline): raise NotImplementedError
-    async def _handle_spot(self, order, kline): raise NotImplementedError
+    async def _handle_option(self, order, tick): raise NotImplementedError
+    async def _handle_spot(self, order, tick): raise NotImplementedError
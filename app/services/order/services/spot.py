@@ -1,12 +1,13 @@
 # ==============================================================
 # СПОТ
 # ==============================================================
-from API.schemas.order import OrderSchema
+from app.core.records import ItemRecord
+from app.schemas.kline import Tick
 from app.services.order.services.order_service import BaseOrderService
 
 
 class SpotOrderService(BaseOrderService):
-    async def _handle_spot(self, order: OrderSchema, current_price: float) -> bool:
+    async def _handle_spot(self, order: ItemRecord, tick: Tick) -> bool:
         """
         Обработка спотовой позиции.
         Пока реализуем как заглушку.
@@ -1,6 +1,9 @@
 # app/services/position/router.py
 import logging
 
+from app.core.records import ItemRecord
+from app.schemas.kline import Tick
+
 from app.services.position.services.option import OptionPositionService
 from app.services.position.services.spot import SpotPositionService
 
@@ -12,14 +15,27 @@ class PositionRouter:
         self.option_service = OptionPositionService()
         self.spot_service = SpotPositionService()
 
-    async def process(self, position_dict: dict, trigger_data: dict) -> bool:
-        category = position_dict.get("category")
-        logger.info(f"[Router] Категория: {category} | position_dict: {position_dict}")
+    async def process(self, position: ItemRecord, tick: Tick) -> bool:
+        if not position.valid:
+            logger.error(f"[Router] Позиция не прошла схему {position.uuid}: {position.error}")
+            return False
+        category = position.category
+        logger.info(f"[Router] Категория: {category} | position: {position}")
 
         if category == "option":
-            return await self.option_service.process(position_dict, trigger_data)
+            return await self.option_service.process(position, tick)
         elif category == "spot":
-            return await self.spot_service.process(position_dict, trigger_data)
+            return await self.spot_service.process(position, tick)
         else:
-            logger.error(f"[Router] Неизвестная категория: {category} | position_dict: {position_dict}")
+            logger.error(f"[Router] Неизвестная категория: {category} | position: {position}")
             return False
+
+    async def get_state(self, position: ItemRecord) -> dict | None:
+        """Запись позиции в мониторинге (Redis), None — ещё не принята"""
+        if position.category != "option":
+            return None
+        return await self.option_service.get_position(position.id)
+
+    async def expire(self, position: ItemRecord) -> bool:
+        """Отмена позиции по сроку жизни"""
+        return await self.option_service.cancel_expired(position)
@@ -1,60 +1,23 @@
 # ==============================================================
 # ФЬЮЧЕРСЫ / ОПЦИОНЫ
 # ==============================================================
-import datetime
 import logging
-from typing import Union
 
 from API.position import api_get_position, api_change_status_position
-from API.schemas.position import PositionSchema
+from app.core.records import ItemRecord
 
-from app.schemas.kline import KlineUpdate
+from app.schemas.kline import Tick
+from app.services.rules import entry_touched, extremum_breach
 from app.services.position.services.position_service import BasePositionService
-from conf.conf_redis import redis_server_settings
-
-from cachetools import TTLCache, cached
 
 
 logger = logging.getLogger(__name__)
 
-cache_life_time_value = TTLCache(maxsize=100, ttl=5)
-
-@cached(cache=cache_life_time_value)
-def get_cached_life_time_value() -> int:
-    time = redis_server_settings.get('settings:position-lifetime-seconds')
-    if not time:
-        return 5
-    else:
-        return int(time)
-
-async def dt_lifetime_position_expire(position: PositionSchema) -> bool:
-    # created_at приходит в формате ISO: "2025-11-21T05:19:13.852Z"
-    created_str: str = position.created_at
-    # Парсим дату
-    created_dt = datetime.datetime.fromisoformat(created_str.replace("Z", "+00:00"))
-    # Берём TTL в секундах (например, 60)
-    ttl_seconds = get_cached_life_time_value()
-    # Время истечения
-    expires_at = created_dt + datetime.timedelta(seconds=ttl_seconds)
-    # Текущее время
-    now = datetime.datetime.now(datetime.UTC)
-    # Если текущее время >= истечения — просрочено
-    if now >= expires_at:
-        return True
-    return False
 
 class OptionPositionService(BasePositionService):
-    async def _handle_option(self, position: PositionSchema, kline: KlineUpdate) -> bool:
-        current_price = float(kline.data.data.c)
-        if await dt_lifetime_position_expire(position):
-            result_accept = await api_change_status_position(
-                uuid=position.uuid,
-                status='cancel'
-            )
-            print(result_accept)
-            if not result_accept:
-                return False
-            return True
+    async def _handle_option(self, position: ItemRecord, tick: Tick) -> bool:
+        # срок жизни проверяет LifetimeScheduler (PositionTrigger.expire), не каждая свеча
+        current_price = tick.close
         if not await self.has_position(position.id):
             api_position = await api_get_position(uuid=position.uuid)
             if api_position is None:
@@ -68,21 +31,29 @@ class OptionPositionService(BasePositionService):
             )
             if not result_accept:
                 return False
-            await self._add_new_option_position(position, kline)
+            await self._add_new_option_position(position, tick)
             return False
 
         await self._update_option_extremums(position.id, current_price)
-        result = await self.calculation(position, kline)
+        result = await self.calculation(position, tick)
         return result
 
-    async def _add_new_option_position(self, position: PositionSchema, kline: KlineUpdate):
+    async def cancel_expired(self, position: ItemRecord) -> bool:
+        """Истёк срок жизни позиции → отмена"""
+        result_accept = await api_change_status_position(
+            uuid=position.uuid,
+            status='cancel'
+        )
+        logger.info(f'[Lifetime] Отмена по сроку жизни {position.uuid}: {result_accept}')
+        return bool(result_accept)
+
+    async def _add_new_option_position(self, position: ItemRecord, tick: Tick):
         pos_uuid = position.uuid
         min_val, max_val = await self._load_existing_extremums(pos_uuid)
 
-        kline_data = kline.data.data
-        market_min = float(kline_data.l)
-        market_max = float(kline_data.h)
-        market_close = float(kline_data.c)
+        market_min = tick.low
+        market_max = tick.high
+        market_close = tick.close
 
         if min_val is None or max_val is None:
             min_val = market_min
@@ -99,7 +70,7 @@ class OptionPositionService(BasePositionService):
             "uuid": pos_uuid,
             "symbol": position.symbol_name,
             "side": position.side,
-            "price_entry": float(position.price),
+            "price_entry": position.price,
             "max_price": float(max_val),
             "min_price": float(min_val),
         })
@@ -113,13 +84,14 @@ class OptionPositionService(BasePositionService):
             return
         pos_uuid = pos["uuid"]
         updated = False
+        new_max, new_min = extremum_breach(pos["max_price"], pos["min_price"], current_price)
 
-        if current_price > pos["max_price"]:
+        if new_max:
             pos["max_price"] = current_price
             await self._update_extremum(pos_uuid, "MAX", current_price)
             updated = True
 
-        if current_price < pos["min_price"]:
+        if new_min:
             pos["min_price"] = current_price
             await self._update_extremum(pos_uuid, "MIN", current_price)
             updated = True
@@ -133,8 +105,8 @@ class OptionPositionService(BasePositionService):
 
     async def calculation(
             self,
-            position: PositionSchema,
-            kline: KlineUpdate
+            position: ItemRecord,
+            tick: Tick
     ) -> bool:
         """
         Проверяет, достигла ли цена уровня входа.
@@ -144,12 +116,12 @@ class OptionPositionService(BasePositionService):
 
         # Извлекаем нужные данные
         try:
-            price = float(position.price)
-            low = float(kline.data.data.l)
-            high = float(kline.data.data.h)
-            ts = str(kline.data.data.ts)
+            price = position.price
+            low = tick.low
+            high = tick.high
+            ts = str(tick.ts)
         except (AttributeError, ValueError, TypeError) as e:
-            logger.error(f'Ошибка в данных для расчёта: {e}, position={position}, kline={kline}')
+            logger.error(f'Ошибка в данных для расчёта: {e}, position={position}, tick={tick}')
             return False
 
         # Если уже закрыта или завершена — не трогаем
@@ -157,20 +129,9 @@ class OptionPositionService(BasePositionService):
             logger.debug(f'Пропуск: позиция уже завершена {position.uuid}')
             return False
 
-        # Проверяем условия входа
-        entered = False
-        side = position.side.lower()
-
-        # Для покупки: цена входа попадает в диапазон свечи
-        if side == 'buy' and low <= price <= high:
-            entered = True
-
-        # Для продажи: то же, диапазон свечи "задел" цену входа
-        elif side == 'sell' and low <= price <= high:
-            entered = True
-
+        # Проверяем условия входа: диапазон свечи "задел" цену входа (buy и sell)
         # Если условие сработало — обновляем статус
-        if entered:
+        if entry_touched(position.side, price, low, high):
             logger.info(f'Сделка открыта: {position.symbol_name} ({position.side.upper()}) '
                         f'по цене {price}, UUID={position.uuid}')
             try:
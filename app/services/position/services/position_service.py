@@ -1,27 +1,27 @@
-import json
 from datetime import datetime, UTC
 
 
-from API.schemas.position import PositionSchema
-from app.schemas.kline import KlineUpdate
+from app.core.extremum_tracker import extremum_tracker
+from app.core.records import ItemRecord
+from app.core.redis_batch import write_batch
+from app.core.state_mirror import position_mirror
+from app.schemas.kline import Tick
+from conf import serializer
 from conf.conf_redis import redis_server_data, redis_server
 
 
 class BasePositionService:
-    # ключ
-    @staticmethod
-    def _key(pos_id: int) -> str:
-        return f"position:{pos_id}"
-
     async def get_position(self, pos_id: int) -> dict | None:
-        raw = await redis_server_data.get(self._key(pos_id))
-        return json.loads(raw) if raw else None
+        return position_mirror.get(pos_id)
 
     async def set_position(self, pos_id: int, data: dict):
+        """Состояние (копия в памяти + Redis) и PUBLISH уходят пачкой в конце свечи (write_batch)"""
         data['dt'] = str(datetime.now(UTC))
-        await redis_server_data.publish(
+        position_mirror.set(pos_id, data)
+        write_batch.publish(
+            redis_server_data,
             'MONITORING',
-            json.dumps(
+            serializer.dumpb(
                 {
                     'id': pos_id,
                     'type': 'position',
@@ -30,20 +30,17 @@ class BasePositionService:
                 }
             )
         )
-        await redis_server_data.set(self._key(pos_id), json.dumps(data))
 
     async def has_position(self, pos_id: int) -> bool:
-        return await redis_server_data.exists(self._key(pos_id)) > 0
-
-    async def process(self, position_dict: dict, trigger_data: dict) -> bool:
-        position = PositionSchema.model_validate(position_dict)
-        kline = KlineUpdate.model_validate(trigger_data)
+        return position_mirror.has(pos_id)
 
+    async def process(self, position: ItemRecord, tick: Tick) -> bool:
+        """position — ItemRecord хендлера: тело уже проверено PositionSchema при добавлении в очередь"""
         if position.category == "option":
-            return await self._handle_option(position, kline)
+            return await self._handle_option(position, tick)
 
         elif position.category == "spot":
-            return await self._handle_spot(position, kline)
+            return await self._handle_spot(position, tick)
 
         print(f"[SKIP] Неизвестная категория: {position.category}")
         return False
@@ -55,28 +52,31 @@ class BasePositionService:
             f"extremum:position:{pos_uuid}:MAX"
         ]
 
-        results = await redis_server.mget(keys)
+        # сначала память (ExtremumTracker), затем ещё не отправленные записи, затем Redis
+        results = [extremum_tracker.get(key) for key in keys]
+        if None in results:
+            stored = await redis_server.mget(keys)
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    found, raw = write_batch.pending(redis_server, key)
+                    results[i] = raw if found else stored[i]
 
         def parse(val):
             try:
-                return float(json.loads(val)["value"]) if val else None
+                return float(serializer.loads(val)["value"]) if val else None
             except:
                 return None
 
         return parse(results[0]), parse(results[1])
 
     async def _update_extremum(self, pos_uuid: str, kind: str, value: float):
-        key = f"extremum:position:{pos_uuid}:{kind}"
-        data = {
-            "value": value,
-            "dt": datetime.now(UTC).strftime("%d-%m-%Y %H:%M:%S"),
-        }
-        await redis_server.set(key, json.dumps(data))
+        """Запись в Redis отложенная — ExtremumTracker"""
+        extremum_tracker.update(extremum_tracker.key("position", pos_uuid, kind), value)
 
     async def _create_initial_extremums(self, pos_uuid: str, price: float):
         await self._update_extremum(pos_uuid, "MIN", price)
         await self._update_extremum(pos_uuid, "MAX", price)
 
     # must be overridden
-    async def _handle_option(self, p, k): raise NotImplementedError
-    async def _handle_spot(self, p, k): raise NotImplementedError
+    async def _handle_option(self, p, tick): raise NotImplementedError
+    async def _handle_spot(self, p, tick): raise NotImplementedError
@@ -1,12 +1,13 @@
 # ==============================================================
 # СПОТ
 # ==============================================================
-from API.schemas.position import PositionSchema
+from app.core.records import ItemRecord
+from app.schemas.kline import Tick
 from app.services.position.services.position_service import BasePositionService
 
 
 class SpotPositionService(BasePositionService):
-    async def _handle_spot(self, position: PositionSchema, current_price: float) -> bool:
+    async def _handle_spot(self, position: ItemRecord, tick: Tick) -> bool:
         """
         Обработка спотовой позиции.
         Пока реализуем как заглушку.
@@ -0,0 +1,30 @@
+# ==============================================================
+# ПРАВИЛА СРАБАТЫВАНИЯ (скалярная эталонная реализация)
+# ==============================================================
+# Используются сервисами при обработке элемента и векторным движком
+# (app/core/batch_engine.py) для сверки результатов.
+from decimal import Decimal
+
+
+def entry_touched(side: str, price: float, low: float, high: float) -> bool:
+    """Позиция: диапазон свечи задел цену входа"""
+    side = side.lower()
+    if side == 'buy' and low <= price <= high:
+        return True
+    if side == 'sell' and low <= price <= high:
+        return True
+    return False
+
+
+def target_reached(side: str, target_rate: Decimal, current_price: Decimal) -> bool:
+    """Ордер: курс достиг target_rate (buy — снизу вверх, sell — сверху вниз)"""
+    if side == 'buy':
+        return current_price >= target_rate
+    if side == 'sell':
+        return current_price <= target_rate
+    return False
+
+
+def extremum_breach(max_price: float, min_price: float, current_price: float) -> tuple[bool, bool]:
+    """(новый MAX, новый MIN) для текущей цены"""
+    return current_price > max_price, current_price < min_price
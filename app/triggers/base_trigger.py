@@ -1,10 +1,72 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from API.batch import batch_client
+from app.core.leader import leader_lease
+from app.core.message_store import message_key
+from conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+
 class BaseTrigger:
     """Базовый триггер для Redis PubSub"""
     channel_name = None  # имя канала Redis
+    target_queue = None  # очередь хендлера, к которому привязан триггер (app.core.registry)
 
     def __init__(self, handler):
         self.handler = handler
+        # сколько элементов обрабатывается одновременно (1 — строго последовательно)
+        self.concurrency = max(1, settings.TRIGGER_CONCURRENCY)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._item_locks: dict = {}  # uuid → [Lock, число ожидающих]
 
-    async def handle(self, trigger_data):
+    async def handle(self, tick):
+        """tick — app.schemas.kline.Tick, разобранный один раз в RedisListener"""
         # raise NotImplementedError
-        pass
\ No newline at end of file
+        pass
+
+    async def start(self):
+        """Фоновые задачи триггера (таймеры и т.п.), запускаются из main"""
+        pass
+
+    @asynccontextmanager
+    async def item_lock(self, key):
+        """Один uuid обрабатывается строго по очереди: свеча, таймер, перекрывающиеся handle"""
+        entry = self._item_locks.get(key)
+        if entry is None:
+            entry = self._item_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._item_locks[key]
+
+    async def process_items(self, items: list, worker):
+        """
+        Вызывает worker(item) для каждого элемента.
+        Не больше concurrency одновременно, порядок внутри одного uuid сохраняется.
+        Элемент, удалённый из хендлера пока ждал своей очереди, пропускается.
+        Без аренды лидера (режим резерва) элементы не обрабатываются.
+        """
+        async def run(item):
+            key = message_key(item)
+            async with self.item_lock(key):
+                if self.handler.messages.get(key) is not item or not leader_lease.is_leader:
+                    return
+                async with self._semaphore:
+                    try:
+                        with batch_client.worker():  # bulk смен статуса не ждёт linger, если ждать некого
+                            await worker(item)
+                    except Exception as e:
+                        logger.error(f"[Trigger:{self.__class__.__name__}] Ошибка обработки {key}: {e}")
+
+        if self.concurrency == 1:
+            for item in items:
+                await run(item)
+        else:
+            await asyncio.gather(*(run(item) for item in items))
@@ -1,63 +1,78 @@
-import json
 import logging
 
+from app.core.extremum_tracker import extremum_tracker
+from app.core.records import ItemRecord
+from app.core.redis_batch import write_batch
+from app.core.registry import register_trigger
+from app.core.state_mirror import order_mirror
+from app.schemas.kline import Tick
 from app.services.order.router import OrderRouter
 from app.triggers.base_trigger import BaseTrigger
+from conf import serializer
 from conf.conf_redis import redis_server_data
 
 logger = logging.getLogger(__name__)
 
 
+@register_trigger
 class OrderTrigger(BaseTrigger):
-    channel_name = "kline:BTCUSDT"
+    channel_name = "kline:{symbol}"  # подписка только на символы с открытыми элементами
     target_queue = "queue_monitoring_order"  # ← вот это важно!
 
     def __init__(self, handler):
         super().__init__(handler)
         self.service = OrderRouter()
 
-    async def handle(self, trigger_data):
-        if not self.handler.messages:
-            logger.info("[Trigger:Order] Очередь пуста")
+    async def handle(self, tick: Tick):
+        symbol = tick.symbol
+        if not self.handler.has_symbol(symbol):
+            logger.info(f"[Trigger:Order] Очередь {symbol} пуста")
             return
 
-        iterations = len(self.handler)
-        logger.info(f"[Trigger:Order] Обрабатываю {iterations} сообщений")
-
-        for _ in range(iterations):
-            item = await self.handler.next_message()
-            if not item:
-                break
-            msg = item["msg"]
-            body = item["body"]
-            if isinstance(body, str):
-                try:
-                    body = json.loads(body)
-                except Exception:
-                    pass
-
-            try:
-                result = await self.service.process(body, trigger_data)
-            except Exception as e:
-                logger.error(f"[Trigger:Order] Ошибка обработчика: {e}")
-                result = False
-
-            if result:
-                logger.info(f"[Trigger:Order] ✅ Удаляю {body.get('uuid')}")
-                await self.handler.remove_message(item)
-
-                await redis_server_data.publish(
-                    'MONITORING',
-                    json.dumps(
-                        {
-                            'id': body.get('id'),
-                            'type': 'order',
-                            'method': 'delete',
-                        }
-                    )
+        # 🔹 выбираем только ордера, чей target_rate пересечён (+ приём в мониторинг и экстремумы)
+        items = await self.handler.select_messages(symbol, tick.close, tick.low, tick.high)
+        logger.info(f"[Trigger:Order] {symbol}: обрабатываю {len(items)} из {self.handler.count_symbol(symbol)} сообщений")
+
+        await self.process_items(items, lambda item: self._process_item(item, tick))
+        await write_batch.flush()
+
+    async def _process_item(self, item: ItemRecord, tick: Tick):
+        try:
+            result = await self.service.process(item, tick)
+        except Exception as e:
+            logger.error(f"[Trigger:Order] Ошибка обработчика: {e}")
+            result = False
+
+        if result:
+            logger.info(f"[Trigger:Order] ✅ Удаляю {item.uuid}")
+            await self.handler.remove_message(item)
+
+            order_mirror.delete(item.id)
+            extremum_tracker.release("order", item.uuid)
+            write_batch.publish(
+                redis_server_data,
+                'MONITORING',
+                serializer.dumpb(
+                    {
+                        'id': item.id,
+                        'type': 'order',
+                        'method': 'delete',
+                    }
                 )
-                await redis_server_data.delete('order:' + str(body.get('id')))
+            )
 
-            else:
-                logger.info(f"[Trigger:Order] ⏳ Ещё не готово → в конец {body.get('uuid')}")
-                await self.handler.requeue_message(item)
+        else:
+            logger.info(f"[Trigger:Order] ⏳ Ещё не готово {item.uuid}")
+            await self._admit(item)
+
+    async def _admit(self, item: ItemRecord):
+        """Ордер принят в мониторинг → переносим его в книгу target_rate"""
+        if not item.valid or await self.handler.is_admitted(item):
+            return
+        try:
+            state = await self.service.get_state(item)
+        except Exception as e:
+            logger.error(f"[Trigger:Order] Ошибка чтения состояния {item.uuid}: {e}")
+            return
+        if state and await self.handler.admit_message(item, state):
+            logger.info(f"[Trigger:Order] 📌 В книге {item.uuid}")
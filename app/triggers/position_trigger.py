@@ -1,26 +1,62 @@
-import json
 import logging
 
+from app.core.extremum_tracker import extremum_tracker
+from app.core.leader import leader_lease
+from app.core.message_store import message_key
+from app.core.records import ItemRecord
+from app.core.redis_batch import write_batch
+from app.core.registry import register_trigger
+from app.core.state_mirror import position_mirror
+from app.schemas.kline import Tick
 from app.services.position.router import PositionRouter
 from app.triggers.base_trigger import BaseTrigger
+from conf import serializer
 from conf.conf_redis import redis_server_data
 
 logger = logging.getLogger(__name__)
 
 
+@register_trigger
 class PositionTrigger(BaseTrigger):
-    channel_name = "kline:BTCUSDT"
+    channel_name = "kline:{symbol}"  # подписка только на символы с открытыми элементами
     target_queue = "queue_monitoring_position"
 
     def __init__(self, handler):
         super().__init__(handler)
         self.service = PositionRouter()
 
-    async def delete(self, _id, item):
+    async def start(self):
+        """Таймер срока жизни позиций"""
+        await self.handler.lifetime.run(self.expire)
+
+    async def expire(self, key) -> bool:
+        """
+        Дедлайн позиции наступил → отмена статусом cancel.
+        True — позиция отменена/уже удалена, False — повторить позже.
+        """
+        async with self.item_lock(key):
+            if not leader_lease.is_leader:
+                return False
+            item = self.handler.messages.get(key)
+            if item is None:
+                return True
+            return await self._expire_item(key, item)
+
+    async def _expire_item(self, key, item: ItemRecord) -> bool:
+        if not await self.service.expire(item):
+            return False
+        logger.info(f"[Trigger:Position] ⌛ Срок жизни истёк, удаляю {key}")
+        await self.delete(item.id, item)
+        return True
+
+    async def delete(self, _id, item: ItemRecord):
         await self.handler.remove_message(item)
-        await redis_server_data.publish(
+        position_mirror.delete(_id)
+        extremum_tracker.release("position", item.uuid)
+        write_batch.publish(
+            redis_server_data,
             'MONITORING',
-            json.dumps(
+            serializer.dumpb(
                 {
                     'id': _id,
                     'type': 'position',
@@ -28,40 +64,50 @@ class PositionTrigger(BaseTrigger):
                 }
             )
         )
-        await redis_server_data.delete('position:' + str(_id))
 
 
-    async def handle(self, trigger_data):
-        if not self.handler.messages:
-            logger.info("[Trigger:Position] Очередь пуста")
+    async def handle(self, tick: Tick):
+        symbol = tick.symbol
+        if not self.handler.has_symbol(symbol):
+            logger.info(f"[Trigger:Position] Очередь {symbol} пуста")
+            return
+
+        # 🔹 выбираем только позиции, которые свеча затронула (+ приём в мониторинг)
+        items = await self.handler.select_messages(symbol, tick.close, tick.low, tick.high)
+        logger.info(f"[Trigger:Position] {symbol}: обрабатываю {len(items)} из {self.handler.count_symbol(symbol)} сообщений")
+
+        await self.process_items(items, lambda item: self._process_item(item, tick))
+        await write_batch.flush()
+
+    async def _process_item(self, item: ItemRecord, tick: Tick):
+        key = message_key(item)
+        if self.handler.lifetime.is_expired(key):
+            # срок жизни важнее входа — отменяем, не дожидаясь таймера
+            await self._expire_item(key, item)
             return
 
-        iterations = len(self.handler)
-        logger.info(f"[Trigger:Position] Обрабатываю {iterations} сообщений")
-
-        for _ in range(iterations):
-            item = await self.handler.next_message()
-            if not item:
-                break
-            msg = item["msg"]
-            body = item["body"]
-
-            if isinstance(body, str):
-                try:
-                    body = json.loads(body)
-                except Exception:
-                    pass
-
-            try:
-                result = await self.service.process(body, trigger_data)
-            except Exception as e:
-                logger.error(f"[Trigger:Position] Ошибка обработчика: {e}")
-                result = False
-
-            if result:
-                logger.info(f"[Trigger:Position] ✅ Удаляю {body.get('uuid')}")
-                await self.delete(body.get('id'), item)
-
-            else:
-                logger.info(f"[Trigger:Position] ⏳ Ещё не готово → в конец {body.get('uuid')}")
-                await self.handler.requeue_message(item)
+        try:
+            result = await self.service.process(item, tick)
+        except Exception as e:
+            logger.error(f"[Trigger:Position] Ошибка обработчика: {e}")
+            result = False
+
+        if result:
+            logger.info(f"[Trigger:Position] ✅ Удаляю {item.uuid}")
+            await self.delete(item.id, item)
+
+        else:
+            logger.info(f"[Trigger:Position] ⏳ Ещё не готово {item.uuid}")
+            await self._admit(item)
+
+    async def _admit(self, item: ItemRecord):
+        """Позиция принята в мониторинг → переносим её в индекс цены входа"""
+        if not item.valid or await self.handler.is_admitted(item):
+            return
+        try:
+            state = await self.service.get_state(item)
+        except Exception as e:
+            logger.error(f"[Trigger:Position] Ошибка чтения состояния {item.uuid}: {e}")
+            return
+        if state and await self.handler.admit_message(item, state):
+            logger.info(f"[Trigger:Position] 📌 В индексе {item.uuid}")
@@ -0,0 +1,72 @@
+"""
+Пачки RabbitMQ против подтверждения каждого сообщения: пропускная способность консьюмера
+против подмены брокера (tests/standins.py) — без сети, поэтому видна только наша сторона:
+разбор тел, захват lock хендлера, число ack-кадров.
+
+До: batch_size=0 — handler.add_message и message.ack() на каждую доставку.
+После: batch_size=N — handler.bulk_add пачкой и один ack(multiple=True) на пачку.
+
+    python -m benchmarks.bench_rabbit_batch [--messages 20000] [--batch 0 64 256] [--prefetch 256]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import aio_pika
+
+from app.core.rabbitmq_consumer import RabbitMQConsumer
+from app.handlers.base_handler import BaseHandler
+from benchmarks.bench_records import order_body
+from conf import serializer
+from tests.standins import StandInBroker
+
+QUEUE = "queue_monitoring_order"
+
+
+async def run(messages: int, batch_size: int, prefetch: int) -> tuple[float, StandInBroker]:
+    broker = StandInBroker()
+    aio_pika.connect_robust = broker.connect_robust
+    rng = random.Random(1)
+    bodies = [serializer.dumpb(order_body(rng, n)) for n in range(messages)]
+
+    handler = BaseHandler()
+    rabbit = RabbitMQConsumer("amqp://stand-in", prefetch=prefetch, batch_size=batch_size)
+    await rabbit.connect()
+    rabbit.register_callback(QUEUE, handler.add_message, handler.bulk_add)
+    await rabbit.start([QUEUE])
+
+    started = time.perf_counter()
+    for body in bodies:
+        broker.publish(QUEUE, body)
+    while len(handler) < messages or not broker.idle():
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    await rabbit.close()
+    return elapsed, broker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[0, 64, 256], help="0 — по одному сообщению")
+    parser.add_argument("--prefetch", type=int, default=256)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # лог на каждое сообщение измерял бы логгер, а не консьюмер
+
+    print(f"{args.messages} сообщений, prefetch={args.prefetch}")
+    baseline = None
+    for batch_size in args.batch:
+        elapsed, broker = asyncio.run(run(args.messages, batch_size, args.prefetch))
+        rate = args.messages / elapsed
+        baseline = baseline or rate
+        mode = f"batch={batch_size}" if batch_size else "по одному"
+        print(
+            f"{mode:<12} {rate:>10.0f} msg/s   ×{rate / baseline:.2f}   "
+            f"ack-кадров: {broker.ack_calls} (подтверждено {broker.acked})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+ItemRecord против сырых {"msg", "body"}: память на элемент и CPU на свечу при 10k элементах.
+
+До: элемент — dict с телом, на каждой свече для каждого элемента isinstance(body, str),
+OrderSchema / PositionSchema.model_validate, float(price) / Decimal(target_rate) и правило.
+После: тело проверено один раз в ItemRecord.build, на свече — только правило по готовым полям.
+
+    python -m benchmarks.bench_records [--items 10000] [--ticks 20]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from API.schemas.order import OrderSchema
+from API.schemas.position import PositionSchema
+from app.core.records import ItemRecord
+from app.services.rules import entry_touched, target_reached
+
+
+def order_body(rng: random.Random, n: int) -> dict:
+    return {
+        "id": n, "uuid": str(uuid.UUID(int=rng.getrandbits(128))), "symbol_name": "BTCUSDT",
+        "status": "accept_monitoring", "category": "option", "side": rng.choice(("buy", "sell")),
+        "qty_tokens": "0.01", "price": f"{rng.uniform(90000, 110000):.2f}", "accumulated_funding": "0",
+        "target_rate": f"{rng.uniform(90000, 110000):.2f}", "created_at": "2025-11-21T05:19:13.852Z",
+    }
+
+
+def position_body(rng: random.Random, n: int) -> dict:
+    return {
+        "id": n, "uuid": str(uuid.UUID(int=rng.getrandbits(128))), "symbol_name": "BTCUSDT",
+        "status": "accept_monitoring", "category": "option", "side": rng.choice(("buy", "sell")),
+        "qty_tokens": "0.01", "price": f"{rng.uniform(90000, 110000):.2f}", "is_test": False,
+        "created_at": "2025-11-21T05:19:13.852Z",
+    }
+
+
+# ---------- до: проверка схемы на каждой свече ----------
+def tick_before_orders(items: list[dict], close: float) -> int:
+    hits = 0
+    current_price = Decimal(close)
+    for item in items:
+        body = item["body"]
+        if isinstance(body, str):
+            continue
+        order = OrderSchema.model_validate(body)
+        hits += target_reached(order.side, Decimal(order.target_rate), current_price)
+    return hits
+
+
+def tick_before_positions(items: list[dict], low: float, high: float) -> int:
+    hits = 0
+    for item in items:
+        body = item["body"]
+        if isinstance(body, str):
+            continue
+        position = PositionSchema.model_validate(body)
+        hits += entry_touched(position.side, float(position.price), low, high)
+    return hits
+
+
+# ---------- после: готовые поля записи ----------
+def tick_after_orders(records: list[ItemRecord], close: float) -> int:
+    current_price = Decimal(close)
+    return sum(target_reached(r.side, r.target_rate, current_price) for r in records)
+
+
+def tick_after_positions(records: list[ItemRecord], low: float, high: float) -> int:
+    return sum(entry_touched(r.side, r.price, low, high) for r in records)
+
+
+def measure_memory(build, bodies: list[dict]) -> tuple[list, float]:
+    """Байт на элемент сверх самих тел (тела нужны в обоих вариантах — журнал, лента резерва)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(body) for body in bodies]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return items, (after - before) / len(bodies)
+
+
+def measure_cpu(tick, ticks: int) -> float:
+    """Среднее время свечи, мс"""
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (time.perf_counter() - started) / ticks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{args.items} элементов, {args.ticks} свечей (все элементы выбраны — худший случай)\n")
+    print(f"{'':<10} {'вариант':<8} {'байт/элемент':>13} {'мс/свеча':>10}")
+    for kind, make_body, schema in (("order", order_body, OrderSchema), ("position", position_body, PositionSchema)):
+        bodies = [make_body(rng, n) for n in range(args.items)]
+        raw, raw_bytes = measure_memory(lambda body: {"msg": None, "body": body}, bodies)
+        records, record_bytes = measure_memory(lambda body: ItemRecord.build(None, body, schema), bodies)
+        assert all(r.valid for r in records)
+
+        if kind == "order":
+            before = measure_cpu(lambda: tick_before_orders(raw, 100000.0), args.ticks)
+            after = measure_cpu(lambda: tick_after_orders(records, 100000.0), args.ticks)
+        else:
+            before = measure_cpu(lambda: tick_before_positions(raw, 99000.0, 101000.0), args.ticks)
+            after = measure_cpu(lambda: tick_after_positions(records, 99000.0, 101000.0), args.ticks)
+
+        print(f"{kind:<10} {'до':<8} {raw_bytes:>13.0f} {before:>10.2f}")
+        print(f"{kind:<10} {'после':<8} {record_bytes:>13.0f} {after:>10.2f}   (×{before / after:.1f} быстрее)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Микробенчмарк JSON на границах процесса: json (как было — .decode() + json.loads / json.dumps)
+против движков conf.serializer (json из bytes, orjson, msgspec) и msgspec-структур свечи.
+
+- rabbit   — тело сообщения очереди ордеров, bytes → dict
+- kline    — сообщение Redis kline:{symbol}, bytes → Tick (dict + pydantic либо msgspec-структуры)
+- publish  — состояние MONITORING, dict → bytes
+- api      — страница ListOpen на 1000 элементов, bytes → list
+
+    python -m benchmarks.bench_serializer [--seconds 0.3]
+"""
+import argparse
+import json
+import time
+
+from app.schemas.kline import Tick
+from conf.serializer import msgspec, orjson
+
+ORDER = {
+    "id": 1234, "uuid": "5f0c7a52-6a47-4d8e-9d10-8a3f1c9b2e77", "symbol_name": "BTCUSDT",
+    "status": "accept_monitoring", "category": "option", "side": "buy", "qty_tokens": "0.01",
+    "price": "101234.50", "accumulated_funding": "0", "target_rate": "102500.00",
+    "created_at": "2025-11-21T05:19:13.852Z",
+}
+KLINE = {
+    "type": "kline_update",
+    "data": {
+        "symbol": "btcusdt", "interval": 1, "ex": "bybit",
+        "data": {"ts": 1732166353852, "o": 101200.5, "h": 101250.0, "l": 101190.1, "c": 101234.5,
+                 "v": 12.345, "t": 1249876.5, "dt": "2025-11-21 05:19:13"},
+    },
+}
+STATE = {
+    "id": 1234, "uuid": ORDER["uuid"], "symbol": "BTCUSDT", "side": "buy",
+    "price_entry": 101234.5, "max_price": 101300.0, "min_price": 101100.0,
+}
+PAGE = [dict(ORDER, id=n, uuid=f"{n:08d}-6a47-4d8e-9d10-8a3f1c9b2e77") for n in range(1000)]
+
+
+def decoders() -> dict:
+    found = {
+        "json (.decode)": lambda raw: json.loads(raw.decode()),
+        "json (bytes)": json.loads,
+    }
+    if orjson is not None:
+        found["orjson"] = orjson.loads
+    if msgspec is not None:
+        found["msgspec"] = msgspec.json.Decoder().decode
+    return found
+
+
+def encoders() -> dict:
+    found = {"json (.encode)": lambda obj: json.dumps(obj).encode()}
+    if orjson is not None:
+        found["orjson"] = orjson.dumps
+    if msgspec is not None:
+        found["msgspec"] = msgspec.json.Encoder().encode
+    return found
+
+
+def per_op_us(fn, arg, seconds: float) -> float:
+    """Среднее время вызова, мкс (повторяем, пока не наберётся seconds)"""
+    n = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(50):
+            fn(arg)
+        n += 50
+        now = time.perf_counter()
+        if now >= deadline:
+            return (now - started) / n * 1e6
+
+
+def report(boundary: str, cases: dict, arg, seconds: float):
+    results = {name: per_op_us(fn, arg, seconds) for name, fn in cases.items()}
+    baseline = next(iter(results.values()))
+    for name, us in results.items():
+        print(f"{boundary:<8} {name:<22} {us:>10.2f} мкс   ×{baseline / us:.2f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.3, help="время на каждый вариант")
+    args = parser.parse_args()
+
+    missing = [name for name, module in (("orjson", orjson), ("msgspec", msgspec)) if module is None]
+    if missing:
+        print(f"не установлены: {', '.join(missing)} (pip install '.[json]')\n")
+
+    report("rabbit", decoders(), json.dumps(ORDER).encode(), args.seconds)
+
+    kline = {name: (lambda raw, loads=loads: Tick.from_message(loads(raw))) for name, loads in decoders().items()}
+    if msgspec is not None:
+        kline["msgspec Struct → Tick"] = Tick.parse
+    report("kline", kline, json.dumps(KLINE).encode(), args.seconds)
+
+    report("publish", encoders(), STATE, args.seconds)
+    report("api", decoders(), json.dumps(PAGE).encode(), args.seconds)
+
+
+if __name__ == "__main__":
+    main()
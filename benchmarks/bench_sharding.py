@@ -0,0 +1,68 @@
+"""
+Пропускная способность общей очереди при N экземплярах MONITORING против подмены брокера
+(tests/standins.py): каждый экземпляр — шард, хендлер и консьюмер, как в main();
+доставка чужого элемента пересылается в очередь владельца {queue}@{owner}.
+
+Без сети видна только наша сторона: разбор, маршрутизация, пересылка и ack.
+
+    python -m benchmarks.bench_sharding [--messages 3000] [--nodes 1 3]
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+import aio_pika
+
+from app.core.partition import Partition
+from app.core.rabbitmq_consumer import RabbitMQConsumer
+from app.core.sharding import NodeShard, Placement
+from app.handlers.base_handler import BaseHandler
+from conf import serializer
+from tests.standins import StandInBroker
+
+QUEUE = "queue_monitoring_order"
+
+
+async def start_instance(node: str, nodes: list[str]) -> BaseHandler:
+    placement = Placement(Partition(), NodeShard(node, nodes))
+    handler = BaseHandler()
+    rabbit = RabbitMQConsumer("amqp://stand-in", router=placement.route)
+    await rabbit.connect()
+    queues = placement.queues(QUEUE)
+    for queue in queues:
+        rabbit.register_callback(queue, handler.add_message)
+    await rabbit.start(queues)
+    return handler
+
+
+async def run(messages: int, count: int) -> tuple[float, list[int]]:
+    broker = StandInBroker()
+    aio_pika.connect_robust = broker.connect_robust
+    nodes = [f"node-{n}" for n in range(count)]
+    handlers = [await start_instance(node, nodes) for node in nodes]
+    bodies = [serializer.dumpb({"uuid": str(uuid.UUID(int=n)), "symbol_name": "BTCUSDT"}) for n in range(messages)]
+
+    started = time.perf_counter()
+    for body in bodies:
+        broker.publish(QUEUE, body)
+    while sum(len(handler) for handler in handlers) < messages or not broker.idle():
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - started, [len(handler) for handler in handlers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=3000)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 3], help="число экземпляров")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # лог на каждое сообщение измерял бы логгер, а не маршрутизацию
+
+    for count in args.nodes:
+        elapsed, per_node = asyncio.run(run(args.messages, count))
+        print(f"{count} экземпляр(ов): {args.messages / elapsed:>8.0f} msg/s   по узлам {per_node}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import os
 
 from dotenv import load_dotenv
 from redis import asyncio as aioredis
-import redis
 
 from conf.config import settings
 
@@ -15,7 +14,7 @@ redis_server_data = aioredis.Redis(
     db=8,
 )
 
-redis_server_settings = redis.Redis(
+redis_server_settings_async = aioredis.Redis(
     host=settings.REDIS_HOST,
     port=settings.REDIS_PORT,
     password=settings.REDIS_PASSWORD,
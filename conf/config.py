@@ -9,37 +9,21 @@ import aiohttp
 
 from dotenv import load_dotenv
 
-from infisical_sdk import InfisicalSDKClient
+from conf.secrets import SecretLoader
 
 
 load_dotenv()
 
 
-
-# Инициализация клиента
-client = InfisicalSDKClient(
-    host=os.getenv('INFISICAL_HOST'),
-    token=os.getenv('INFISICAL_TOKEN'),
-    cache_ttl=300
+# Секреты Infisical: общие + проектные (проектные перезаписывают общие при совпадении ключей).
+# Рестарт берёт их из локального кэша, CONFIG_OFFLINE=1 — только переменные окружения
+secret_loader = SecretLoader(
+    ["shared-all", "monitoring"],
+    cache_path=os.getenv('SECRETS_CACHE_PATH', os.path.expanduser('~/.cache/monitoring/secrets.json')),
+    ttl=float(os.getenv('SECRETS_CACHE_TTL', 3600)),
+    offline=os.getenv('CONFIG_OFFLINE', '0') == '1',
 )
-
-
-def load_project_secrets(project_slug: str):
-    resp = client.secrets.list_secrets(
-        project_slug=project_slug,
-        environment_slug=os.getenv('ENVIRONMENT_SLUG'),
-        secret_path="/"
-    )
-    return {s['secretKey']: s['secretValue'] for s in resp.to_dict()['secrets']}
-
-# Загружаем общие секреты
-shared_secrets = load_project_secrets("shared-all")
-
-# Загружаем проектные секреты
-project_secrets = load_project_secrets("monitoring")
-
-# Объединяем: проектные перезаписывают общие при совпадении ключей
-all_secrets = {**shared_secrets, **project_secrets}
+all_secrets = secret_loader.load()
 
 # Добавляем в окружение
 os.environ.update(all_secrets)
@@ -57,6 +41,10 @@ class Settings:
     REDIS_PASSWORD: str = os.getenv('REDIS_PASSWORD')
 
     RABBITMQ_URL: str = os.getenv('RABBITMQ_URL')
+    # Пачки RabbitMQ: до N доставок в handler.bulk_add и один ack(multiple=True); 0 — по одному сообщению
+    RABBIT_BATCH_SIZE: int = int(os.getenv('RABBIT_BATCH_SIZE', '0'))
+    # Сколько ждать добора пачки (мс), прежде чем отдать неполную
+    RABBIT_BATCH_LINGER_MS: int = int(os.getenv('RABBIT_BATCH_LINGER_MS', '20'))
 
     INFISICAL_HOST: str = os.getenv('INFISICAL_HOST')
     INFISICAL_TOKEN: str = os.getenv('INFISICAL_TOKEN')
@@ -66,7 +54,69 @@ class Settings:
         "db": 0,
         "password": REDIS_PASSWORD,
     }
-    REDIS_CHANNELS = ["kline:BTCUSDT"]
+
+    # Режим выборки элементов на свече: index (bisect-индексы) | numpy (векторный движок)
+    EVAL_MODE: str = os.getenv('EVAL_MODE', 'index')
+    # Сверять векторный движок со скалярными правилами на каждой свече (отладка)
+    EVAL_PARITY_CHECK: bool = os.getenv('EVAL_PARITY_CHECK', '0') == '1'
+
+    # Сколько элементов триггер обрабатывает одновременно (1 — последовательно)
+    TRIGGER_CONCURRENCY: int = int(os.getenv('TRIGGER_CONCURRENCY', 1))
+    # Потолок одновременных запросов к API со всего процесса
+    API_MAX_IN_FLIGHT: int = int(os.getenv('API_MAX_IN_FLIGHT', 32))
+    # Пул соединений общего API-клиента (0 — без лимита на хост)
+    API_POOL_LIMIT: int = int(os.getenv('API_POOL_LIMIT', 100))
+    API_POOL_LIMIT_PER_HOST: int = int(os.getenv('API_POOL_LIMIT_PER_HOST', 0))
+    API_DNS_TTL: int = int(os.getenv('API_DNS_TTL', 300))
+    API_KEEPALIVE_TIMEOUT: float = float(os.getenv('API_KEEPALIVE_TIMEOUT', 30))
+    # Кэш api_get_order / api_get_position (секунды, записей)
+    API_CACHE_TTL: float = float(os.getenv('API_CACHE_TTL', 2))
+    API_CACHE_SIZE: int = int(os.getenv('API_CACHE_SIZE', 10000))
+    # Bulk-эндпоинт смен статуса / закрытий (например "/monitoring/bulk"); не задан — одиночные запросы
+    API_BULK_PATH: str | None = os.getenv('API_BULK_PATH')
+    API_BULK_LINGER_MS: int = int(os.getenv('API_BULK_LINGER_MS', 20))
+    API_BULK_MAX_SIZE: int = int(os.getenv('API_BULK_MAX_SIZE', 100))
+    # ListOpen страницами ?offset=&limit= (0 — одним запросом) и сколько страниц запрашивать одновременно
+    API_LIST_PAGE_SIZE: int = int(os.getenv('API_LIST_PAGE_SIZE', 0))
+    API_LIST_CONCURRENCY: int = int(os.getenv('API_LIST_CONCURRENCY', 4))
+
+    # Сверка копии order:/position: в памяти с Redis раз в N секунд (0 — выключено)
+    MIRROR_VERIFY_INTERVAL: float = float(os.getenv('MIRROR_VERIFY_INTERVAL', 0))
+    # Как часто экстремумы из памяти пишутся в Redis, секунды (0 — на каждое изменение)
+    EXTREMUM_FLUSH_INTERVAL: float = float(os.getenv('EXTREMUM_FLUSH_INTERVAL', 5))
+
+    # Режим нескольких процессов: число воркеров (1 — один процесс, как раньше)
+    WORKERS: int = int(os.getenv('WORKERS', 1))
+    # Как делить элементы между воркерами: uuid (хэш) | symbol (символ целиком)
+    WORKER_PARTITION_BY: str = os.getenv('WORKER_PARTITION_BY', 'uuid')
+    # Интервал отчёта воркера супервизору, секунды
+    WORKER_HEALTH_INTERVAL: float = float(os.getenv('WORKER_HEALTH_INTERVAL', 10))
+
+    # Шардинг между контейнерами: имя узла и список узлов через запятую (NODE_ID не задан — без шардинга)
+    NODE_ID: str | None = os.getenv('NODE_ID')
+    NODES: list[str] = [node.strip() for node in os.getenv('NODES', '').split(',') if node.strip()]
+    SHARD_VNODES: int = int(os.getenv('SHARD_VNODES', 128))
+    # Ключ в Redis (db 1) с актуальным составом кластера (JSON-список) и период его опроса
+    SHARD_NODES_KEY: str = os.getenv('SHARD_NODES_KEY', 'settings:monitoring-nodes')
+    SHARD_POLL_INTERVAL: float = float(os.getenv('SHARD_POLL_INTERVAL', 10))
+
+    # Горячий резерв: экземпляры делят аренду лидера в Redis (db 8), без аренды — только догоняют ленту MONITORING
+    STANDBY_ENABLED: bool = os.getenv('STANDBY_ENABLED', '0') == '1'
+    LEASE_KEY: str = os.getenv('LEASE_KEY', 'monitoring:leader')
+    LEASE_TTL_MS: int = int(os.getenv('LEASE_TTL_MS', 5000))
+    LEASE_RENEW_INTERVAL: float = float(os.getenv('LEASE_RENEW_INTERVAL', 1))
+
+    # JSON на границах Rabbit / Redis / API: auto (orjson → msgspec → json) | orjson | msgspec | json
+    JSON_BACKEND: str = os.getenv('JSON_BACKEND', 'auto')
+
+    # Локальный журнал очередей для быстрого рестарта (не задан — при старте полная загрузка ListOpen)
+    JOURNAL_DIR: str | None = os.getenv('JOURNAL_DIR')
+    JOURNAL_FLUSH_INTERVAL: float = float(os.getenv('JOURNAL_FLUSH_INTERVAL', 1))
+    # После скольких записей журнал сжимается в snapshot
+    JOURNAL_COMPACT_EVERY: int = int(os.getenv('JOURNAL_COMPACT_EVERY', 10000))
+
+    # Отчёт о запуске: время и пик памяти (tracemalloc) по фазам; трассировка выключается после старта
+    STARTUP_TRACEMALLOC: bool = os.getenv('STARTUP_TRACEMALLOC', '1') == '1'
 
 settings = Settings()
 
@@ -0,0 +1,117 @@
+# secrets.py
+"""
+Секреты Infisical для конфигурации.
+
+- проекты запрашиваются одновременно (по потоку на проект), позже в списке перезаписывает раньше
+- результат кэшируется в локальный файл (права 0600, запись через rename): рестарт стартует с кэша
+  без ожидания Infisical и сразу обновляет кэш в фоновом потоке — новые значения (ротация ключей)
+  вступают в силу со следующего запуска, даже если он через секунду
+- кэш старше ttl при старте не используется вслепую: сначала запрос к Infisical
+- Infisical недоступен — берём кэш любой давности; нет и кэша — ошибка, как раньше
+- offline — только переменные окружения (тесты, локальный запуск)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class SecretLoader:
+    def __init__(
+            self,
+            projects: list[str],
+            cache_path: str,
+            ttl: float = 3600,
+            offline: bool = False,
+    ):
+        self.projects = projects
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.offline = offline
+
+    # ---------- Infisical ----------
+    def _client(self):
+        from infisical_sdk import InfisicalSDKClient  # не нужен в offline-режиме
+
+        return InfisicalSDKClient(
+            host=os.getenv('INFISICAL_HOST'),
+            token=os.getenv('INFISICAL_TOKEN'),
+            cache_ttl=300
+        )
+
+    @staticmethod
+    def _project_secrets(client, project_slug: str) -> dict[str, str]:
+        resp = client.secrets.list_secrets(
+            project_slug=project_slug,
+            environment_slug=os.getenv('ENVIRONMENT_SLUG'),
+            secret_path="/"
+        )
+        return {s['secretKey']: s['secretValue'] for s in resp.to_dict()['secrets']}
+
+    def fetch(self) -> dict[str, str]:
+        # свой клиент на поток: запросы SDK синхронные, общий клиент между потоками не делим
+        with ThreadPoolExecutor(max_workers=len(self.projects)) as pool:
+            results = list(pool.map(lambda slug: self._project_secrets(self._client(), slug), self.projects))
+        secrets: dict[str, str] = {}
+        for project in results:
+            secrets.update(project)
+        return secrets
+
+    # ---------- кэш ----------
+    def _read_cache(self) -> tuple[dict[str, str], float] | None:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            return cached["secrets"], float(cached["fetched_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, secrets: dict[str, str]):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "secrets": secrets}, f)
+        os.replace(tmp, self.cache_path)
+
+    def refresh(self) -> dict[str, str]:
+        secrets = self.fetch()
+        try:
+            self._write_cache(secrets)
+        except OSError as e:
+            logger.error(f"[Config] Не удалось записать кэш секретов {self.cache_path}: {e}")
+        return secrets
+
+    def _refresh_in_background(self):
+        def run():
+            try:
+                self.refresh()
+                logger.info("[Config] Кэш секретов обновлён")
+            except Exception as e:
+                logger.error(f"[Config] Фоновое обновление секретов не удалось: {e}")
+        threading.Thread(target=run, name="secrets-refresh", daemon=True).start()
+
+    # ---------- загрузка ----------
+    def load(self) -> dict[str, str]:
+        if self.offline:
+            return {}
+
+        cached = self._read_cache()
+        if cached is not None and time.time() - cached[1] <= self.ttl:
+            self._refresh_in_background()
+            return cached[0]
+
+        try:
+            return self.refresh()
+        except Exception as e:
+            if cached is not None:
+                logger.error(f"[Config] Infisical недоступен, старт с устаревшего кэша секретов: {e}")
+                return cached[0]
+            logger.error(f"[Config] Infisical недоступен, кэша секретов нет: {e}")
+            raise
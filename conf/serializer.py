@@ -0,0 +1,84 @@
+# serializer.py
+"""
+JSON на границах процесса: RabbitMQ, Redis, HTTP API.
+
+- loads(data) — разбор прямо из bytes (тело Rabbit, ответ Redis/HTTP) без промежуточного .decode();
+  str тоже принимается. Невалидный JSON — ValueError при любом движке
+- dumpb(obj) — bytes для Redis и Rabbit
+- dumps(obj) — str (json_serialize для aiohttp)
+
+Движок выбирается один раз при импорте: orjson, затем msgspec, затем стандартный json.
+JSON_BACKEND фиксирует конкретный; если он не установлен — откат на json с ошибкой в логе.
+"""
+import json
+import logging
+
+from conf.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson — опциональная зависимость
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec — опциональная зависимость
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _choose(wanted: str) -> str:
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    if wanted == "auto":
+        return next(name for name in BACKENDS if available[name])
+    if wanted not in available:
+        logger.error(f"[Serializer] Неизвестный JSON_BACKEND={wanted} → json")
+        return "json"
+    if not available[wanted]:
+        logger.error(f"[Serializer] JSON_BACKEND={wanted}, но пакет не установлен → json")
+        return "json"
+    return wanted
+
+
+backend = _choose(settings.JSON_BACKEND)
+
+if backend == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data):
+        return orjson.loads(data)  # orjson.JSONDecodeError — подкласс ValueError
+
+    def dumpb(obj) -> bytes:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+
+elif backend == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def loads(data):
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumpb(obj) -> bytes:
+        return _encoder.encode(obj)
+
+    def dumps(obj) -> str:
+        return _encoder.encode(obj).decode()
+
+else:
+    def loads(data):
+        return json.loads(data)  # json.loads сам разбирает bytes (utf-8)
+
+    def dumpb(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def dumps(obj) -> str:
+        return json.dumps(obj)
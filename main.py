@@ -1,13 +1,26 @@
 # main.py
 import logging
-import sys
+import os
+import signal
 import asyncio
 
+from API.client import api_client
 from app.core.rabbitmq_consumer import RabbitMQConsumer
 from app.core.redis_listener import RedisListener
-from app.core.registry import load_handlers, load_triggers
+from app.core.registry import build_dispatch_table
 from app.core.initializer import InitialDataLoader
-
+from app.core.journal import HandlerJournal
+from app.core.leader import leader_lease
+from app.core.partition import local_partition
+from app.core.sharding import NodeShard, Placement, ShardMembership
+from app.core.standby import StandbyFeed
+from app.core.startup_profile import StartupProfile
+from app.core.supervisor import Supervisor
+from app.core.extremum_tracker import extremum_tracker
+from app.core.redis_batch import write_batch
+from app.core.state_mirror import order_mirror, position_mirror
+
+from conf.conf_redis import redis_server_data, redis_server_settings_async
 from conf.logg import setup_logging
 from conf.config import settings
 
@@ -15,12 +28,6 @@ from conf.config import settings
 logger = logging.getLogger(__name__)
 
 
-# 🧹 очищаем кэш, чтобы гарантированно не схватить старые классы
-for mod in list(sys.modules.keys()):
-    if mod.startswith("app.handlers") or mod.startswith("app.triggers"):
-        del sys.modules[mod]
-
-
 def print_bind_table(bindings: list[tuple]):
     """Выводит таблицу связей триггеров и хендлеров"""
     if not bindings:
@@ -37,93 +44,232 @@ def print_bind_table(bindings: list[tuple]):
     print("└────────────────────────┴──────────────────────────┴──────────────────────────┘\n")
 
 
-async def main():
-    # === 1. Загружаем классы ===
-
-    handler_classes = load_handlers()
-    trigger_classes = load_triggers()
-
-    handlers = [cls() for cls in handler_classes]
-    logger.info(f"[Init] Найдено обработчиков: {len(handlers)}")
-
-    # === 2. Первичная загрузка ===
-    loader = InitialDataLoader(settings.API_BASE_URL, handlers)
-    await loader.load_all()
-    logger.info("[Init] Первичная загрузка данных завершена")
+async def report_health(health_queue, handlers: list, redis_listener: RedisListener):
+    """Отчёт воркера супервизору раз в WORKER_HEALTH_INTERVAL"""
+    while True:
+        health_queue.put_nowait({
+            "index": local_partition.index,
+            "pid": os.getpid(),
+            "items": sum(len(h) for h in handlers),
+            "symbols": sorted({symbol for h in handlers for symbol in h.symbols}),
+            "channels": len(redis_listener.channels),
+            "dispatcher": redis_listener.dispatcher.stats(),
+        })
+        await asyncio.sleep(settings.WORKER_HEALTH_INTERVAL)
+
+
+async def rebalance(nodes: list[str], shard: NodeShard, placement: Placement, handlers: list, loader: InitialDataLoader):
+    """
+    Состав кластера изменился: отдаём элементы, ушедшие другим узлам, и догружаем пришедшие.
+    Консистентное хэширование двигает только ~1/N элементов.
+    """
+    shard.set_nodes(nodes)
+    await extremum_tracker.flush()  # состояние уходящих элементов — в Redis до того, как их подхватит новый узел
+    extremum_tracker.retain(lambda uuid: shard.owns({"uuid": uuid}))
+
+    dropped = 0
+    for handler in handlers:
+        dropped += len(await handler.drop_messages(lambda record: not placement.owns(record.body)))
+    await asyncio.gather(order_mirror.load(placement.owns), position_mirror.load(placement.owns))
+    before = sum(len(h) for h in handlers)
+    await loader.load_all()  # уже известные uuid отбрасываются как дубликаты
+    logger.info(
+        f"[Shard] Перебалансировка {shard}: отдано {dropped}, получено {sum(len(h) for h in handlers) - before}"
+    )
+
+
+async def main(worker_index: int = 0, worker_count: int = 1, health_queue=None):
+    startup = StartupProfile(trace_memory=settings.STARTUP_TRACEMALLOC)
+
+    # === 0. Доля элементов процесса: узел кластера (NODE_ID) → воркер на узле (WORKERS) ===
+    if worker_count > 1:
+        local_partition.configure(worker_index, worker_count, settings.WORKER_PARTITION_BY)
+    shard = NodeShard(settings.NODE_ID, settings.NODES, settings.SHARD_VNODES) if settings.NODE_ID else None
+    placement = Placement(local_partition, shard)
+    owns = placement.owns if placement.distributed else None
+    if placement.distributed:
+        logger.info(f"[Init] {placement}")
+
+    # === 0.1 Общий HTTP-клиент API (пул соединений на весь процесс) ===
+    await api_client.start()
+    startup.mark("api client")
+
+    # === 1. Хендлеры и триггеры: таблица очередь → хендлер, канал → триггеры (app.core.registry) ===
+    table = build_dispatch_table()
+    handlers = list(table.handlers.values())
+    logger.info(f"[Init] {table}")
+
+    # === 1.1 Резерв: лента MONITORING слушается до загрузки, чтобы не пропустить изменения лидера ===
+    feed = None
+    feed_task = None
+    if settings.STANDBY_ENABLED:
+        key = settings.LEASE_KEY
+        if placement.distributed:
+            key = f"{key}:{settings.NODE_ID or 'local'}:p{local_partition.index}"
+        leader_lease.configure(redis_server_data, key, settings.LEASE_TTL_MS, settings.LEASE_RENEW_INTERVAL)
+        feed = StandbyFeed(handlers, owns=owns)
+        feed_task = asyncio.create_task(feed.run())
+
+    # === 1.2 Копия состояния order:/position: из Redis ===
+    await asyncio.gather(order_mirror.load(owns), position_mirror.load(owns))
+    startup.mark("handlers + mirror")
+
+    # === 2. Первичная загрузка: с локального журнала, если он есть, иначе ListOpen ===
+    loader = InitialDataLoader(settings.API_BASE_URL, handlers, owns=owns)
+    journals = []
+    restored = 0
+    if settings.JOURNAL_DIR:
+        mirrors = {"order": order_mirror, "position": position_mirror}
+        name_suffix = f"{settings.NODE_ID or 'local'}.p{local_partition.index}"
+        for handler in handlers:
+            if handler.kind in mirrors:
+                journal = HandlerJournal(
+                    settings.JOURNAL_DIR,
+                    f"{handler.kind}.{name_suffix}",
+                    flush_interval=settings.JOURNAL_FLUSH_INTERVAL,
+                    compact_every=settings.JOURNAL_COMPACT_EVERY,
+                )
+                restored += await journal.restore(handler, mirrors[handler.kind].get)
+                journals.append((handler, journal))
+    restored_uuids = {handler.kind: journal.restored for handler, journal in journals}
+    if restored and feed is not None:
+        # резерв сверяется с API до ожидания аренды: к перехвату книги верны, ListOpen после него не нужен
+        startup.mark("journal restore")
+        await loader.reconcile(restored_uuids)
+        logger.info(f"[Init] Восстановлено из журнала: {restored}, сверено с API")
+        startup.mark("journal reconcile")
+    elif restored:
+        logger.info(f"[Init] Восстановлено из журнала: {restored}, сверка с API — в фоне")
+        startup.mark("journal restore")
+    else:
+        await loader.load_all()
+        logger.info("[Init] Первичная загрузка данных завершена")
+        startup.mark("ListOpen load")
+
+    # === 2.1 Резерв: ждём аренду, книги и экстремумы тем временем догоняют ленту ===
+    if feed is not None:
+        dropped = await feed.prune()
+        logger.info(f"[Standby] Удалено лидером во время загрузки: {dropped}")
+        await leader_lease.wait_acquired()
+        feed_task.cancel()
+        extremum_tracker.resync()
+        logger.info(f"[Standby] 👑 Перехват: элементов {sum(len(h) for h in handlers)}, событий ленты {feed.applied}")
+        for handler in handlers:
+            if handler.kind:
+                handler.add_item_listener(lambda body, kind=handler.kind: feed.announce(kind, body))
+        startup.mark("standby takeover")
+
+    # === 2.2 Журнал пишет только лидер: текущие очереди — его первый snapshot ===
+    for handler, journal in journals:
+        await journal.attach(handler)
+        handler.journal = journal
+    if journals:
+        startup.mark("journal snapshot")
 
     # === 3. Инициализация RabbitMQ ===
-    rabbit = RabbitMQConsumer(settings.RABBITMQ_URL)
+    # процесс слушает общую очередь, очередь узла {queue}@{node} и партиции {queue}@{node}.p{index};
+    # чужие сообщения пересылаются владельцу
+    rabbit = RabbitMQConsumer(
+        settings.RABBITMQ_URL,
+        router=placement.route if placement.distributed else None,
+        batch_size=settings.RABBIT_BATCH_SIZE,
+        batch_linger=settings.RABBIT_BATCH_LINGER_MS / 1000,
+        # без аренды доставки не подтверждаются, а возвращаются в очередь новому лидеру
+        is_active=lambda: leader_lease.is_leader,
+    )
     await rabbit.connect()
 
+    queues = []
     for handler in handlers:
         if handler.queue_name:
-            rabbit.register_callback(handler.queue_name, handler.add_message)
+            for queue_name in placement.queues(handler.queue_name):
+                queues.append(queue_name)
+                rabbit.register_callback(queue_name, handler.add_message, handler.bulk_add)
 
-    await rabbit.start([h.queue_name for h in handlers if h.queue_name])
+    await rabbit.start(queues)
+    startup.mark("rabbitmq")
 
     # === 4. Redis Listener ===
-    redis_listener = RedisListener(settings.REDIS_CONFIG, settings.REDIS_CHANNELS, handlers)
-    bindings = []
-    active_triggers = []  # 🧩 сюда положим все триггеры (даже временные)
-
-    logger.info("\n[DEBUG] Handlers list:")
-    for h in handlers:
-        logger.info(f"  {h.__class__.__name__}: queue_name={h.queue_name}")
-
-    logger.info("\n[DEBUG] Triggers list:")
-    for t in trigger_classes:
-        logger.info(f"  {t.__name__}: target_queue={getattr(t, 'target_queue', None)}, channel_name={getattr(t, 'channel_name', None)}")
-
-    for trigger_class in trigger_classes:
-        target_queue = getattr(trigger_class, "target_queue", None)
-        if not target_queue:
-            logger.warn(f"[WARN] У {trigger_class.__name__} не задан target_queue — пропуск")
-            continue
-
-        handler = next((h for h in handlers if str(h.queue_name) == str(target_queue)), None)
-
-        if not handler:
-            from app.handlers.base_handler import BaseHandler
-            handler = BaseHandler()
-            handler.queue_name = target_queue
-            logger.info(f"[INFO] 🧩 Создан временный хендлер для {trigger_class.__name__} (очередь {target_queue})")
-
-        trigger = trigger_class(handler)
-        active_triggers.append(trigger)
-
-        if getattr(trigger, "channel_name", None):
-            redis_listener.register_callback(trigger.channel_name, trigger.handle)
-            bindings.append((trigger_class.__name__, trigger.channel_name, handler.queue_name))
-            logger.info(f"[Bind] ✅ {trigger_class.__name__} ↔ {handler.__class__.__name__}")
-
-    logger.info(f"[Init] Найдено триггеров: {len(trigger_classes)}")
-    print_bind_table(bindings)
-
-    # === 🔧 Подмена временных хендлеров на реальные ===
-    real_handlers = {h.queue_name: h for h in handlers}
-    for trigger in active_triggers:
-        q = getattr(trigger.handler, "queue_name", None)
-        if q in real_handlers and not isinstance(trigger.handler, real_handlers[q].__class__):
-            trigger.handler = real_handlers[q]
-            logger.info(f"[Fix] 🔁 Обновил handler у {trigger.__class__.__name__} → {trigger.handler.__class__.__name__}")
-
-    # === 5. Redis слушатель ===
+    redis_listener = RedisListener(settings.REDIS_CONFIG)
+    for channel, triggers in table.channels.items():
+        for trigger in triggers:
+            redis_listener.register_callback(channel, trigger.handle)
+    print_bind_table(table.bindings())
+
+    # === 🔔 Подписки на kline:{symbol} следуют за открытыми элементами хендлеров ===
+    for handler in handlers:
+        handler.add_symbol_listener(redis_listener.on_symbol_change)
+
+    # === 5. Фоновые задачи триггеров (таймеры срока жизни и т.п.) ===
+    trigger_tasks = [asyncio.create_task(t.start()) for t in table.triggers]
+    trigger_tasks.append(asyncio.create_task(extremum_tracker.run()))
+    if settings.MIRROR_VERIFY_INTERVAL > 0:
+        for mirror in (order_mirror, position_mirror):
+            trigger_tasks.append(asyncio.create_task(mirror.run_verifier(settings.MIRROR_VERIFY_INTERVAL)))
+    if shard is not None:
+        membership = ShardMembership(redis_server_settings_async, settings.SHARD_NODES_KEY, settings.SHARD_POLL_INTERVAL)
+        trigger_tasks.append(asyncio.create_task(membership.run(
+            shard.ring.nodes,
+            lambda nodes: rebalance(nodes, shard, placement, handlers, loader),
+        )))
+    for _, journal in journals:
+        trigger_tasks.append(asyncio.create_task(journal.run()))
+    if restored and feed is None:
+        trigger_tasks.append(asyncio.create_task(loader.reconcile(restored_uuids)))
+    if health_queue is not None:
+        trigger_tasks.append(asyncio.create_task(report_health(health_queue, handlers, redis_listener)))
+
+    # === 6. Redis слушатель ===
     redis_task = asyncio.create_task(redis_listener.start())
+    startup.mark("bindings + tasks")
+    startup.report()
+
+    lease_task = asyncio.create_task(leader_lease.hold())
 
     try:
-        await redis_task
+        # аренда потеряна → перестаём действовать и выходим (перезапуск поднимет процесс резервом)
+        await asyncio.wait([redis_task, lease_task], return_when=asyncio.FIRST_COMPLETED)
     except asyncio.CancelledError:
         logger.info("[Main] Завершение по Ctrl+C")
     finally:
         logger.info("[Main] Закрываю соединения...")
-        await rabbit.connection.close()
+        for task in trigger_tasks + [redis_task, lease_task]:
+            task.cancel()
+        # сначала Rabbit: новых доставок нет, неподтверждённые и недособранная пачка — обратно в очередь
+        await rabbit.close()
+        if leader_lease.is_leader:
+            await extremum_tracker.flush()
+        # накопленное, пока были лидером (анонсы MONITORING:items для резерва, состояние), уходит в Redis
+        await write_batch.flush()
+        for _, journal in journals:
+            await journal.flush()
+        await leader_lease.release()
+        logger.info(f"[Main] Экстремумы: {extremum_tracker.stats()}, Redis: {write_batch.stats()}")
         await redis_listener.pubsub.aclose()
         await redis_listener.redis.aclose()
+        await api_client.close()
+
+
+def _sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_worker(worker_index: int, worker_count: int, health_queue):
+    """Точка входа процесса-воркера (режим WORKERS > 1)"""
+    setup_logging()
+    signal.signal(signal.SIGTERM, _sigterm)  # супервизор останавливает воркер → штатный finally в main()
+    try:
+        asyncio.run(main(worker_index, worker_count, health_queue))
+    except KeyboardInterrupt:
+        logger.info(f"[Worker {worker_index}] Завершение работы...")
 
 
 if __name__ == "__main__":
     try:
         setup_logging()
-        asyncio.run(main())
+        if settings.WORKERS > 1:
+            Supervisor(run_worker, settings.WORKERS, health_interval=settings.WORKER_HEALTH_INTERVAL).run()
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Завершение работы...")
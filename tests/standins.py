@@ -0,0 +1,205 @@
+"""
+Подмены брокеров для тестов без сети.
+
+- StandInBroker — RabbitMQ в памяти на месте aio_pika.connect_robust: очереди с круговой раздачей
+  консьюмерам, prefetch, delivery tag по каналу, ack/nack с multiple и requeue
+- StandInRedis — get/set поверх dict (состав кластера) и pubsub с очередью сообщений в памяти
+"""
+import asyncio
+import itertools
+from collections import deque
+
+
+class StandInMessage:
+    def __init__(self, channel: "StandInChannel", queue: "StandInQueue", body: bytes, delivery_tag: int):
+        self.channel = channel
+        self.queue = queue
+        self.body = body
+        self.delivery_tag = delivery_tag
+
+    async def ack(self, multiple: bool = False):
+        self.channel.settle(self.delivery_tag, multiple, requeue=False)
+        self.channel.broker.ack_calls += 1
+
+    async def nack(self, multiple: bool = False, requeue: bool = True):
+        self.channel.settle(self.delivery_tag, multiple, requeue=requeue)
+        self.channel.broker.nack_calls += 1
+
+
+class StandInQueue:
+    def __init__(self, broker: "StandInBroker", name: str):
+        self.broker = broker
+        self.name = name
+        self.pending: deque[bytes] = deque()
+        self.consumers: dict[str, tuple["StandInChannel", object]] = {}
+        self._turn = itertools.count()
+
+    def add_consumer(self, channel: "StandInChannel", callback) -> str:
+        tag = f"ctag-{self.name}-{next(self.broker.consumer_tags)}"
+        self.consumers[tag] = (channel, callback)
+        self.pump()
+        return tag
+
+    def put(self, body: bytes):
+        self.pending.append(body)
+        self.pump()
+
+    def pump(self):
+        """Раздаём очередь консьюмерам по кругу, пока у их каналов есть место под prefetch"""
+        while self.pending and self.consumers:
+            ready = [(channel, callback) for channel, callback in self.consumers.values() if channel.has_capacity()]
+            if not ready:
+                return
+            channel, callback = ready[next(self._turn) % len(ready)]
+            message = channel.deliver(self, self.pending.popleft())
+            self.broker.spawn(callback(message))
+
+
+class DeclaredQueue:
+    """Очередь, объявленная на канале: консьюмеры получают доставки этого канала"""
+    def __init__(self, queue: StandInQueue, channel: "StandInChannel"):
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    async def consume(self, callback, no_ack: bool = False) -> str:
+        return self.queue.add_consumer(self.channel, callback)
+
+    async def cancel(self, consumer_tag: str):
+        self.queue.consumers.pop(consumer_tag, None)
+
+
+class StandInExchange:
+    def __init__(self, broker: "StandInBroker"):
+        self.broker = broker
+
+    async def publish(self, message, routing_key: str):
+        self.broker.queue(routing_key).put(message.body)
+
+
+class StandInChannel:
+    def __init__(self, broker: "StandInBroker"):
+        self.broker = broker
+        self.prefetch = 0
+        self.unacked: dict[int, tuple[StandInQueue, bytes]] = {}
+        self._tags = itertools.count(1)
+        self.default_exchange = StandInExchange(broker)
+
+    async def set_qos(self, prefetch_count: int):
+        self.prefetch = prefetch_count
+
+    async def declare_queue(self, name: str, durable: bool = True) -> DeclaredQueue:
+        return DeclaredQueue(self.broker.queue(name), self)
+
+    def has_capacity(self) -> bool:
+        return not self.prefetch or len(self.unacked) < self.prefetch
+
+    def deliver(self, queue: StandInQueue, body: bytes) -> StandInMessage:
+        tag = next(self._tags)
+        self.unacked[tag] = (queue, body)
+        return StandInMessage(self, queue, body, tag)
+
+    def settle(self, tag: int, multiple: bool, requeue: bool):
+        tags = [t for t in self.unacked if t <= tag] if multiple else [tag]
+        if any(t not in self.unacked for t in tags):
+            raise RuntimeError(f"unknown delivery tag {tag}")  # как PRECONDITION_FAILED у брокера
+        for t in tags:
+            queue, body = self.unacked.pop(t)
+            if requeue:
+                queue.pending.appendleft(body)
+            else:
+                self.broker.acked += 1
+        for queue in list(self.broker.queues.values()):
+            queue.pump()
+
+    async def close(self):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, broker: "StandInBroker"):
+        self.broker = broker
+
+    async def channel(self) -> StandInChannel:
+        channel = StandInChannel(self.broker)
+        self.broker.channels.append(channel)
+        return channel
+
+    async def close(self):
+        pass
+
+
+class StandInBroker:
+    def __init__(self):
+        self.queues: dict[str, StandInQueue] = {}
+        self.channels: list[StandInChannel] = []
+        self.consumer_tags = itertools.count()
+        self.acked = 0  # подтверждённых доставок
+        self.ack_calls = 0  # вызовов basic.ack (multiple=True подтверждает много доставок одним вызовом)
+        self.nack_calls = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    async def connect_robust(self, url: str) -> StandInConnection:
+        return StandInConnection(self)
+
+    def queue(self, name: str) -> StandInQueue:
+        if name not in self.queues:
+            self.queues[name] = StandInQueue(self, name)
+        return self.queues[name]
+
+    def spawn(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def idle(self) -> bool:
+        """Очереди пусты и всё доставленное подтверждено"""
+        return not any(q.pending for q in self.queues.values()) and not any(c.unacked for c in self.channels)
+
+    def publish(self, queue_name: str, body: bytes):
+        self.queue(queue_name).put(body)
+
+
+class StandInPubSub:
+    """Pub/Sub на месте redis.asyncio PubSub: get_message отдаёт опубликованное по подписанным каналам"""
+    def __init__(self, redis: "StandInRedis"):
+        self.redis = redis
+        self.channels: set[str] = set()
+
+    async def subscribe(self, *channels: str):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels: str):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        while self.redis.published:
+            channel, data = self.redis.published.popleft()
+            if channel in self.channels:
+                return {"type": "message", "channel": channel.encode(), "data": data}
+        await asyncio.sleep(0)
+        return None
+
+    async def aclose(self):
+        pass
+
+
+class StandInRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.published: deque[tuple[str, bytes]] = deque()
+
+    def pubsub(self) -> StandInPubSub:
+        return StandInPubSub(self)
+
+    def publish(self, channel: str, data: bytes):
+        self.published.append((channel, data))
+
+    async def aclose(self):
+        pass
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value):
+        self.data[key] = value
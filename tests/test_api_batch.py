@@ -0,0 +1,115 @@
+"""BatchClient против локального aiohttp-сервера на месте API"""
+import asyncio
+import time
+
+from aiohttp import web
+
+from API.batch import BatchClient
+from API.client import api_client
+from conf.config import settings
+
+RESULTS = {200: True, 400: False}
+LINGER = 0.5
+
+
+class StandInApi:
+    def __init__(self, bulk_status: int = 200):
+        self.bulk_status = bulk_status
+        self.bulk_sizes: list[int] = []
+        self.singles = 0
+
+    async def bulk(self, request):
+        items = (await request.json())["items"]
+        if self.bulk_status != 200:
+            return web.Response(status=self.bulk_status)
+        self.bulk_sizes.append(len(items))
+        return web.json_response({"results": [{"status": 200} for _ in items]})
+
+    async def single(self, request):
+        self.singles += 1
+        return web.Response(status=200)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/monitoring/bulk", self.bulk)
+        app.router.add_post("/position/changeStatus", self.single)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await api_client.close()
+        await self.runner.cleanup()
+
+
+def _run(monkeypatch, scenario, bulk_status: int = 200):
+    async def main():
+        async with StandInApi(bulk_status) as api:
+            monkeypatch.setattr(settings, "API_BASE_URL", api.url)
+            client = BatchClient("/monitoring/bulk", linger=LINGER, max_size=100)
+
+            async def single():
+                async with api_client.request("POST", f"{api.url}/position/changeStatus") as resp:
+                    return RESULTS.get(resp.status)
+
+            def submit(n: int):
+                return client.submit("position/changeStatus", {"uuid": str(n)}, RESULTS, single)
+
+            await scenario(api, client, submit)
+    asyncio.run(main())
+
+
+def test_sequential_worker_does_not_wait_for_linger(monkeypatch):
+    async def scenario(api, client, submit):
+        started = time.perf_counter()
+        for n in range(5):  # TRIGGER_CONCURRENCY=1: следующий элемент ждёт ответа предыдущего
+            with client.worker():
+                assert await submit(n) is True
+        assert time.perf_counter() - started < LINGER
+        assert api.bulk_sizes == [1] * 5
+    _run(monkeypatch, scenario)
+
+
+def test_concurrent_workers_share_one_bulk(monkeypatch):
+    async def scenario(api, client, submit):
+        async def worker(n):
+            with client.worker():
+                await asyncio.sleep(0.01 * n)  # до смены статуса элементы доходят в разное время
+                return await submit(n)
+
+        started = time.perf_counter()
+        assert await asyncio.gather(*(worker(n) for n in range(8))) == [True] * 8
+        assert time.perf_counter() - started < LINGER
+        assert api.bulk_sizes == [8]
+    _run(monkeypatch, scenario)
+
+
+def test_finished_worker_releases_waiting_batch(monkeypatch):
+    async def scenario(api, client, submit):
+        async def submitting():
+            with client.worker():
+                return await submit(1)
+
+        async def idle():
+            with client.worker():
+                await asyncio.sleep(0.05)  # элемент без смены статуса
+
+        started = time.perf_counter()
+        result, _ = await asyncio.gather(submitting(), idle())
+        assert result is True
+        assert time.perf_counter() - started < LINGER
+    _run(monkeypatch, scenario)
+
+
+def test_unavailable_bulk_falls_back_to_single(monkeypatch):
+    async def scenario(api, client, submit):
+        with client.worker():
+            assert await submit(1) is True
+        assert not client.available
+        assert await submit(2) is True
+        assert api.singles == 2 and api.bulk_sizes == []
+    _run(monkeypatch, scenario, bulk_status=404)
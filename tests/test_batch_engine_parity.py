@@ -0,0 +1,124 @@
+"""
+Векторные книги (EVAL_MODE=numpy) против скалярных правил app/services/rules.py:
+на случайных книгах и свечах выборка ArrayOrderBook / ArrayPositionBook должна совпадать
+с тем, что по тем же правилам выбрал бы поэлементный проход (и индексная книга).
+"""
+import random
+import uuid
+from decimal import Decimal
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from API.schemas.order import OrderSchema  # noqa: E402
+from API.schemas.position import PositionSchema  # noqa: E402
+from app.core.batch_engine import ArrayOrderBook, ArrayPositionBook  # noqa: E402
+from app.core.books import OrderBook, PositionBook  # noqa: E402
+from app.core.records import ItemRecord  # noqa: E402
+from app.services.rules import entry_touched, extremum_breach, target_reached  # noqa: E402
+
+SEEDS = range(20)
+TICKS = 200
+
+
+def _order_body(rng: random.Random, n: int) -> dict:
+    return {
+        "id": n, "uuid": str(uuid.UUID(int=rng.getrandbits(128))), "status": "accept_monitoring",
+        "category": "option", "side": rng.choice(("buy", "sell")), "qty_tokens": "1",
+        "price": f"{rng.uniform(90, 110):.2f}", "accumulated_funding": "0",
+        # до 6 знаков: порог float ↔ Decimal проверяется на границе
+        "target_rate": str(Decimal(f"{rng.uniform(95, 105):.{rng.randint(0, 6)}f}")),
+        "created_at": "2025-11-21T05:19:13.852Z",
+    }
+
+
+def _position_body(rng: random.Random, n: int) -> dict:
+    return {
+        "id": n, "uuid": str(uuid.UUID(int=rng.getrandbits(128))), "status": "accept_monitoring",
+        "category": "option", "side": rng.choice(("buy", "sell")), "qty_tokens": "1",
+        "price": f"{rng.uniform(95, 105):.{rng.randint(0, 4)}f}", "is_test": False,
+        "created_at": "2025-11-21T05:19:13.852Z",
+    }
+
+
+def _candle(rng: random.Random, anchors: list[float]) -> tuple[float, float, float]:
+    """Свеча около цены случайного элемента — с попаданием ровно в границу"""
+    close = rng.choice(anchors) if anchors and rng.random() < 0.3 else rng.uniform(94, 106)
+    low = close - rng.choice((0.0, rng.uniform(0, 2)))
+    high = close + rng.choice((0.0, rng.uniform(0, 2)))
+    if anchors and rng.random() < 0.2:
+        low = min(low, rng.choice(anchors))
+    if anchors and rng.random() < 0.2:
+        high = max(high, rng.choice(anchors))
+    return close, low, high
+
+
+class ScalarModel:
+    """Поэлементный проход по правилам сервисов — эталон выборки"""
+    def __init__(self, hit):
+        self.hit = hit
+        self.records: dict = {}
+        self.extremums: dict = {}  # key → [max, min] принятых элементов
+
+    def select(self, close, low, high) -> set:
+        selected = set()
+        for key, record in self.records.items():
+            if key not in self.extremums:
+                selected.add(key)
+                continue
+            extremum = self.extremums[key]
+            new_max, new_min = extremum_breach(extremum[0], extremum[1], close)
+            if new_max:
+                extremum[0] = close
+            if new_min:
+                extremum[1] = close
+            if new_max or new_min or self.hit(record, close, low, high):
+                selected.add(key)
+        return selected
+
+
+def _run(rng, schema, make_body, books, model, anchor):
+    n = 0
+    for _ in range(TICKS):
+        # книга меняется между свечами: новые, принятые и удалённые элементы (строки переиспользуются)
+        for _ in range(rng.randint(0, 5)):
+            n += 1
+            record = ItemRecord.build(None, make_body(rng, n), schema)
+            assert record.valid, record.error
+            model.records[record.key] = record
+            for book in books:
+                book.on_add(record.key, record)
+        pending = [key for key in model.records if key not in model.extremums]
+        for key in rng.sample(pending, k=min(len(pending), rng.randint(0, 4))):
+            base = anchor(model.records[key])
+            state = {"max_price": base + rng.uniform(0, 3), "min_price": base - rng.uniform(0, 3)}
+            for book in books:
+                assert book.admit(key, model.records[key], state)
+            model.extremums[key] = [state["max_price"], state["min_price"]]
+        for key in rng.sample(list(model.records), k=min(len(model.records), rng.randint(0, 2))):
+            del model.records[key]
+            model.extremums.pop(key, None)
+            for book in books:
+                book.on_remove(key)
+
+        close, low, high = _candle(rng, [anchor(r) for r in model.records.values()])
+        expected = model.select(close, low, high)
+        for book in books:
+            assert set(book.select(close, low, high)) == expected, type(book).__name__
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_order_book_parity(seed):
+    rng = random.Random(seed)
+    model = ScalarModel(lambda r, close, low, high: target_reached(r.side, r.target_rate, Decimal(close)))
+    books = [ArrayOrderBook(capacity=4), OrderBook()]
+    _run(rng, OrderSchema, _order_body, books, model, lambda r: float(r.target_rate))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_position_book_parity(seed):
+    rng = random.Random(seed)
+    model = ScalarModel(lambda r, close, low, high: entry_touched(r.side, r.price, low, high))
+    books = [ArrayPositionBook(None, capacity=4), PositionBook()]
+    _run(rng, PositionSchema, _position_body, books, model, lambda r: r.price)
@@ -0,0 +1,64 @@
+import asyncio
+
+from app.core.redis_batch import RedisWriteBatch
+
+
+class FlakyClient:
+    """Redis-клиент, у которого первые failures pipeline падают"""
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.data: dict = {}
+        self.published: list = []
+
+    def pipeline(self, transaction: bool = False):
+        return FlakyPipeline(self)
+
+
+class FlakyPipeline:
+    def __init__(self, client: FlakyClient):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value):
+        self.commands.append(("set", key, value))
+
+    def delete(self, key):
+        self.commands.append(("delete", key))
+
+    def publish(self, channel, message):
+        self.commands.append(("publish", channel, message))
+
+    async def execute(self):
+        if self.client.failures:
+            self.client.failures -= 1
+            raise ConnectionError("redis down")
+        for command in self.commands:
+            if command[0] == "set":
+                self.client.data[command[1]] = command[2]
+            elif command[0] == "delete":
+                self.client.data.pop(command[1], None)
+            else:
+                self.client.published.append(command[1:])
+
+
+def test_failed_pipeline_is_retried_in_order():
+    async def scenario():
+        client = FlakyClient(failures=1)
+        batch = RedisWriteBatch(atomic=(client,), retry_delay=0.01)
+        batch.set(client, "order:1", b"open")
+        batch.publish(client, "MONITORING", b"set 1")
+        await batch.flush()
+        assert client.data == {} and len(batch) == 2
+        assert batch.pending(client, "order:1") == (True, b"open")
+
+        # пока ждём повтора, элемент закрылся: DELETE после SET, публикации по порядку
+        batch.delete(client, "order:1")
+        batch.publish(client, "MONITORING", b"delete 1")
+        assert batch.pending(client, "order:1") == (True, None)
+        await asyncio.sleep(0.05)
+
+        assert client.data == {}
+        assert client.published == [("MONITORING", b"set 1"), ("MONITORING", b"delete 1")]
+        assert len(batch) == 0 and batch.stats()["failures"] == 1
+
+    asyncio.run(scenario())
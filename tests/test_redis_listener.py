@@ -0,0 +1,68 @@
+"""RedisListener.start против подмены Redis (tests/standins.py): фильтр таймфрейма на обоих путях разбора"""
+import asyncio
+
+import pytest
+
+from app.core import redis_listener
+from app.core.redis_listener import RedisListener
+from app.schemas import kline
+from conf import serializer
+from tests.standins import StandInRedis
+
+CHANNEL = "kline:btcusdt"
+
+
+def kline_message(close: float, interval: str | None = None) -> bytes:
+    message = {
+        "type": "kline_update",
+        "data": {
+            "symbol": "btcusdt", "interval": 1, "ex": "bybit",
+            "data": {"ts": 1732166353852, "o": 100.0, "h": 110.0, "l": 90.0, "c": close,
+                     "v": 1.0, "t": 100.0, "dt": "2025-11-21 05:19:13"},
+        },
+    }
+    if interval is not None:
+        message["interval"] = interval
+    return serializer.dumpb(message)
+
+
+@pytest.fixture(params=["msgspec", "json"])
+def parse_path(request, monkeypatch):
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+        assert kline._kline_decoder is not None
+    else:
+        monkeypatch.setattr(kline, "_kline_decoder", None)
+    return request.param
+
+
+def test_other_intervals_are_not_dispatched(parse_path, monkeypatch):
+    redis = StandInRedis()
+    monkeypatch.setattr(redis_listener.aioredis, "Redis", lambda **config: redis)
+
+    async def scenario() -> list:
+        listener = RedisListener({}, poll_timeout=0.01)
+        submitted = []
+        monkeypatch.setattr(listener.dispatcher, "submit", lambda channel, cb, tick: submitted.append(tick))
+
+        async def callback(tick):
+            pass
+
+        listener.register_callback("kline:{symbol}", callback)
+        listener.on_symbol_change("btcusdt", True)
+        task = asyncio.create_task(listener.start())
+        while CHANNEL not in listener.channels:
+            await asyncio.sleep(0.001)
+
+        redis.publish(CHANNEL, kline_message(101.0, interval="5m"))
+        redis.publish(CHANNEL, kline_message(102.0, interval="1m"))
+        redis.publish(CHANNEL, kline_message(103.0))
+        redis.publish(CHANNEL, kline_message(104.0, interval="15m"))
+        while redis.published:
+            await asyncio.sleep(0.001)
+        await listener.stop()
+        await task
+        return submitted
+
+    submitted = asyncio.run(scenario())
+    assert [tick.close for tick in submitted] == [102.0, 103.0]
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from app.core import registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(code: str) -> set[str]:
+    """
+    Модули, которые импортирует code в чистом интерпретаторе: отчёт -X importtime
+    плюс sys.modules (importlib.import_module в отчёт importtime не попадает)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}\nimport sys\nprint(*sys.modules, sep='\\n')"],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True, check=True,
+    )
+    modules = set(result.stdout.split())
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def test_registry_import_is_lazy():
+    modules = imported_modules("import app.core.registry")
+    assert "app.core.registry" in modules
+    heavy = set(registry.MODULES) | {"app.handlers.base_handler", "app.triggers.base_trigger", "app.services", "API"}
+    assert not modules & heavy
+
+
+def test_load_modules_imports_manifest():
+    modules = imported_modules("from app.core.registry import load_modules; load_modules()")
+    assert set(registry.MODULES) <= modules
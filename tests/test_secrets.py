@@ -0,0 +1,69 @@
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from conf.secrets import SecretLoader
+
+
+class FakeLoader(SecretLoader):
+    """Infisical подменён: fetch отдаёт current или падает"""
+    def __init__(self, cache_path, current=None, ttl=3600.0):
+        super().__init__(["shared-all", "monitoring"], cache_path=cache_path, ttl=ttl)
+        self.current = current
+        self.fetches = 0
+        self.refreshed = threading.Event()
+
+    def fetch(self):
+        self.fetches += 1
+        if self.current is None:
+            raise ConnectionError("infisical down")
+        return dict(self.current)
+
+    def refresh(self):
+        try:
+            return super().refresh()
+        finally:
+            self.refreshed.set()
+
+
+def test_fresh_cache_starts_immediately_and_refreshes_in_background(tmp_path):
+    path = str(tmp_path / "secrets.json")
+    FakeLoader(path, {"TOKEN": "old"}).load()
+
+    rotated = FakeLoader(path, {"TOKEN": "new"})
+    assert rotated.load() == {"TOKEN": "old"}  # старт не ждёт Infisical
+    assert rotated.refreshed.wait(5)
+    assert FakeLoader(path, None).load() == {"TOKEN": "new"}  # следующий запуск — с новыми значениями
+
+
+def test_stale_cache_is_fetched_first(tmp_path):
+    path = str(tmp_path / "secrets.json")
+    FakeLoader(path, {"TOKEN": "old"}).load()
+    time.sleep(0.01)
+    assert FakeLoader(path, {"TOKEN": "new"}, ttl=0).load() == {"TOKEN": "new"}
+
+
+def test_stale_cache_used_when_infisical_is_down(tmp_path):
+    path = str(tmp_path / "secrets.json")
+    FakeLoader(path, {"TOKEN": "old"}).load()
+    time.sleep(0.01)
+    assert FakeLoader(path, None, ttl=0).load() == {"TOKEN": "old"}
+
+
+def test_no_cache_and_infisical_down_fails(tmp_path):
+    with pytest.raises(ConnectionError):
+        FakeLoader(str(tmp_path / "secrets.json"), None).load()
+
+
+def test_cache_file_is_private(tmp_path):
+    path = str(tmp_path / "cache" / "secrets.json")
+    FakeLoader(path, {"TOKEN": "x"}).load()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_offline_uses_environment_only(tmp_path):
+    loader = SecretLoader(["monitoring"], cache_path=str(tmp_path / "secrets.json"), offline=True)
+    assert loader.load() == {}
@@ -0,0 +1,40 @@
+import uuid
+
+from app.core.sharding import NodeShard
+
+UUIDS = [str(uuid.UUID(int=n * 7919 + 1)) for n in range(10000)]
+
+
+def owners(shards: dict, item_uuid: str) -> list[str]:
+    return [node for node, shard in shards.items() if shard.owns({"uuid": item_uuid})]
+
+
+def test_every_item_has_exactly_one_owner():
+    shards = {node: NodeShard(node, ["a", "b", "c"]) for node in "abc"}
+    assert all(len(owners(shards, item)) == 1 for item in UUIDS)
+
+
+def test_removed_node_owns_nothing_and_forwards():
+    shards = {node: NodeShard(node, ["a", "b", "c"]) for node in "abc"}
+    for shard in shards.values():
+        shard.set_nodes(["a", "b"])  # c выведен из кластера, но продолжает работать
+
+    assert not shards["c"].member
+    assert all(owners(shards, item) in (["a"], ["b"]) for item in UUIDS)
+    for item in UUIDS[:100]:
+        assert shards["c"].route("queue_monitoring_order", {"uuid": item}) in (
+            "queue_monitoring_order@a", "queue_monitoring_order@b",
+        )
+
+
+def test_only_items_of_removed_node_move():
+    before = NodeShard("a", ["a", "b", "c"])
+    after = NodeShard("a", ["a", "b"])
+    moved = [item for item in UUIDS if before.ring.node_for(item) != after.ring.node_for(item)]
+    assert all(before.ring.node_for(item) == "c" for item in moved)
+
+
+def test_empty_membership_is_standalone():
+    shard = NodeShard("a", [])
+    assert shard.member
+    assert all(shard.owns({"uuid": item}) for item in UUIDS[:100])
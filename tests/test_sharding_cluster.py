@@ -0,0 +1,103 @@
+"""
+Три экземпляра MONITORING против подмен RabbitMQ / Redis (tests/standins.py):
+раздача общей очереди с пересылкой владельцу и вывод узла из кластера
+(пропускная способность — benchmarks/bench_sharding.py).
+"""
+import asyncio
+import time
+import uuid
+
+import pytest
+
+aio_pika = pytest.importorskip("aio_pika")
+
+from app.core.partition import Partition  # noqa: E402
+from app.core.rabbitmq_consumer import RabbitMQConsumer  # noqa: E402
+from app.core.sharding import NodeShard, Placement, ShardMembership  # noqa: E402
+from app.handlers.base_handler import BaseHandler  # noqa: E402
+from conf import serializer  # noqa: E402
+from tests.standins import StandInBroker, StandInRedis  # noqa: E402
+
+QUEUE = "queue_monitoring_order"
+NODES_KEY = "settings:monitoring-nodes"
+MESSAGES = 3000
+
+
+class Instance:
+    """Узел MONITORING в тесте: шард, хендлер и консьюмер, как в main()"""
+    def __init__(self, node: str, nodes: list[str]):
+        self.node = node
+        self.shard = NodeShard(node, nodes)
+        self.placement = Placement(Partition(), self.shard)
+        self.handler = BaseHandler()
+        self.rabbit = RabbitMQConsumer("amqp://stand-in", router=self.placement.route)
+
+    async def start(self):
+        await self.rabbit.connect()
+        queues = self.placement.queues(QUEUE)
+        for queue in queues:
+            self.rabbit.register_callback(queue, self.handler.add_message)
+        await self.rabbit.start(queues)
+
+    async def on_nodes(self, nodes: list[str]):
+        self.shard.set_nodes(nodes)
+        await self.handler.drop_messages(lambda record: not self.placement.owns(record.body))
+
+    def uuids(self) -> set[str]:
+        return {record.uuid for record in self.handler.messages}
+
+
+async def _wait(condition, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.005)
+
+
+def _publish(broker: StandInBroker, start: int, count: int) -> list[str]:
+    uuids = [str(uuid.UUID(int=n)) for n in range(start, start + count)]
+    for item in uuids:
+        broker.publish(QUEUE, serializer.dumpb({"uuid": item, "symbol_name": "BTCUSDT"}))
+    return uuids
+
+
+def test_three_instances_route_and_rebalance(monkeypatch):
+    broker = StandInBroker()
+    redis = StandInRedis()
+    monkeypatch.setattr(aio_pika, "connect_robust", broker.connect_robust)
+
+    async def scenario():
+        nodes = ["a", "b", "c"]
+        instances = [Instance(node, nodes) for node in nodes]
+        for instance in instances:
+            await instance.start()
+
+        # общая очередь раздаётся всем трём, чужое пересылается в {queue}@{owner}
+        published = _publish(broker, 0, MESSAGES)
+        await _wait(lambda: sum(len(i.handler) for i in instances) == MESSAGES and broker.idle())
+
+        for item in published:
+            holders = [i.node for i in instances if item in i.uuids()]
+            assert holders == [instances[0].shard.owner({"uuid": item})]
+        assert all(len(i.handler) > MESSAGES / 5 for i in instances)
+
+        # c выводится из кластера: состав в Redis → ShardMembership → перебалансировка
+        await redis.set(NODES_KEY, serializer.dumpb(["a", "b"]))
+        membership = ShardMembership(redis, NODES_KEY, poll_interval=0.01)
+        tasks = [asyncio.create_task(membership.run(nodes, i.on_nodes)) for i in instances]
+        await _wait(lambda: all("c" not in i.shard.ring.nodes for i in instances))
+        await _wait(lambda: len(instances[2].handler) == 0)
+
+        more = _publish(broker, MESSAGES, MESSAGES)
+        await _wait(lambda: set(more) <= instances[0].uuids() | instances[1].uuids() and broker.idle())
+        assert not instances[2].uuids() & set(more)
+        for item in more:
+            assert sum(item in i.uuids() for i in instances) == 1
+
+        for task in tasks:
+            task.cancel()
+        for instance in instances:
+            await instance.rabbit.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+"""SortedIndex (блоки) против наивной модели: сортировка всего словаря на каждую выборку"""
+import random
+
+from app.core.sorted_index import SortedIndex
+
+
+def model_keys(model: dict, predicate) -> list:
+    return [key for key, value in sorted(model.items(), key=lambda kv: kv[1]) if predicate(value)]
+
+
+def test_matches_naive_model_across_block_splits():
+    rng = random.Random(7)
+    index, model = SortedIndex(load=4), {}
+    for step in range(5000):
+        key = rng.randrange(300)
+        if rng.random() < 0.3:
+            assert index.discard(key) == (key in model)
+            model.pop(key, None)
+        else:
+            value = rng.randrange(50)  # много равных значений — они расходятся по соседним блокам
+            index.add(key, value)
+            model[key] = value
+        assert len(index) == len(model)
+
+        if step % 50 == 0:
+            lo, hi = sorted(rng.randrange(-5, 55) for _ in range(2))
+            # порядок равных значений не определён — сравниваем множества и порядок значений
+            for got, expected in (
+                (index.between(lo, hi), model_keys(model, lambda v: lo <= v <= hi)),
+                (index.at_most(lo), model_keys(model, lambda v: v <= lo)),
+                (index.below(lo), model_keys(model, lambda v: v < lo)),
+                (index.at_least(hi), model_keys(model, lambda v: v >= hi)),
+                (index.above(hi), model_keys(model, lambda v: v > hi)),
+            ):
+                assert set(got) == set(expected)
+                assert [model[key] for key in got] == sorted(model[key] for key in got)
+            assert index.between(hi + 1, lo - 1) == []
+
+
+def test_clear_and_get():
+    index = SortedIndex(load=2)
+    for key in range(20):
+        index.add(key, 20 - key)
+    assert index.get(3) == 17 and 3 in index
+    assert index.at_most(2) == [19, 18]
+    index.clear()
+    assert len(index) == 0 and index.above(0) == [] and index.get(3) is None